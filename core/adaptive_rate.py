@@ -0,0 +1,128 @@
+import time
+import threading
+
+# Estados de actividad de la escena
+SCENE_IDLE = "idle"
+SCENE_ACTIVE = "active"
+SCENE_COOLDOWN = "cooldown"
+
+
+class AdaptiveRateController:
+    """
+    Cadencia coordinada de percepción: captura, inferencia y power_level en un solo sitio.
+    Implements:
+    - FPS de captura según la actividad (delta_score + fracción de tiles sucios): sube de
+      inmediato con movimiento, se mantiene hold_s y decae hasta idle_fps con la pantalla quieta
+    - Techo de FPS escalado por power_level (y gamer mode)
+    - Presupuesto de CPU: fps <= cpu_budget / coste de CPU medio por frame (captura + diff)
+    - inference_interval(): cadencia de _cycle_vision_autonomy derivada del power_level, sin
+      bajar del intervalo de captura y estirada cuando la escena está quieta
+    """
+    def __init__(self, idle_fps: float = 1.0, max_fps: float = 15.0, cpu_budget: float = 0.25,
+                 activity_low: float = 0.001, activity_high: float = 0.02, hold_s: float = 1.5,
+                 decay: float = 0.7, idle_inference_stretch: float = 4.0):
+        self.idle_fps = idle_fps
+        self.max_fps = max_fps
+        self.cpu_budget = cpu_budget  # fracción de un núcleo para el hilo de captura
+        self.activity_low = activity_low
+        self.activity_high = activity_high
+        self.hold_s = hold_s
+        self.decay = decay
+        self.idle_inference_stretch = idle_inference_stretch
+
+        self.power_level = 5.0
+        self.gamer_mode = False
+        self.fps = idle_fps
+        self.state = SCENE_IDLE
+        self.activity = 0.0
+        self._last_active = 0.0
+        self._frame_cost = None      # s de CPU por frame (media exponencial)
+        self._lock = threading.Lock()
+        self.stats = {"frames": 0, "budget_limited": 0, "raises": 0, "decays": 0}
+
+    # --- Entradas ---
+
+    def set_power(self, level: float, gamer_mode: bool = None):
+        with self._lock:
+            self.power_level = max(1.0, min(10.0, level))
+            if gamer_mode is not None:
+                self.gamer_mode = gamer_mode
+
+    def ceiling(self) -> float:
+        """FPS máximo permitido por power_level (gamer: +50%)"""
+        ceiling = self.max_fps * self.power_level / 10.0
+        if self.gamer_mode:
+            ceiling *= 1.5
+        return max(self.idle_fps, min(self.max_fps, ceiling))
+
+    def budget_fps(self) -> float:
+        """FPS que caben en el presupuesto de CPU con el coste medido por frame"""
+        if not self._frame_cost:
+            return float("inf")
+        return self.cpu_budget / self._frame_cost
+
+    def observe(self, delta_score: float, dirty_ratio: float = 0.0, frame_cost: float = None, now: float = None) -> float:
+        """Registra un frame capturado y devuelve el FPS objetivo para el siguiente"""
+        now = now or time.time()
+        with self._lock:
+            self.stats["frames"] += 1
+            if frame_cost is not None:
+                self._frame_cost = frame_cost if self._frame_cost is None else 0.8 * self._frame_cost + 0.2 * frame_cost
+            # delta_score es la media global: un cambio pequeño pesa poco; los tiles sucios lo localizan
+            self.activity = max(delta_score * 10.0, dirty_ratio)
+            ceiling = self.ceiling()
+
+            if self.activity >= self.activity_low:
+                # Movimiento: FPS proporcional a la actividad, sin esperar (ataque inmediato)
+                span = max(1e-9, self.activity_high - self.activity_low)
+                level = min(1.0, (self.activity - self.activity_low) / span)
+                target = self.idle_fps + (ceiling - self.idle_fps) * level
+                if target > self.fps:
+                    self.stats["raises"] += 1
+                self.fps = max(self.fps, target)
+                self._last_active = now
+                self.state = SCENE_ACTIVE
+            elif now - self._last_active < self.hold_s:
+                self.state = SCENE_COOLDOWN
+            else:
+                # Quieto: decaimiento multiplicativo hasta idle_fps
+                if self.fps > self.idle_fps:
+                    self.stats["decays"] += 1
+                self.fps = max(self.idle_fps, self.fps * self.decay)
+                self.state = SCENE_IDLE if self.fps <= self.idle_fps else SCENE_COOLDOWN
+
+            self.fps = min(self.fps, ceiling)
+            budget = self.budget_fps()
+            if self.fps > budget:
+                self.fps = max(0.1, budget) # el presupuesto manda, incluso por debajo de idle_fps
+                self.stats["budget_limited"] += 1
+            return self.fps
+
+    # --- Salidas ---
+
+    def capture_interval(self) -> float:
+        return 1.0 / self.fps
+
+    def inference_interval(self) -> float:
+        """Intervalo entre ciclos de visión/autonomía (antes calculado aparte en el orquestador)"""
+        if self.power_level >= 9.0:
+            base = 0.1 # Ultra-Instinct
+        else:
+            base = (0.3 if self.gamer_mode else 0.5) / (self.power_level / 5.0)
+        # No tiene sentido inferir más rápido de lo que llegan frames nuevos
+        interval = max(base, self.capture_interval())
+        if self.state == SCENE_IDLE:
+            interval *= self.idle_inference_stretch
+        return interval
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            "fps": round(self.fps, 2),
+            "state": self.state,
+            "activity": round(self.activity, 5),
+            "ceiling_fps": round(self.ceiling(), 2),
+            "budget_fps": round(self.budget_fps(), 2) if self._frame_cost else None,
+            "frame_cpu_ms": round(self._frame_cost * 1000, 2) if self._frame_cost else None,
+            "inference_interval": round(self.inference_interval(), 3),
+        }
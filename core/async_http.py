@@ -0,0 +1,226 @@
+import ssl
+import json
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+from core.http_pool import PoolHTTPError, get_shared_pool
+from core.cancellation import GenerationCancelled, cancel_scope, is_cancelled
+
+
+class AsyncResponse:
+    """Respuesta HTTP/1.1 leída incrementalmente desde un asyncio.StreamReader."""
+    def __init__(self, reader, status: int, reason: str, headers: dict, timeout: float):
+        self._reader = reader
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.timeout = timeout
+        self.complete = False # cuerpo consumido entero -> la conexión es reutilizable
+        self.will_close = headers.get("connection", "").lower() == "close"
+
+    async def _readline(self):
+        return await asyncio.wait_for(self._reader.readline(), self.timeout)
+
+    async def _readexactly(self, n):
+        return await asyncio.wait_for(self._reader.readexactly(n), self.timeout)
+
+    async def aiter_raw(self):
+        """Bloques del cuerpo tal y como llegan (Content-Length, chunked o hasta EOF)."""
+        if self.headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size_line = await self._readline()
+                if not size_line:
+                    raise ConnectionError("Chunked body truncated")
+                size = int(size_line.split(b";", 1)[0].strip(), 16)
+                if size == 0:
+                    # Trailers hasta la línea vacía
+                    while (await self._readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                data = await self._readexactly(size)
+                await self._readexactly(2) # CRLF
+                yield data
+        elif "content-length" in self.headers:
+            remaining = int(self.headers["content-length"])
+            while remaining > 0:
+                data = await asyncio.wait_for(self._reader.read(min(remaining, 65536)), self.timeout)
+                if not data:
+                    raise ConnectionError("Body truncated")
+                remaining -= len(data)
+                yield data
+        else:
+            self.will_close = True
+            while True:
+                data = await asyncio.wait_for(self._reader.read(65536), self.timeout)
+                if not data:
+                    break
+                yield data
+        self.complete = True
+
+    async def aiter_lines(self):
+        """Líneas del cuerpo (NDJSON de Ollama, SSE de Gemini)."""
+        buf = b""
+        async for data in self.aiter_raw():
+            buf += data
+            while b"\n" in buf:
+                line, buf = buf.split(b"\n", 1)
+                yield line
+        if buf:
+            yield buf
+
+    async def read(self) -> bytes:
+        return b"".join([d async for d in self.aiter_raw()])
+
+
+class AsyncHTTPClient:
+    """
+    Cliente HTTP/1.1 nativo de asyncio con keep-alive por host.
+    Equivalente async de HTTPSessionPool: un pool por event loop, sin hilos.
+    """
+    def __init__(self, pool_size: int = 4, timeout: float = 120.0, connect_timeout: float = 10.0):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._idle = {}  # (scheme, host, port) -> [(reader, writer), ...]
+        self._slots = {} # (scheme, host, port) -> asyncio.Semaphore
+        self._ssl = None
+
+    def _split(self, url: str):
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        return (scheme, parts.hostname, port), path
+
+    async def _connect(self, key, timeout):
+        scheme, host, port = key
+        ctx = None
+        if scheme == "https":
+            if self._ssl is None:
+                self._ssl = ssl.create_default_context()
+            ctx = self._ssl
+        return await asyncio.wait_for(asyncio.open_connection(host, port, ssl=ctx), timeout)
+
+    def _close(self, writer):
+        try:
+            writer.close()
+        except Exception:
+            pass
+
+    async def _send(self, conn, method, key, path, body, headers):
+        reader, writer = conn
+        _, host, port = key
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {host}:{port}", "Connection: keep-alive"]
+        hdrs = dict(headers or {})
+        if body is not None:
+            hdrs["Content-Length"] = str(len(body))
+        lines += [f"{k}: {v}" for k, v in hdrs.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b""))
+        await writer.drain()
+
+    async def _read_head(self, reader, timeout):
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        if not status_line:
+            raise ConnectionError("Connection closed before response")
+        _, status, *reason = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        headers = {}
+        while True:
+            line = await asyncio.wait_for(reader.readline(), timeout)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            k, _, v = line.decode("latin-1").partition(":")
+            headers[k.strip().lower()] = v.strip()
+        return int(status), (reason[0] if reason else ""), headers
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, body: bytes = None, headers: dict = None, timeout: float = None, cancel=None):
+        """
+        Entrega un AsyncResponse; la conexión vuelve al pool si el cuerpo se consumió entero.
+        `cancel` (CancellationToken, activable desde cualquier hilo) aborta el transporte.
+        """
+        key, path = self._split(url)
+        timeout = self.timeout if timeout is None else (timeout or None) # 0 = lectura sin límite
+        slots = self._slots.setdefault(key, asyncio.Semaphore(self.pool_size))
+        idle = self._idle.setdefault(key, [])
+        loop = asyncio.get_running_loop()
+        current = {}
+
+        def _abort():
+            writer = current.get("writer")
+            if writer is not None:
+                loop.call_soon_threadsafe(writer.transport.abort)
+
+        async with slots:
+            with cancel_scope(cancel, _abort):
+                conn, response = None, None
+                # Un socket reciclado puede estar caducado: se reintenta una vez con uno nuevo, sólo si
+                # falla al enviar o se cierra sin responder (nunca tras un timeout: el POST ya se procesa)
+                for attempt in range(2):
+                    if is_cancelled(cancel):
+                        raise GenerationCancelled()
+                    reused = bool(idle) and attempt == 0
+                    conn = idle.pop() if reused else await self._connect(key, min(self.connect_timeout, timeout or self.connect_timeout))
+                    current["writer"] = conn[1]
+                    try:
+                        await self._send(conn, method, key, path, body, headers)
+                        status, reason, hdrs = await self._read_head(conn[0], timeout)
+                        response = AsyncResponse(conn[0], status, reason, hdrs, timeout)
+                        break
+                    except (OSError, asyncio.IncompleteReadError) as e:
+                        self._close(conn[1])
+                        if is_cancelled(cancel):
+                            raise GenerationCancelled()
+                        if not reused or isinstance(e, TimeoutError):
+                            raise
+
+                try:
+                    if response.status >= 400:
+                        err_body = await response.read()
+                        raise PoolHTTPError(response.status, response.reason, err_body)
+                    yield response
+                except (OSError, asyncio.IncompleteReadError):
+                    if is_cancelled(cancel):
+                        raise GenerationCancelled()
+                    raise
+                finally:
+                    if response.complete and not response.will_close and not is_cancelled(cancel):
+                        idle.append(conn)
+                    else:
+                        self._close(conn[1])
+
+    async def request(self, method: str, url: str, body: bytes = None, headers: dict = None, timeout: float = None, cancel=None) -> bytes:
+        async with self.stream(method, url, body=body, headers=headers, timeout=timeout, cancel=cancel) as response:
+            return await response.read()
+
+    async def request_json(self, url: str, payload=None, timeout: float = None, cancel=None):
+        """POST JSON (o GET si payload es None) y decodifica la respuesta."""
+        if payload is None:
+            data = await self.request("GET", url, timeout=timeout, cancel=cancel)
+        else:
+            data = await self.request(
+                "POST", url,
+                body=json.dumps(payload).encode('utf-8'),
+                headers={'Content-Type': 'application/json'},
+                timeout=timeout,
+                cancel=cancel
+            )
+        return json.loads(data.decode('utf-8'))
+
+
+# Los streams de asyncio pertenecen a un loop concreto: un cliente por loop
+_CLIENTS = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> AsyncHTTPClient:
+    """Cliente compartido para el event loop en curso (mismos límites que el pool síncrono)."""
+    loop = asyncio.get_running_loop()
+    client = _CLIENTS.get(loop)
+    if client is None:
+        pool = get_shared_pool()
+        client = _CLIENTS[loop] = AsyncHTTPClient(pool_size=pool.pool_size, timeout=pool.timeout,
+                                                  connect_timeout=pool.connect_timeout)
+    return client
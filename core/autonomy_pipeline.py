@@ -0,0 +1,188 @@
+import time
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class BoundedQueue:
+    """
+    Cola acotada entre etapas. Llena: put() espera (contrapresión) o, con drop_oldest,
+    descarta lo más antiguo (para frames: gana el más reciente).
+    """
+    def __init__(self, maxsize: int = 1, drop_oldest: bool = False):
+        self.maxsize = maxsize
+        self.drop_oldest = drop_oldest
+        self._items = deque()
+        self._cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item, timeout: float = None) -> bool:
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                if self.drop_oldest:
+                    self._items.popleft()
+                    self.dropped += 1
+                elif not self._cond.wait_for(lambda: self.closed or len(self._items) < self.maxsize, timeout):
+                    self.dropped += 1
+                    return False
+            if self.closed:
+                return False
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self):
+        """Siguiente elemento, o None si la cola se cerró"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.closed or self._items)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def clear(self) -> int:
+        with self._cond:
+            n = len(self._items)
+            self._items.clear()
+            self.dropped += n
+            self._cond.notify_all()
+            return n
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class _Job:
+    __slots__ = ("payload", "created", "enqueued")
+
+    def __init__(self, payload, created):
+        self.payload = payload
+        self.created = created
+        self.enqueued = time.perf_counter()
+
+
+class _Stage:
+    def __init__(self, name, fn, queue):
+        self.name = name
+        self.fn = fn
+        self.queue = queue
+        self.thread = None
+        self.processed = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.service = deque(maxlen=256) # s dentro de fn
+        self.wait = deque(maxlen=256)    # s en la cola de entrada
+
+
+def _ms(values, q):
+    return round(float(np.percentile(values, q)) * 1000, 2) if values else 0.0
+
+
+class StagePipeline:
+    """
+    Etapas encadenadas por colas acotadas, cada una en su hilo (p. ej. inferencia -> actuación -> aprendizaje).
+    Implements:
+    - fn(payload) de cada etapa devuelve lo que pasa a la siguiente (None = nada más que hacer)
+    - Mientras una etapa procesa el elemento N, la anterior ya trabaja en N+1
+    - Contrapresión: una cola llena hace esperar a la etapa anterior (o descarta lo más antiguo)
+    - get_stats(): por etapa, procesados, descartes, profundidad de cola, espera y servicio
+      (p50/p99), utilización y throughput; extremo a extremo, latencia desde submit()
+    """
+    def __init__(self, name: str = "Pipeline"):
+        self.name = name
+        self.stages = []
+        self.started = None
+        self.submitted = 0
+        self.completed = 0
+        self._e2e = deque(maxlen=256)
+        self._lock = threading.Lock()
+
+    def add_stage(self, name: str, fn, maxsize: int = 1, drop_oldest: bool = False):
+        self.stages.append(_Stage(name, fn, BoundedQueue(maxsize, drop_oldest)))
+        return self
+
+    def start(self):
+        if self.started is not None:
+            return
+        self.started = time.perf_counter()
+        for i, stage in enumerate(self.stages):
+            nxt = self.stages[i + 1] if i + 1 < len(self.stages) else None
+            stage.thread = threading.Thread(target=self._run_stage, args=(stage, nxt), daemon=True,
+                                            name=f"{self.name}-{stage.name}")
+            stage.thread.start()
+
+    def submit(self, payload) -> bool:
+        """Entrada a la primera etapa (arranca los hilos la primera vez)"""
+        self.start()
+        with self._lock:
+            self.submitted += 1
+        return self.stages[0].queue.put(_Job(payload, time.perf_counter()))
+
+    def _run_stage(self, stage, nxt):
+        while True:
+            job = stage.queue.get()
+            if job is None:
+                return
+            t0 = time.perf_counter()
+            stage.wait.append(t0 - job.enqueued)
+            try:
+                out = stage.fn(job.payload)
+            except Exception as e:
+                stage.errors += 1
+                out = None
+                print(f"[{self.name}] {stage.name} error: {e}")
+            elapsed = time.perf_counter() - t0
+            stage.busy += elapsed
+            stage.service.append(elapsed)
+            stage.processed += 1
+            if out is not None and nxt is not None:
+                nxt.queue.put(_Job(out, job.created))
+            else:
+                with self._lock:
+                    self.completed += 1
+                    self._e2e.append(time.perf_counter() - job.created)
+
+    def cancel(self) -> int:
+        """Descarta todo lo pendiente (p. ej. autonomía detenida); lo que está en curso termina"""
+        return sum(stage.queue.clear() for stage in self.stages)
+
+    def stop(self):
+        for stage in self.stages:
+            stage.queue.close()
+        for stage in self.stages:
+            if stage.thread:
+                stage.thread.join(timeout=2)
+        self.started = None
+
+    @property
+    def pending(self) -> int:
+        return sum(len(stage.queue) for stage in self.stages)
+
+    def get_stats(self):
+        elapsed = max(1e-6, time.perf_counter() - self.started) if self.started else 0.0
+        stages = {}
+        for s in self.stages:
+            stages[s.name] = {
+                "processed": s.processed,
+                "dropped": s.queue.dropped,
+                "errors": s.errors,
+                "depth": len(s.queue),
+                "wait_ms": {"p50": _ms(s.wait, 50), "p99": _ms(s.wait, 99)},
+                "service_ms": {"p50": _ms(s.service, 50), "p99": _ms(s.service, 99)},
+                "utilization": round(s.busy / elapsed, 3) if elapsed else 0.0,
+                "throughput": round(s.processed / elapsed, 3) if elapsed else 0.0,
+            }
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "latency_ms": {"p50": _ms(self._e2e, 50), "p99": _ms(self._e2e, 99)},
+            "stages": stages,
+        }
@@ -0,0 +1,87 @@
+import threading
+
+
+class GenerationCancelled(Exception):
+    """La generación se abortó porque su CancellationToken se activó."""
+
+
+class CancellationToken:
+    """
+    Señal de cancelación cooperativa (API compatible con threading.Event).
+    Implements:
+    - set() / is_set() / clear() / wait() como un Event (SystemState.interrupt_signal)
+    - Callbacks registrados por los backends en vuelo: cortar el socket HTTP,
+      despertar una espera de slot... se ejecutan al instante en set()
+    """
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = {}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def set(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+        for cb in callbacks:
+            try:
+                cb()
+            except Exception as e:
+                print(f"[Cancellation] Callback error: {e}")
+
+    cancel = set
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def clear(self):
+        self._event.clear()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._event.wait(timeout)
+
+    def register(self, callback):
+        """Registra callback para el próximo set(). Si ya está activo, se ejecuta ya. Devuelve un handle."""
+        with self._lock:
+            self._next += 1
+            handle = self._next
+            self._callbacks[handle] = callback
+            fire = self._event.is_set()
+        if fire:
+            callback()
+        return handle
+
+    def unregister(self, handle):
+        with self._lock:
+            self._callbacks.pop(handle, None)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise GenerationCancelled()
+
+
+class cancel_scope:
+    """
+    `with cancel_scope(token, callback):` registra el callback mientras dura el bloque.
+    Acepta None o un threading.Event simple (sin callbacks: sólo sondeo con is_set()).
+    """
+    def __init__(self, token, callback):
+        self.token = token
+        self.callback = callback
+        self._handle = None
+
+    def __enter__(self):
+        if self.token is not None and hasattr(self.token, "register"):
+            self._handle = self.token.register(self.callback)
+        return self
+
+    def __exit__(self, *exc):
+        if self._handle is not None:
+            self.token.unregister(self._handle)
+        return False
+
+
+def is_cancelled(token) -> bool:
+    return token is not None and token.is_set()
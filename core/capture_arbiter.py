@@ -0,0 +1,157 @@
+import time
+import threading
+
+from core.frame_ring import FrameRing
+from core.frame_encoding import FrameEncodingCache
+from core.capture_backends import create_backend
+
+
+def _contains(outer, inner):
+    return inner[0] >= outer[0] and inner[1] >= outer[1] and inner[2] <= outer[2] and inner[3] <= outer[3]
+
+
+class CaptureArbiter:
+    """
+    Árbitro de la pantalla (sustituye al mutex global perception_lock).
+    Implements:
+    - Lectores/escritor: las capturas físicas (tick del VisionPipeline, instantánea de pantalla)
+      son escritores serializados por un único cerrojo de dispositivo; los recortes son lectores
+      sin cerrojo sobre frames ya publicados (validados por secuencia en el FrameRing), así que
+      un barrido OCR o un crop nunca paran la captura en vivo
+    - region_b64/region_array(bbox): recorte del frame más reciente del pipeline si lo contiene
+      y tiene menos de max_age s (si está viejo, adelanta el tick del pipeline y espera ese frame)
+    - Fuera de la ventana capturada: recorte de una instantánea de pantalla completa compartida
+      por todas las peticiones del mismo tick (un grab físico para N consumidores: barrido OCR)
+    """
+    def __init__(self, pipeline=None, backend=None, max_age: float = 0.5, wait_timeout: float = 1.0):
+        self.pipeline = pipeline
+        self.backend = create_backend(backend) if backend is not None else None # None = el del pipeline
+        self.max_age = max_age
+        self.wait_timeout = wait_timeout
+        self._device = threading.Lock() # grabs físicos, uno cada vez
+        self._snapshot = FrameRing(2)     # pantalla completa, para regiones fuera del pipeline
+        self._snapshot_encodings = FrameEncodingCache(max_frames=2)
+        self.stats = {"ticks": 0, "snapshots": 0, "regions": 0, "from_pipeline": 0,
+                      "from_snapshot": 0, "wakeups": 0, "misses": 0}
+
+    def _backend(self):
+        if self.backend is None and self.pipeline is None:
+            self.backend = create_backend()
+        return self.backend or self.pipeline.backend
+
+    # --- Capturas físicas (escritores) ---
+
+    def grab(self, backend, bbox, ring):
+        """Tick del pipeline: grab físico del backend al slot libre del anillo"""
+        with self._device:
+            self.stats["ticks"] += 1
+            return backend.grab_into(bbox, ring)
+
+    def _snapshot_frame(self, max_age):
+        """(seq, vista) de una instantánea de pantalla completa con menos de max_age s"""
+        seq, frame = self._snapshot.latest()
+        if frame is not None and time.time() - self._snapshot.timestamp(seq) <= max_age:
+            return seq, frame
+        with self._device:
+            # Single-flight: quien esperaba el cerrojo reutiliza la instantánea recién tomada
+            seq, frame = self._snapshot.latest()
+            if frame is not None and time.time() - self._snapshot.timestamp(seq) <= max_age:
+                return seq, frame
+            backend = self._backend()
+            if backend.grab_into(None, self._snapshot) is None:
+                return 0, None
+            self.stats["snapshots"] += 1
+            seq = self._snapshot.commit(origin=backend.screen_origin())
+            return seq, self._snapshot.get(seq)
+
+    def request_frame(self, after_seq=None, timeout=None):
+        """Adelanta el tick del pipeline y espera un frame posterior a after_seq (peticiones concurrentes comparten frame)"""
+        if after_seq is None:
+            after_seq = self.pipeline.frame_seq
+        self.stats["wakeups"] += 1
+        self.pipeline.wake()
+        return self.pipeline.wait_for_frame(after_seq, timeout or self.wait_timeout)
+
+    # --- Regiones (lectores) ---
+
+    def _pipeline_source(self, bbox, max_age):
+        """(seq, crop relativo) del frame del pipeline que contiene bbox, o (None, None)"""
+        vp = self.pipeline
+        if vp is None or not vp.running:
+            return None, None
+        for attempt in range(2):
+            seq, frame = vp.get_frame()
+            origin = vp.ring.origin(seq) if frame is not None else None
+            if origin is None:
+                return None, None
+            h, w = frame.shape[:2]
+            if not _contains((origin[0], origin[1], origin[0] + w, origin[1] + h), bbox):
+                return None, None
+            if time.time() - vp.ring.timestamp(seq) <= max_age:
+                return seq, (bbox[0] - origin[0], bbox[1] - origin[1], bbox[2] - origin[0], bbox[3] - origin[1])
+            if attempt == 0 and self.request_frame(seq)[0] is None:
+                return None, None
+        return None, None
+
+    def _snapshot_crop(self, bbox, seq, frame):
+        """Crop relativo a la instantánea (su origen en pantalla puede no ser (0, 0)), o None si no contiene bbox"""
+        origin = self._snapshot.origin(seq)
+        if origin is None:
+            return None
+        ox, oy = origin
+        h, w = frame.shape[:2]
+        if not _contains((ox, oy, ox + w, oy + h), bbox):
+            return None
+        return (bbox[0] - ox, bbox[1] - oy, bbox[2] - ox, bbox[3] - oy)
+
+    def region_b64(self, bbox, fmt="png", quality=None, max_size=None, max_age=None):
+        """Región (x1, y1, x2, y2) de pantalla codificada en base64, o None"""
+        max_age = self.max_age if max_age is None else max_age
+        self.stats["regions"] += 1
+        seq, crop = self._pipeline_source(bbox, max_age)
+        if seq is not None:
+            _, b64 = self.pipeline.get_encoded(fmt, quality, max_size, crop=crop, seq=seq)
+            if b64:
+                self.stats["from_pipeline"] += 1
+                return b64
+        seq, frame = self._snapshot_frame(max_age)
+        if frame is not None:
+            crop = self._snapshot_crop(bbox, seq, frame)
+            if crop:
+                b64 = self._snapshot_encodings.get(seq, frame, fmt, quality, max_size, crop)
+                if self._snapshot.valid(seq):
+                    self.stats["from_snapshot"] += 1
+                    return b64
+        self.stats["misses"] += 1
+        return None
+
+    def region_array(self, bbox, max_age=None):
+        """Copia BGR de la región (x1, y1, x2, y2) de pantalla, o None"""
+        max_age = self.max_age if max_age is None else max_age
+        self.stats["regions"] += 1
+        seq, crop = self._pipeline_source(bbox, max_age)
+        if seq is not None:
+            frame = self.pipeline.ring.get(seq)
+            if frame is not None:
+                out = frame[crop[1]:crop[3], crop[0]:crop[2]].copy()
+                if self.pipeline.ring.valid(seq):
+                    self.stats["from_pipeline"] += 1
+                    return out
+        seq, frame = self._snapshot_frame(max_age)
+        if frame is not None:
+            crop = self._snapshot_crop(bbox, seq, frame)
+            if crop:
+                out = frame[crop[1]:crop[3], crop[0]:crop[2]].copy()
+                if self._snapshot.valid(seq):
+                    self.stats["from_snapshot"] += 1
+                    return out
+        self.stats["misses"] += 1
+        return None
+
+    def get_stats(self):
+        grabs = self.stats["ticks"] + self.stats["snapshots"]
+        return {
+            **self.stats,
+            "physical_grabs": grabs,
+            "regions_per_grab": round(self.stats["regions"] / grabs, 2) if grabs else 0.0,
+        }
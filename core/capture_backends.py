@@ -0,0 +1,200 @@
+import os
+import time
+import threading
+import numpy as np
+import cv2
+
+try:
+    from PIL import ImageGrab
+except ImportError:
+    ImageGrab = None
+
+try:
+    import mss
+except ImportError:
+    mss = None
+
+
+class CaptureBackend:
+    """
+    Interfaz de captura del VisionPipeline.
+    grab_into(bbox, ring) escribe el frame BGR en el slot libre del FrameRing (ring.acquire)
+    y devuelve ese buffer; el pipeline lo publica con commit(). bbox = (left, top, right, bottom)
+    o None para la pantalla completa.
+    """
+    name = "base"
+
+    def __init__(self):
+        self.frames = 0
+        self.capture_time = 0.0 # s de reloj dentro de grab_into
+        self.cpu_time = 0.0     # s de CPU del hilo de captura dentro de grab_into
+
+    def grab_into(self, bbox, ring):
+        t0, c0 = time.perf_counter(), time.thread_time()
+        frame = self._grab_into(bbox, ring)
+        self.capture_time += time.perf_counter() - t0
+        self.cpu_time += time.thread_time() - c0
+        if frame is not None:
+            self.frames += 1
+        return frame
+
+    def _grab_into(self, bbox, ring):
+        raise NotImplementedError
+
+    def screen_origin(self):
+        """(left, top) en pantalla de una captura completa (bbox=None); el monitor principal está en (0, 0)"""
+        return (0, 0)
+
+    def close(self):
+        pass
+
+    def get_stats(self):
+        n = max(1, self.frames)
+        return {
+            "backend": self.name,
+            "frames": self.frames,
+            "capture_ms": round(self.capture_time / n * 1000, 2),
+            "cpu_ms": round(self.cpu_time / n * 1000, 2),
+        }
+
+
+class PILCaptureBackend(CaptureBackend):
+    """PIL.ImageGrab (backend original): grab + conversión RGB->BGR sobre el slot"""
+    name = "pil"
+
+    def _grab_into(self, bbox, ring):
+        img = ImageGrab.grab(bbox=bbox) if bbox else ImageGrab.grab()
+        rgb = np.asarray(img)
+        slot = ring.acquire(rgb.shape)
+        cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR, dst=slot)
+        return slot
+
+
+class MSSCaptureBackend(CaptureBackend):
+    """
+    mss: XShmGetImage en Linux (memoria compartida con el servidor X), BitBlt en Windows.
+    El buffer BGRA se lee sin copia (np.frombuffer) y se convierte directamente al slot.
+    """
+    name = "mss"
+
+    def __init__(self):
+        super().__init__()
+        self._local = threading.local() # las instancias de mss no se comparten entre hilos
+
+    def _sct(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            factory = getattr(mss, "MSS", None) or mss.mss
+            sct = self._local.sct = factory()
+        return sct
+
+    def _grab_into(self, bbox, ring):
+        sct = self._sct()
+        if bbox:
+            left, top, right, bottom = bbox
+            region = {"left": left, "top": top, "width": right - left, "height": bottom - top}
+        else:
+            # Monitor principal (como ImageGrab.grab() en Windows; en Linux/X11 PIL captura la ventana
+            # raíz, todo el escritorio virtual). monitors[0] es el escritorio virtual, cuyo origen puede
+            # ser negativo con monitores a la izquierda o encima del principal. El origen del frame se
+            # publica con screen_origin() y las regiones pasan por CaptureArbiter, que recorta con él
+            region = sct.monitors[1]
+        shot = sct.grab(region)
+        w, h = shot.size
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(h, w, 4)
+        slot = ring.acquire((h, w, 3))
+        cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=slot)
+        return slot
+
+    def screen_origin(self):
+        monitor = self._sct().monitors[1]
+        return (monitor["left"], monitor["top"])
+
+    def close(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is not None:
+            sct.close()
+            self._local.sct = None
+
+
+class SyntheticCaptureBackend(CaptureBackend):
+    """
+    Backend sin pantalla (headless) para pruebas y benchmarks.
+    Con frames=[...] reproduce esos frames BGR en bucle; si no, genera un escritorio
+    sintético (fondo, ventana, texto) con un bloque que se mueve cada frame.
+    """
+    name = "synthetic"
+
+    def __init__(self, width=1920, height=1080, frames=None):
+        super().__init__()
+        self.frames_src = list(frames) if frames else None
+        self.width, self.height = width, height
+        self._base = None
+        self._i = 0
+
+    def _desktop(self):
+        base = np.full((self.height, self.width, 3), (48, 40, 36), np.uint8)
+        cv2.rectangle(base, (60, 50), (self.width - 200, self.height - 100), (245, 245, 245), -1)
+        cv2.rectangle(base, (60, 50), (self.width - 200, 90), (120, 80, 30), -1)
+        for row in range(0, self.height - 200, 40):
+            cv2.putText(base, f"linea {row // 40} texto de ejemplo", (80, 130 + row),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (20, 20, 20), 2)
+        return base
+
+    def _grab_into(self, bbox, ring):
+        i, self._i = self._i, self._i + 1
+        if self.frames_src:
+            src = self.frames_src[i % len(self.frames_src)]
+        else:
+            if self._base is None:
+                self._base = self._desktop()
+            src = self._base
+        if bbox:
+            left, top, right, bottom = bbox
+            src = src[top:bottom, left:right]
+        slot = ring.acquire(src.shape)
+        np.copyto(slot, src)
+        if not self.frames_src:
+            h, w = slot.shape[:2]
+            x, y = (i * 37) % max(1, w - 64), (i * 23) % max(1, h - 64)
+            slot[y:y + 64, x:x + 64] = (0, 0, 255) # "cursor" / animación
+        return slot
+
+
+BACKENDS = {
+    "pil": PILCaptureBackend,
+    "mss": MSSCaptureBackend,
+    "synthetic": SyntheticCaptureBackend,
+}
+
+
+def available_backends():
+    names = ["synthetic"]
+    if ImageGrab is not None:
+        names.insert(0, "pil")
+    if mss is not None:
+        names.insert(0, "mss")
+    return names
+
+
+def create_backend(name=None, **kwargs):
+    """
+    Backend por nombre. None -> variable ARAFURA_CAPTURE_BACKEND o 'auto'.
+    'auto' elige mss si está instalado y, si no, PIL.ImageGrab.
+    'replay:<fichero.arec>' reproduce una sesión grabada (core.frame_recording).
+    """
+    if isinstance(name, CaptureBackend):
+        return name
+    name = name or os.getenv("ARAFURA_CAPTURE_BACKEND", "auto")
+    if name.lower().startswith("replay:"):
+        from core.frame_recording import ReplayCaptureBackend
+        return ReplayCaptureBackend(name.split(":", 1)[1], **kwargs)
+    name = name.lower()
+    if name == "auto":
+        name = "mss" if mss is not None else "pil"
+    if name == "mss" and mss is None:
+        print("[Capture] mss not installed, falling back to PIL.ImageGrab")
+        name = "pil"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown capture backend '{name}' (available: {', '.join(BACKENDS)})")
+    return BACKENDS[name](**kwargs)
@@ -0,0 +1,106 @@
+import numpy as np
+import cv2
+
+
+class DirtyTileMap:
+    """
+    Mapa de cambios por tiles (visión diferencial por regiones).
+    Implements:
+    - Puntuación por tile = media de |diff| (todos los canales) / 255, exacta también en los
+      tiles del borde: imagen integral (cv2.integral sobre un buffer preasignado) y cuatro
+      esquinas por tile, sin bucles Python
+    - Máscara de tiles sucios (score > threshold)
+    - Regiones sucias: componentes conexas de la máscara -> bounding boxes en píxeles
+    """
+    def __init__(self, tile: int = 32, threshold: float = 0.01):
+        self.tile = tile
+        self.threshold = threshold
+        self.frame_shape = None
+        self.scores = None  # (th, tw) float32
+        self.mask = None    # (th, tw) uint8, 1 = sucio
+        self._integral = None # (h+1, w+1, C) int32
+        self._ys = self._xs = None # bordes de los tiles
+        self._area = None   # muestras reales de cada tile * 255 (los del borde pueden ser menores)
+        self._regions = None
+
+    def _alloc(self, h, w, channels=1):
+        t = self.tile
+        self.frame_shape = (h, w)
+        self._ys = np.r_[np.arange(0, h, t), h]
+        self._xs = np.r_[np.arange(0, w, t), w]
+        th, tw = len(self._ys) - 1, len(self._xs) - 1
+        self._integral = np.zeros((h + 1, w + 1, channels), np.int32)
+        self.scores = np.zeros((th, tw), np.float32)
+        self.mask = np.zeros((th, tw), np.uint8)
+        self._area = (np.outer(np.diff(self._ys), np.diff(self._xs)) * (255.0 * channels)).astype(np.float32)
+
+    def update(self, diff):
+        """diff: |frame - anterior| (uint8, HxW o HxWxC). Devuelve la fracción de tiles sucios."""
+        h, w = diff.shape[:2]
+        channels = diff.shape[2] if diff.ndim == 3 else 1
+        if self.frame_shape != (h, w) or self._integral.shape[2] != channels:
+            self._alloc(h, w, channels)
+        integral = cv2.integral(diff, self._integral.reshape(h + 1, w + 1, channels), sdepth=cv2.CV_32S)
+        if integral.ndim == 2:
+            integral = integral[:, :, None]
+        corners = integral[np.ix_(self._ys, self._xs)]
+        # En int32 (con desbordamiento modular) las diferencias de esquinas siguen siendo exactas
+        sums = corners[1:, 1:] - corners[:-1, 1:] - corners[1:, :-1] + corners[:-1, :-1]
+        np.divide(sums.sum(axis=2), self._area, out=self.scores, casting='unsafe')
+        np.greater(self.scores, self.threshold, out=self.mask, casting='unsafe')
+        self._regions = None
+        return self.dirty_ratio
+
+    def load(self, scores, frame_shape):
+        """Adopta puntuaciones calculadas fuera (p. ej. en el proceso de captura)"""
+        h, w = frame_shape
+        if self.frame_shape != (h, w) or self.scores.shape != scores.shape:
+            self._alloc(h, w)
+        np.copyto(self.scores, scores)
+        np.greater(self.scores, self.threshold, out=self.mask, casting='unsafe')
+        self._regions = None
+
+    def mark_all(self, h, w, channels=3):
+        """Frame nuevo o cambio de tamaño: todo se considera sucio"""
+        if self.frame_shape != (h, w):
+            self._alloc(h, w, channels)
+        self.scores.fill(1.0)
+        self.mask.fill(1)
+        self._regions = None
+
+    @property
+    def dirty_ratio(self) -> float:
+        if self.mask is None:
+            return 0.0
+        return float(np.count_nonzero(self.mask)) / self.mask.size
+
+    def regions(self, pad: int = 0):
+        """
+        Regiones sucias (tiles conexos, 8-vecindad) de mayor a menor:
+        [{"bbox": (x1, y1, x2, y2), "tiles": n, "score": máx}], bbox en píxeles del frame.
+        """
+        if self.mask is None:
+            return []
+        if self._regions is None:
+            t = self.tile
+            h, w = self.frame_shape
+            n, labels, stats, _ = cv2.connectedComponentsWithStats(self.mask, connectivity=8)
+            out = []
+            for i in range(1, n):
+                x, y, bw, bh, tiles = (int(v) for v in stats[i])
+                score = float(self.scores[y:y + bh, x:x + bw][labels[y:y + bh, x:x + bw] == i].max())
+                out.append({
+                    "bbox": (x * t, y * t, min(w, (x + bw) * t), min(h, (y + bh) * t)),
+                    "tiles": tiles,
+                    "score": round(score, 4),
+                })
+            out.sort(key=lambda r: r["tiles"], reverse=True)
+            self._regions = out
+        if not pad:
+            return list(self._regions)
+        h, w = self.frame_shape
+        return [
+            {**r, "bbox": (max(0, r["bbox"][0] - pad), max(0, r["bbox"][1] - pad),
+                           min(w, r["bbox"][2] + pad), min(h, r["bbox"][3] + pad))}
+            for r in self._regions
+        ]
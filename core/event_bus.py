@@ -0,0 +1,122 @@
+import asyncio
+import itertools
+import threading
+from collections import deque
+
+# Temas con pérdida: sólo importa el último valor (estado / frame más reciente)
+LATEST_TOPICS = ("vision_frame", "vision_crop", "vision_regions", "monitor_update", "nucleus_update",
+                 "autonomy_pipeline")
+
+
+class EventBus:
+    """
+    Bus de eventos orquestador -> API: post() desde cualquier hilo sin bloquear; un único
+    consumidor asyncio los reparte por lotes (sustituye a un run_coroutine_threadsafe por evento).
+    Implements:
+    - Temas "latest" (vision_frame, monitor_update...): se fusionan, el consumidor recibe sólo
+      el último valor pendiente de cada uno
+    - Temas ordenados (chat_response, visual_log, thought_stream...): cola FIFO acotada por tema,
+      sin pérdida mientras el consumidor siga el ritmo (desbordada: se descarta lo más antiguo y se cuenta)
+    - Cada evento lleva una secuencia y el lote se entrega en orden de publicación (dentro de
+      cada tema, siempre; entre temas, salvo que uno supere max_batch pendientes)
+    - Sin cerrojos en post(): deque.append / asignación en dict (atómicos en CPython) y, como
+      mucho, un call_soon_threadsafe por lote para despertar al consumidor
+    """
+    def __init__(self, latest_topics=LATEST_TOPICS, max_pending: int = 1024, max_batch: int = 256):
+        self.latest_topics = set(latest_topics)
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self._seq = itertools.count(1)
+        self._latest = {}          # tema -> (seq, payload)
+        self._queues = {}          # tema -> deque[(seq, payload)]
+        self._queues_lock = threading.Lock() # sólo para crear la cola de un tema nuevo
+        self._loop = None
+        self._wake = None
+        self._scheduled = False
+        self.stats = {"posted": 0, "delivered": 0, "coalesced": 0, "overflowed": 0, "batches": 0,
+                      "wakeups": 0, "max_batch": 0}
+
+    # --- Productores (cualquier hilo) ---
+
+    def post(self, topic: str, payload):
+        """Publica un evento; nunca bloquea al hilo que emite"""
+        seq = next(self._seq)
+        self.stats["posted"] += 1
+        if topic in self.latest_topics:
+            if self._latest.get(topic) is not None:
+                self.stats["coalesced"] += 1
+            self._latest[topic] = (seq, payload)
+        else:
+            queue = self._queues.get(topic)
+            if queue is None:
+                with self._queues_lock:
+                    queue = self._queues.setdefault(topic, deque())
+            if len(queue) >= self.max_pending:
+                queue.popleft() # consumidor parado o muy por detrás
+                self.stats["overflowed"] += 1
+            queue.append((seq, payload))
+        self._signal()
+
+    def _signal(self):
+        loop = self._loop
+        if loop is not None and not self._scheduled:
+            self._scheduled = True
+            try:
+                loop.call_soon_threadsafe(self._wake.set)
+                self.stats["wakeups"] += 1
+            except RuntimeError:
+                pass # loop cerrado
+
+    # --- Consumidor (un único task asyncio) ---
+
+    def drain(self):
+        """Lote [(tema, payload)] pendiente, en orden de publicación"""
+        batch = []
+        for topic in list(self._latest):
+            item = self._latest.pop(topic, None)
+            if item is not None:
+                batch.append((item[0], topic, item[1]))
+        for topic, queue in list(self._queues.items()):
+            for _ in range(min(len(queue), self.max_batch)):
+                try:
+                    seq, payload = queue.popleft()
+                except IndexError: # vaciada por un desbordamiento concurrente
+                    break
+                batch.append((seq, topic, payload))
+        batch.sort(key=lambda item: item[0])
+        return [(topic, payload) for _, topic, payload in batch]
+
+    @property
+    def pending(self) -> int:
+        return len(self._latest) + sum(len(q) for q in self._queues.values())
+
+    async def run(self, handler):
+        """Bucle del consumidor: await handler(lote) por cada lote pendiente (hasta cancelarse)"""
+        self._wake = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._wake.set() # lo publicado antes de arrancar
+        try:
+            while True:
+                await self._wake.wait()
+                self._wake.clear()
+                self._scheduled = False # a partir de aquí, un post nuevo vuelve a despertar
+                batch = self.drain()
+                while batch:
+                    self.stats["batches"] += 1
+                    self.stats["delivered"] += len(batch)
+                    self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+                    try:
+                        await handler(batch)
+                    except Exception as e:
+                        print(f"[EventBus] Handler error: {e}")
+                    batch = self.drain()
+        finally:
+            self._loop = None
+
+    def get_stats(self):
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "pending": self.pending,
+            "avg_batch": round(self.stats["delivered"] / batches, 2) if batches else 0.0,
+        }
@@ -0,0 +1,124 @@
+import time
+import base64
+import threading
+from collections import OrderedDict
+
+import cv2
+
+# formato -> (extensión cv2, parámetro de calidad)
+_FORMATS = {
+    "jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY),
+    "png": (".png", cv2.IMWRITE_PNG_COMPRESSION),
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+_DEFAULT_QUALITY = {"jpeg": 80, "png": 3, "webp": 80}
+
+
+def encode_frame(frame, fmt: str = "jpeg", quality: int = None, max_size: int = None, crop: tuple = None) -> str:
+    """
+    Codifica un frame BGR a base64.
+    crop = (x1, y1, x2, y2) en coordenadas del frame; max_size reduce (sin ampliar) para que
+    el lado mayor quepa en max_size, como PIL.Image.thumbnail.
+    """
+    ext, flag = _FORMATS[fmt]
+    if quality is None:
+        quality = _DEFAULT_QUALITY[fmt]
+    if crop is not None:
+        x1, y1, x2, y2 = crop
+        frame = frame[max(0, y1):max(0, y2), max(0, x1):max(0, x2)]
+        if frame.size == 0:
+            raise ValueError(f"Empty crop {crop}")
+    if max_size:
+        h, w = frame.shape[:2]
+        scale = max_size / max(h, w)
+        if scale < 1.0:
+            frame = cv2.resize(frame, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+    ok, buf = cv2.imencode(ext, frame, [int(flag), int(quality)])
+    if not ok:
+        raise ValueError(f"cv2.imencode failed ({fmt})")
+    return base64.b64encode(buf).decode('ascii')
+
+
+class _Encoding:
+    """Variante en curso o terminada (single-flight: el primero codifica, el resto espera)."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class FrameEncodingCache:
+    """
+    Cache encode-once de las variantes codificadas de cada frame.
+    Implements:
+    - Clave = (seq del frame, formato, calidad, tamaño máximo, crop)
+    - Cada variante se produce perezosamente como mucho una vez y se comparte entre consumidores
+    - Peticiones simultáneas de la misma variante esperan a la primera codificación
+    - Sólo se conservan las variantes de los últimos max_frames frames
+    """
+    def __init__(self, max_frames: int = 4):
+        self.max_frames = max_frames
+        self._frames = OrderedDict() # seq -> {variante: _Encoding}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "encodes": 0, "coalesced": 0, "dropped_frames": 0, "encode_time": 0.0}
+
+    @staticmethod
+    def variant(fmt="jpeg", quality=None, max_size=None, crop=None):
+        return (fmt, _DEFAULT_QUALITY[fmt] if quality is None else int(quality), max_size or None,
+                tuple(int(c) for c in crop) if crop is not None else None)
+
+    def get(self, seq: int, frame, fmt="jpeg", quality=None, max_size=None, crop=None) -> str:
+        """Base64 de la variante pedida del frame seq (frame: vista BGR de ese seq)"""
+        key = self.variant(fmt, quality, max_size, crop)
+        with self._lock:
+            variants = self._frames.get(seq)
+            if variants is None:
+                variants = self._frames[seq] = {}
+                while len(self._frames) > self.max_frames:
+                    self._frames.popitem(last=False)
+                    self.stats["dropped_frames"] += 1
+            entry = variants.get(key)
+            leader = entry is None
+            if leader:
+                entry = variants[key] = _Encoding()
+                self.stats["encodes"] += 1
+            elif entry.done.is_set():
+                self.stats["hits"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            entry.done.wait()
+            if entry.error:
+                raise entry.error
+            return entry.value
+
+        t0 = time.perf_counter()
+        try:
+            entry.value = self._encode(seq, frame, key)
+            return entry.value
+        except Exception as e:
+            entry.error = e
+            with self._lock:
+                variants.pop(key, None) # no se cachean errores
+            raise
+        finally:
+            self.stats["encode_time"] += time.perf_counter() - t0
+            entry.done.set()
+
+    def _encode(self, seq, frame, key):
+        """Produce una variante (punto de extensión: codificación en otro proceso)"""
+        return encode_frame(frame, *key)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+    def get_stats(self):
+        total = self.stats["hits"] + self.stats["coalesced"] + self.stats["encodes"]
+        return {
+            **self.stats,
+            "encode_time": round(self.stats["encode_time"], 4),
+            "frames": len(self._frames),
+            "reuse_ratio": round((total - self.stats["encodes"]) / total, 3) if total else 0.0,
+        }
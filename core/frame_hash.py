@@ -0,0 +1,129 @@
+import time
+import threading
+import numpy as np
+import cv2
+
+
+def _to_int(bits) -> int:
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def _gray_thumb(frame, w: int, h: int, density: int = 8):
+    """Miniatura gris wxh; antes de INTER_AREA se submuestrea con paso fijo (~density^2 muestras por celda)"""
+    step = max(1, min(frame.shape[0] // (h * density), frame.shape[1] // (w * density)))
+    small = cv2.resize(frame[::step, ::step], (w, h), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGRA2GRAY if small.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    return small
+
+
+def dhash(frame, size: int = 16) -> int:
+    """Difference hash (size*size bits): gradiente horizontal de una miniatura gris (size+1)xsize"""
+    small = _gray_thumb(frame, size + 1, size)
+    return _to_int(small[:, 1:] > small[:, :-1])
+
+
+def phash(frame, size: int = 32, keep: int = 16) -> int:
+    """Perceptual hash (keep*keep bits): DCT de una miniatura gris, bits = coeficiente > mediana"""
+    low = cv2.dct(_gray_thumb(frame, size, size).astype(np.float32))[:keep, :keep]
+    return _to_int(low > np.median(low.ravel()[1:])) # sin el término DC
+
+
+HASHES = {"dhash": dhash, "phash": phash}
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class _Analyzed:
+    def __init__(self, fhash, context, value):
+        self.hash = fhash
+        self.context = context
+        self.value = value
+        self.created = time.monotonic()
+        self.reuses = 0
+        self.acted = False # sus acciones ya se ejecutaron (claim)
+
+
+class FrameHashIndex:
+    """
+    Índice de frames ya analizados por el VLM, por hash perceptual.
+    Implements:
+    - lookup(hash, context): interpretación de un frame casi idéntico (distancia de Hamming
+      <= threshold sobre 256 bits) analizado con el mismo contexto (modo, estrategia, ventana...)
+    - TTL: una interpretación antigua no se reutiliza aunque la pantalla no haya cambiado
+    - claim(entry): las acciones de un análisis se ejecutan una sola vez; un frame repetido
+      reutiliza la interpretación, pero no repite clicks que no cambiaron la pantalla
+    - Skip rate: fracción de análisis evitados
+    """
+    def __init__(self, threshold: int = 4, max_entries: int = 64, ttl: float = 30.0, kind: str = "dhash"):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.kind = kind
+        self._entries = [] # más reciente al final
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "skips": 0, "stores": 0, "expired": 0, "replays_blocked": 0}
+
+    def hash(self, frame) -> int:
+        return HASHES[self.kind](frame)
+
+    def lookup(self, fhash: int, context=None):
+        """Devuelve (valor, distancia) del análisis reutilizable más cercano, o (None, None)"""
+        entry, distance = self.find(fhash, context)
+        return (entry.value if entry else None), distance
+
+    def find(self, fhash: int, context=None):
+        """Como lookup, pero devuelve la entrada (para claim)"""
+        now = time.monotonic()
+        with self._lock:
+            self.stats["lookups"] += 1
+            fresh = [e for e in self._entries if now - e.created <= self.ttl]
+            self.stats["expired"] += len(self._entries) - len(fresh)
+            self._entries = fresh
+            best, best_d = None, None
+            for e in reversed(fresh):
+                if e.context != context:
+                    continue
+                d = hamming(e.hash, fhash)
+                if d <= self.threshold and (best_d is None or d < best_d):
+                    best, best_d = e, d
+                    if d == 0:
+                        break
+            if best is None:
+                return None, None
+            best.reuses += 1
+            self.stats["skips"] += 1
+            return best, best_d
+
+    def store(self, fhash: int, context, value):
+        entry = _Analyzed(fhash, context, value)
+        with self._lock:
+            self._entries.append(entry)
+            self.stats["stores"] += 1
+            if len(self._entries) > self.max_entries:
+                del self._entries[:len(self._entries) - self.max_entries]
+        return entry
+
+    def claim(self, entry) -> bool:
+        """True sólo la primera vez: quien lo obtiene ejecuta las acciones de ese análisis"""
+        with self._lock:
+            if entry.acted:
+                self.stats["replays_blocked"] += 1
+                return False
+            entry.acted = True
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        lookups = self.stats["lookups"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "threshold": self.threshold,
+            "skip_rate": round(self.stats["skips"] / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,304 @@
+import json
+import time
+import struct
+import threading
+from pathlib import Path
+
+import numpy as np
+import cv2
+
+from core.capture_backends import CaptureBackend
+from core.dirty_tiles import DirtyTileMap
+
+# Formato .arec: MAGIC + registros [tipo u8][timestamp f64][longitud u32][payload]
+MAGIC = b"ARAFREC1"
+_RECORD = struct.Struct("<BdI")
+_PATCH = struct.Struct("<HHHHI") # x1, y1, x2, y2, bytes del PNG
+META, KEYFRAME, DELTA, EVENT = range(4)
+
+
+def _png(frame, level):
+    ok, buf = cv2.imencode(".png", frame, [cv2.IMWRITE_PNG_COMPRESSION, level])
+    if not ok:
+        raise ValueError(f"PNG encode failed for frame {frame.shape}")
+    return buf.tobytes()
+
+
+def _compact(value, max_chars):
+    """Payload de evento sin imágenes base64 ni textos enormes (el frame ya está grabado)"""
+    if isinstance(value, dict):
+        return {k: _compact(v, max_chars) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_compact(v, max_chars) for v in value]
+    if isinstance(value, str) and len(value) > max_chars:
+        return f"<{len(value)} chars>"
+    return value
+
+
+class FrameRecorder:
+    """
+    Grabación de sesiones de percepción en un único fichero .arec (append-only).
+    Implements:
+    - Keyframes PNG sin pérdida cada keyframe_interval frames (o al cambiar el tamaño / si el
+      frame cambió casi entero); entre medias sólo los parches de los tiles que cambiaron
+      (DirtyTileMap con umbral 0: cualquier píxel distinto), también en PNG
+    - Timestamps de captura y eventos emitidos (_emit_event) intercalados en orden
+    - attach(pipeline): hilo que graba cada frame publicado por un VisionPipeline / VisionProcess
+    """
+    def __init__(self, path, keyframe_interval: int = 120, png_compression: int = 1, tile: int = 32,
+                 max_keyframe_ratio: float = 0.6, max_event_chars: int = 2048, source: str = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.keyframe_interval = keyframe_interval
+        self.png_compression = png_compression
+        self.max_keyframe_ratio = max_keyframe_ratio
+        self.max_event_chars = max_event_chars
+        self.tiles = DirtyTileMap(tile=tile, threshold=0.0)
+        self._prev = None   # último frame grabado (base de los parches)
+        self._diff = None
+        self._since_key = 0
+        self._file = open(self.path, "wb")
+        self._lock = threading.Lock()
+        self._thread = None
+        self._attached = None
+        self.stats = {"frames": 0, "keyframes": 0, "patches": 0, "events": 0, "raw_bytes": 0, "encode_s": 0.0}
+        self._file.write(MAGIC)
+        self._write(META, time.time(), json.dumps({
+            "version": 1, "keyframe_interval": keyframe_interval, "tile": tile, "source": source,
+        }).encode("utf-8"))
+
+    def _write(self, kind, timestamp, payload):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(_RECORD.pack(kind, timestamp, len(payload)))
+            self._file.write(payload)
+
+    def add_frame(self, frame: np.ndarray, timestamp: float = None):
+        """Graba un frame BGR (o gris) uint8; el frame no se conserva (se copia al de referencia)"""
+        timestamp = timestamp or time.time()
+        t0 = time.perf_counter()
+        keyframe = (self._prev is None or self._prev.shape != frame.shape
+                    or self._since_key >= self.keyframe_interval)
+        if not keyframe:
+            if self._diff is None or self._diff.shape != frame.shape:
+                self._diff = np.empty_like(frame)
+            cv2.absdiff(self._prev, frame, dst=self._diff)
+            keyframe = self.tiles.update(self._diff) > self.max_keyframe_ratio
+        if keyframe:
+            kind, payload = KEYFRAME, _png(frame, self.png_compression)
+            self._since_key = 0
+            self.stats["keyframes"] += 1
+        else:
+            regions = self.tiles.regions()
+            parts = [struct.pack("<H", len(regions))]
+            for r in regions:
+                x1, y1, x2, y2 = r["bbox"]
+                png = _png(frame[y1:y2, x1:x2], self.png_compression)
+                parts.append(_PATCH.pack(x1, y1, x2, y2, len(png)))
+                parts.append(png)
+            kind, payload = DELTA, b"".join(parts)
+            self._since_key += 1
+            self.stats["patches"] += len(regions)
+        if self._prev is None or self._prev.shape != frame.shape:
+            self._prev = np.empty_like(frame)
+        np.copyto(self._prev, frame)
+        self._write(kind, timestamp, payload)
+        self.stats["frames"] += 1
+        self.stats["raw_bytes"] += frame.nbytes
+        self.stats["encode_s"] += time.perf_counter() - t0
+
+    def add_event(self, event_type: str, payload: dict, timestamp: float = None):
+        """Graba un evento emitido (mismo (tipo, payload) que _emit_event), sin imágenes"""
+        data = json.dumps({"type": event_type, "payload": _compact(payload, self.max_event_chars)},
+                          default=str, ensure_ascii=False)
+        self._write(EVENT, timestamp or time.time(), data.encode("utf-8"))
+        self.stats["events"] += 1
+
+    # --- Grabación en vivo de un pipeline ---
+
+    def attach(self, pipeline):
+        """Graba en un hilo cada frame nuevo del pipeline (con su timestamp de captura)"""
+        self._attached = pipeline
+        self._thread = threading.Thread(target=self._record_loop, args=(pipeline,), daemon=True, name="FrameRecorder")
+        self._thread.start()
+
+    def _record_loop(self, pipeline):
+        seq, scratch = pipeline.frame_seq, None
+        while self._attached is pipeline:
+            new_seq, view = pipeline.wait_for_frame(seq, timeout=0.5)
+            if new_seq is None:
+                continue
+            seq = new_seq
+            if scratch is None or scratch.shape != view.shape:
+                scratch = np.empty_like(view)
+            np.copyto(scratch, view)
+            timestamp = pipeline.ring.timestamp(seq)
+            if pipeline.ring.valid(seq): # la copia no es un frame a medio sobrescribir
+                self.add_frame(scratch, timestamp)
+
+    def close(self):
+        self._attached = None
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def get_stats(self):
+        size = self.path.stat().st_size if self.path.exists() else 0
+        n = max(1, self.stats["frames"])
+        return {
+            **{k: v for k, v in self.stats.items() if k != "encode_s"},
+            "bytes": size,
+            "ratio": round(self.stats["raw_bytes"] / size, 1) if size else 0.0,
+            "encode_ms": round(self.stats["encode_s"] / n * 1000, 2),
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FrameRecording:
+    """
+    Lectura de un fichero .arec: índice de registros al abrir (sólo cabeceras), eventos en memoria
+    y frames reconstruidos bajo demanda (keyframe + parches) sobre un lienzo reutilizado.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self.meta = {}
+        self.events = []      # [{"t", "type", "payload"}]
+        self._frames = []     # [(timestamp, tipo, offset, longitud)]
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not an ARAFURA recording")
+            while True:
+                header = f.read(_RECORD.size)
+                if len(header) < _RECORD.size:
+                    break # fin (o registro truncado al cortar la grabación)
+                kind, timestamp, length = _RECORD.unpack(header)
+                offset = f.tell()
+                if kind in (KEYFRAME, DELTA):
+                    self._frames.append((timestamp, kind, offset, length))
+                    f.seek(length, 1)
+                    continue
+                payload = f.read(length)
+                if len(payload) < length:
+                    break
+                if kind == META:
+                    self.meta = json.loads(payload)
+                elif kind == EVENT:
+                    self.events.append({"t": timestamp, **json.loads(payload)})
+        if self._frames and self._frames[-1][2] + self._frames[-1][3] > self.path.stat().st_size:
+            self._frames.pop()
+        self.start = self._frames[0][0] if self._frames else 0.0
+
+    def __len__(self):
+        return len(self._frames)
+
+    @property
+    def duration(self) -> float:
+        return self._frames[-1][0] - self.start if self._frames else 0.0
+
+    @property
+    def timestamps(self):
+        return [t for t, *_ in self._frames]
+
+    def frames(self, start: int = 0):
+        """
+        Genera (índice, timestamp, frame) desde el frame start (se decodifica desde su keyframe).
+        El frame es un lienzo reutilizado: válido hasta el siguiente next(), copiar para conservarlo.
+        """
+        first = start
+        while first > 0 and self._frames[first][1] != KEYFRAME:
+            first -= 1
+        canvas = None
+        with open(self.path, "rb") as f:
+            for i in range(first, len(self._frames)):
+                timestamp, kind, offset, length = self._frames[i]
+                f.seek(offset)
+                payload = f.read(length)
+                if kind == KEYFRAME:
+                    canvas = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_UNCHANGED)
+                elif canvas is not None:
+                    self._apply_patches(canvas, payload)
+                else:
+                    continue # empieza en un delta sin keyframe previo
+                if i >= start:
+                    yield i, timestamp, canvas
+
+    @staticmethod
+    def _apply_patches(canvas, payload):
+        (count,), pos = struct.unpack_from("<H", payload), 2
+        for _ in range(count):
+            x1, y1, x2, y2, size = _PATCH.unpack_from(payload, pos)
+            pos += _PATCH.size
+            patch = cv2.imdecode(np.frombuffer(payload, np.uint8, size, pos), cv2.IMREAD_UNCHANGED)
+            canvas[y1:y2, x1:x2] = patch.reshape(canvas[y1:y2, x1:x2].shape)
+            pos += size
+
+    def get_stats(self):
+        size = self.path.stat().st_size
+        return {
+            "frames": len(self),
+            "keyframes": sum(1 for f in self._frames if f[1] == KEYFRAME),
+            "events": len(self.events),
+            "duration_s": round(self.duration, 2),
+            "bytes": size,
+        }
+
+
+class ReplayCaptureBackend(CaptureBackend):
+    """
+    Backend de captura que reproduce una grabación .arec (headless, determinista).
+    speed=None: tan rápido como lo pida el pipeline; speed=1.0: tiempo real (2.0 = el doble...).
+    Los frames se sirven tal cual se grabaron (ya recortados a la ventana): bbox se ignora.
+    Al terminar devuelve None (finished=True), o vuelve a empezar con loop=True.
+    Por nombre: create_backend("replay:ruta/sesion.arec") o ARAFURA_CAPTURE_BACKEND=replay:...
+    """
+    name = "replay"
+
+    def __init__(self, path, speed: float = None, loop: bool = False):
+        super().__init__()
+        self.recording = path if isinstance(path, FrameRecording) else FrameRecording(path)
+        self.speed = speed
+        self.loop = loop
+        self.finished = False
+        self.index = -1          # índice en la grabación del último frame servido
+        self.timestamp = None    # su timestamp grabado
+        self._iter = None
+        self._clock = None       # (perf_counter, timestamp grabado) al empezar
+
+    def _next(self):
+        if self._iter is None:
+            self._iter = self.recording.frames()
+        item = next(self._iter, None)
+        if item is None and self.loop and len(self.recording):
+            self._iter, self._clock = self.recording.frames(), None
+            item = next(self._iter, None)
+        return item
+
+    def _grab_into(self, bbox, ring):
+        item = self._next()
+        if item is None:
+            self.finished = True
+            return None
+        self.index, self.timestamp, frame = item
+        if self.speed:
+            if self._clock is None:
+                self._clock = (time.perf_counter(), self.timestamp)
+            due = self._clock[0] + (self.timestamp - self._clock[1]) / self.speed
+            time.sleep(max(0.0, due - time.perf_counter()))
+        slot = ring.acquire(frame.shape)
+        np.copyto(slot, frame)
+        return slot
+
+    def get_stats(self):
+        stats = super().get_stats()
+        stats.update({"index": self.index, "total": len(self.recording), "finished": self.finished})
+        return stats
@@ -0,0 +1,148 @@
+import time
+import threading
+import numpy as np
+
+
+class FrameRing:
+    """
+    Ring buffer de frames preasignados con número de secuencia.
+    Implements:
+    - N slots reservados una sola vez (sólo se reasignan si cambia la forma del frame)
+    - Escritura en el slot siguiente (acquire/commit) sin tocar el frame publicado
+    - Lectura sin copia: vistas numpy de sólo lectura o memoryview
+    - wait_for(seq): bloquea hasta que exista un frame posterior a seq
+    - valid(seq): el lector comprueba que su slot no fue sobrescrito mientras lo usaba
+    """
+    def __init__(self, slots: int = 4):
+        if slots < 2:
+            raise ValueError("FrameRing needs at least 2 slots")
+        self.size = slots
+        self._buffers = [None] * slots
+        self._seqs = [0] * slots       # secuencia publicada en cada slot (0 = vacío)
+        self._stamps = [0.0] * slots
+        self._origins = [None] * slots # (left, top) en pantalla del frame, si se conoce
+        self._seq = 0                  # último frame publicado
+        self._pending = None           # slot reservado por acquire()
+        self._cond = threading.Condition()
+        self.allocations = 0           # reservas de memoria de slots (reasignaciones incluidas)
+        self.writes = 0
+
+    # --- Escritura (un único productor: el hilo de captura) ---
+
+    def acquire(self, shape, dtype=np.uint8) -> np.ndarray:
+        """Devuelve el buffer escribible del próximo slot; publicar con commit()"""
+        idx = (self._seq + 1) % self.size
+        buf = self._buffers[idx]
+        if buf is None or buf.shape != tuple(shape) or buf.dtype != dtype:
+            buf = self._buffers[idx] = np.empty(shape, dtype=dtype)
+            self.allocations += 1
+        with self._cond:
+            # El slot deja de ser válido para lectores antiguos antes de sobrescribirlo
+            self._seqs[idx] = 0
+        self._pending = idx
+        return buf
+
+    @property
+    def pending(self):
+        """Buffer reservado por acquire() y aún no publicado (o None)"""
+        return None if self._pending is None else self._buffers[self._pending]
+
+    def commit(self, timestamp: float = None, origin: tuple = None) -> int:
+        """
+        Publica el slot reservado por acquire(); devuelve su número de secuencia.
+        origin = (left, top) del frame en coordenadas de pantalla (None = desconocido).
+        """
+        idx = self._pending
+        if idx is None:
+            raise RuntimeError("commit() without acquire()")
+        self._pending = None
+        with self._cond:
+            self._seq += 1
+            self._seqs[idx] = self._seq
+            self._stamps[idx] = timestamp or time.time()
+            self._origins[idx] = origin
+            self.writes += 1
+            self._cond.notify_all()
+            return self._seq
+
+    def write(self, frame: np.ndarray, timestamp: float = None) -> int:
+        """Copia frame en el próximo slot y lo publica"""
+        np.copyto(self.acquire(frame.shape, frame.dtype), frame)
+        return self.commit(timestamp)
+
+    # --- Lectura ---
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def _slot(self, seq):
+        idx = seq % self.size
+        if seq <= 0 or self._seqs[idx] != seq:
+            return None
+        return idx
+
+    @staticmethod
+    def _readonly(buf):
+        view = buf.view()
+        view.flags.writeable = False
+        return view
+
+    def get(self, seq: int):
+        """Vista de sólo lectura del frame seq, o None si ya fue sobrescrito"""
+        with self._cond:
+            idx = self._slot(seq)
+            return None if idx is None else self._readonly(self._buffers[idx])
+
+    def latest(self):
+        """(seq, vista de sólo lectura) del último frame; (0, None) si aún no hay ninguno"""
+        with self._cond:
+            idx = self._slot(self._seq)
+            if idx is None:
+                return 0, None
+            return self._seq, self._readonly(self._buffers[idx])
+
+    def previous(self, seq: int):
+        """Vista del frame anterior a seq (si sigue en el anillo)"""
+        return self.get(seq - 1)
+
+    def memoryview(self, seq: int = None):
+        """memoryview de sólo lectura del frame (por defecto, el último)"""
+        view = self.latest()[1] if seq is None else self.get(seq)
+        return None if view is None else memoryview(view)
+
+    def timestamp(self, seq: int) -> float:
+        with self._cond:
+            idx = self._slot(seq)
+            return 0.0 if idx is None else self._stamps[idx]
+
+    def origin(self, seq: int):
+        """(left, top) en pantalla del frame seq, o None si se desconoce o ya no está"""
+        with self._cond:
+            idx = self._slot(seq)
+            return None if idx is None else self._origins[idx]
+
+    def valid(self, seq: int) -> bool:
+        """True si el slot de seq no se ha reutilizado (comprobar tras leer una vista)"""
+        with self._cond:
+            return self._slot(seq) is not None
+
+    def wait_for(self, after_seq: int, timeout: float = None):
+        """Espera al primer frame con secuencia > after_seq. Devuelve (seq, vista) o (None, None)"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > after_seq, timeout):
+                return None, None
+            idx = self._slot(self._seq)
+            if idx is None:
+                return None, None
+            return self._seq, self._readonly(self._buffers[idx])
+
+    def get_stats(self):
+        nbytes = sum(b.nbytes for b in self._buffers if b is not None)
+        return {
+            "slots": self.size,
+            "seq": self._seq,
+            "writes": self.writes,
+            "allocations": self.allocations,
+            "resident_mb": round(nbytes / 1048576, 2),
+        }
@@ -0,0 +1,333 @@
+import time
+import json
+import queue
+import socket
+import threading
+import http.client
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from core.cancellation import GenerationCancelled, cancel_scope, is_cancelled
+
+
+class PoolHTTPError(Exception):
+    """Respuesta HTTP con status de error (>= 400)."""
+    def __init__(self, status: int, reason: str, body: bytes = b""):
+        self.status = status
+        self.reason = reason
+        self.body = body
+        super().__init__(f"HTTP {status} {reason}")
+
+
+_NETWORK_ERRORS = (OSError, http.client.HTTPException)
+# Socket keep-alive caducado (el servidor lo cerró): falla al enviar o sin ningún byte de respuesta
+_STALE_ERRORS = (ConnectionResetError, ConnectionAbortedError, BrokenPipeError)
+# Sólo para peticiones idempotentes (opt-in): un POST de generación nunca se repite
+_RETRYABLE_STATUS = (502, 503, 504)
+
+
+class _NoDelayMixin:
+    """Desactiva Nagle: en sockets reutilizados, cabecera y cuerpo van en writes separados."""
+    def connect(self):
+        super().connect()
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class _HTTPConnection(_NoDelayMixin, http.client.HTTPConnection):
+    pass
+
+
+class _HTTPSConnection(_NoDelayMixin, http.client.HTTPSConnection):
+    pass
+
+
+class _Inflight:
+    """Conexión en uso por una petición cancelable: cancelar = cortar su socket."""
+    def __init__(self, cancel=None):
+        self.cancel = cancel
+        self.conn = None
+
+    def abort(self):
+        sock = getattr(self.conn, "sock", None)
+        if sock is not None:
+            try:
+                # shutdown despierta al hilo bloqueado en recv() (close() no lo haría)
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def check(self):
+        if is_cancelled(self.cancel):
+            raise GenerationCancelled()
+
+
+class _HostPool:
+    """Conexiones keep-alive hacia un único (scheme, host, port)."""
+    def __init__(self, scheme: str, host: str, port: int, size: int):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.size = size
+        self.idle = queue.LifoQueue()  # LIFO: el socket más reciente es el más probable de seguir vivo
+        self.slots = threading.Semaphore(size)
+
+    def new_connection(self, timeout: float):
+        if self.scheme == "https":
+            return _HTTPSConnection(self.host, self.port, timeout=timeout)
+        return _HTTPConnection(self.host, self.port, timeout=timeout)
+
+
+class HTTPSessionPool:
+    """
+    Keep-alive HTTP session layer shared by the model wrappers.
+    Implements:
+    - Per-host connection pool (bounded by pool_size)
+    - Timeouts + retry with exponential backoff: a request that never left (connection refused)
+      is always retryable; timeouts and 502-504 only with idempotent=True (never a generation POST)
+    - A stale keep-alive socket that dies before any response byte is replaced for free
+    - generation_timeout: read timeout for model calls (0 = sin límite, como urlopen)
+    - Metrics: connection reuse and slot wait time
+    """
+    def __init__(self, pool_size: int = 4, timeout: float = 120.0, retries: int = 2, backoff: float = 0.25,
+                 connect_timeout: float = 10.0, generation_timeout: float = 0):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.connect_timeout = connect_timeout
+        self.generation_timeout = generation_timeout
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self._metrics = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "retries": 0,
+            "errors": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    def configure(self, pool_size=None, timeout=None, retries=None, backoff=None, connect_timeout=None,
+                  generation_timeout=None):
+        """Ajusta parámetros en caliente (afecta a hosts nuevos para pool_size)."""
+        if pool_size: self.pool_size = int(pool_size)
+        if timeout: self.timeout = float(timeout)
+        if retries is not None: self.retries = int(retries)
+        if backoff is not None: self.backoff = float(backoff)
+        if connect_timeout: self.connect_timeout = float(connect_timeout)
+        if generation_timeout is not None: self.generation_timeout = float(generation_timeout)
+
+    def _host_pool(self, scheme, host, port):
+        key = (scheme, host, port)
+        with self._lock:
+            pool = self._hosts.get(key)
+            if pool is None:
+                pool = _HostPool(scheme, host, port, self.pool_size)
+                self._hosts[key] = pool
+            return pool
+
+    def _record(self, key, value=1):
+        with self._lock:
+            self._metrics[key] += value
+
+    def _acquire(self, pool: _HostPool, timeout: float):
+        """Reserva un slot del host y devuelve (conn, reused). timeout = lectura (None = sin límite)."""
+        t0 = time.perf_counter()
+        if not pool.slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"HTTP pool exhausted for {pool.host}:{pool.port}")
+        waited = time.perf_counter() - t0
+        with self._lock:
+            self._metrics["wait_time_total"] += waited
+            self._metrics["wait_time_max"] = max(self._metrics["wait_time_max"], waited)
+
+        try:
+            conn = pool.idle.get_nowait()
+            conn.read_timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        except queue.Empty:
+            self._record("connections_created")
+            conn = pool.new_connection(min(self.connect_timeout, timeout or self.connect_timeout))
+            conn.read_timeout = timeout
+            return conn, False
+
+    def _release(self, pool: _HostPool, conn, reusable: bool):
+        if reusable:
+            pool.idle.put(conn)
+        else:
+            conn.close()
+        pool.slots.release()
+
+    def _split(self, url: str):
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        return scheme, parts.hostname, port, path
+
+    def _open(self, method, url, body, headers, timeout, inflight=None, idempotent=False, retries=None):
+        """
+        Envía la petición con reintentos. Devuelve (pool, conn, response).
+        timeout: lectura en s (None = el del pool, 0 = sin límite).
+        """
+        inflight = inflight or _Inflight()
+        scheme, host, port, path = self._split(url)
+        pool = self._host_pool(scheme, host, port)
+        timeout = self.timeout if timeout is None else (timeout or None)
+        retries = self.retries if retries is None else retries
+        hdrs = {"Connection": "keep-alive"}
+        if headers: hdrs.update(headers)
+
+        self._record("requests")
+        attempt = 0
+        while True:
+            inflight.check()
+            conn, reused = self._acquire(pool, timeout)
+            inflight.conn = conn
+            sent = False
+            try:
+                if conn.sock is None:
+                    conn.connect()
+                    conn.sock.settimeout(conn.read_timeout) # connect con connect_timeout, lectura con el de la petición
+                sent = True
+                conn.request(method, path, body=body, headers=hdrs)
+                if is_cancelled(inflight.cancel):
+                    inflight.abort() # cancelado antes de que existiera el socket
+                response = conn.getresponse()
+            except _NETWORK_ERRORS as e:
+                self._release(pool, conn, reusable=False)
+                inflight.check() # socket cortado por cancelación: no se reintenta
+                # Keep-alive caducado: el servidor cerró el socket antes de ver la petición.
+                # Se reintenta con uno nuevo sin contar contra el presupuesto.
+                if reused and isinstance(e, _STALE_ERRORS):
+                    continue
+                # Sin conexión la petición no salió; una vez enviada (timeout, corte) sólo si es idempotente
+                if (not sent or idempotent) and attempt < retries:
+                    attempt += 1
+                    self._record("retries")
+                    time.sleep(self.backoff * (2 ** (attempt - 1)))
+                    continue
+                self._record("errors")
+                raise
+
+            if reused:
+                self._record("connections_reused")
+
+            if response.status in _RETRYABLE_STATUS and idempotent and attempt < retries:
+                response.read()
+                self._release(pool, conn, reusable=not response.will_close)
+                attempt += 1
+                self._record("retries")
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+                continue
+
+            if response.status >= 400:
+                err_body = response.read()
+                self._release(pool, conn, reusable=not response.will_close)
+                self._record("errors")
+                raise PoolHTTPError(response.status, response.reason, err_body)
+
+            return pool, conn, response
+
+    def request(self, method: str, url: str, body: bytes = None, headers: dict = None, timeout: float = None, cancel=None,
+                idempotent: bool = False, retries: int = None) -> bytes:
+        """
+        Petición completa: devuelve el cuerpo y recicla la conexión.
+        `cancel` (CancellationToken) corta el socket en cuanto se activa -> GenerationCancelled.
+        `idempotent` habilita reintentos tras timeout o 502-504 (sólo para GET sin efectos).
+        """
+        inflight = _Inflight(cancel)
+        with cancel_scope(cancel, inflight.abort):
+            pool, conn, response = self._open(method, url, body, headers, timeout, inflight, idempotent, retries)
+            try:
+                data = response.read()
+            except Exception:
+                self._release(pool, conn, reusable=False)
+                inflight.check()
+                raise
+            if is_cancelled(cancel):
+                # El cuerpo pudo llegar truncado justo al cortar el socket
+                self._release(pool, conn, reusable=False)
+                raise GenerationCancelled()
+        self._release(pool, conn, reusable=not response.will_close)
+        return data
+
+    def request_json(self, url: str, payload=None, timeout: float = None, cancel=None, idempotent: bool = False,
+                     retries: int = None):
+        """POST JSON (o GET si payload es None) y decodifica la respuesta."""
+        if payload is None:
+            data = self.request("GET", url, timeout=timeout, cancel=cancel, idempotent=idempotent, retries=retries)
+        else:
+            data = self.request(
+                "POST", url,
+                body=json.dumps(payload).encode('utf-8'),
+                headers={'Content-Type': 'application/json'},
+                timeout=timeout,
+                cancel=cancel,
+                retries=retries
+            )
+        return json.loads(data.decode('utf-8'))
+
+    @contextmanager
+    def stream(self, method: str, url: str, body: bytes = None, headers: dict = None, timeout: float = None, cancel=None):
+        """
+        Context manager que entrega el HTTPResponse para lectura incremental.
+        Si el consumidor sale antes de agotar el cuerpo, la conexión se descarta.
+        Con `cancel`, activarlo corta el socket y la lectura termina de inmediato.
+        """
+        inflight = _Inflight(cancel)
+        with cancel_scope(cancel, inflight.abort):
+            pool, conn, response = self._open(method, url, body, headers, timeout, inflight)
+            try:
+                yield response
+            except BaseException:
+                self._release(pool, conn, reusable=False)
+                raise
+            else:
+                reusable = response.isclosed() and not response.will_close and not is_cancelled(cancel)
+                self._release(pool, conn, reusable=reusable)
+
+    def get_metrics(self):
+        """Snapshot de métricas de reutilización y espera."""
+        with self._lock:
+            m = dict(self._metrics)
+            m["idle_connections"] = sum(p.idle.qsize() for p in self._hosts.values())
+        total = m["connections_created"] + m["connections_reused"]
+        m["reuse_ratio"] = round(m["connections_reused"] / total, 3) if total else 0.0
+        m["wait_time_avg"] = m["wait_time_total"] / m["requests"] if m["requests"] else 0.0
+        return m
+
+    def close(self):
+        """Cierra todas las conexiones ociosas."""
+        with self._lock:
+            hosts = list(self._hosts.values())
+        for pool in hosts:
+            while True:
+                try:
+                    pool.idle.get_nowait().close()
+                except queue.Empty:
+                    break
+
+
+_SHARED_POOL = None
+_SHARED_LOCK = threading.Lock()
+
+
+def get_shared_pool() -> HTTPSessionPool:
+    """Pool compartido por OllamaWrapper y GeminiWrapper."""
+    global _SHARED_POOL
+    with _SHARED_LOCK:
+        if _SHARED_POOL is None:
+            _SHARED_POOL = HTTPSessionPool()
+        return _SHARED_POOL
+
+
+def configure_shared_pool(**kwargs) -> HTTPSessionPool:
+    """Aplica la sección `http:` de models.yaml al pool compartido."""
+    pool = get_shared_pool()
+    pool.configure(**kwargs)
+    return pool
@@ -0,0 +1,261 @@
+import os
+import json
+import time
+import queue
+import threading
+
+from core.cancellation import GenerationCancelled, cancel_scope, is_cancelled
+from core.scheduler import PRIORITY_INTERACTIVE
+
+try:
+    from llama_cpp import LlamaRAMCache
+except ImportError:
+    LlamaRAMCache = None
+
+_DONE = object() # fin de stream
+_STOP = object() # cierre del worker
+
+
+def default_threads() -> int:
+    """Hilos para llama.cpp: núcleos disponibles para el proceso, descontando SMT."""
+    try:
+        available = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        available = os.cpu_count() or 1
+    # llama.cpp escala con núcleos físicos; con hyperthreading la mitad lógica rinde igual o mejor
+    return max(1, available // 2 if available >= 4 else available)
+
+
+class _Job:
+    def __init__(self, messages, params: dict, stream: bool, cancel=None, priority: int = PRIORITY_INTERACTIVE):
+        self.messages = messages
+        self.params = params
+        self.stream = stream
+        self.cancel = cancel
+        self.priority = priority # clase del InferenceScheduler (menor = más urgente)
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.chunks = queue.Queue() if stream else None
+        self.enqueued = time.perf_counter()
+        self._lock = threading.Lock()
+        self._state = "queued" # queued -> running -> finished
+
+    def claim(self) -> bool:
+        """El worker toma el job. False si se canceló mientras esperaba en cola."""
+        with self._lock:
+            if self._state != "queued":
+                return False
+            self._state = "running"
+            return True
+
+    def cancel_if_queued(self):
+        """Callback de cancelación: un job aún en cola se resuelve ya, sin esperar al worker"""
+        with self._lock:
+            if self._state != "queued":
+                return # en ejecución: el worker lo corta en el siguiente token
+            self._state = "finished"
+        self.error = GenerationCancelled()
+        if self.stream:
+            self.chunks.put(_DONE)
+        self.done.set()
+
+    @property
+    def prefix(self) -> str:
+        """Prefijo estable (system prompt) usado para agrupar y reutilizar KV-cache"""
+        if self.messages and self.messages[0].get('role') == 'system':
+            return self.messages[0].get('content', '')
+        return ""
+
+    @property
+    def key(self) -> str:
+        return json.dumps([self.messages, self.params], sort_keys=True, ensure_ascii=False)
+
+
+class LocalInferenceWorker:
+    """
+    Propietario único de una instancia llama_cpp.Llama.
+    Implements:
+    - Cola de peticiones servida por un hilo dedicado (la instancia nunca se usa en paralelo)
+    - Micro-batching: las peticiones que llegan dentro de `batch_window` se agrupan;
+      las idénticas se resuelven con una sola generación
+    - Orden por prioridad del scheduler (interactive > autonomy > background) y, dentro de cada
+      clase, por prefijo compartido (identity/system prompt) para que llama.cpp reutilice el KV-cache
+    - Cache de estados por prefijo (LlamaRAMCache) si la versión de llama_cpp lo soporta
+    """
+    def __init__(self, llm, batch_window: float = 0.005, max_batch: int = 8, prefix_cache_bytes: int = 512 << 20):
+        self.llm = llm
+        self.model_path = getattr(llm, 'model_path', "unknown")
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.verbose = False
+
+        if LlamaRAMCache and prefix_cache_bytes and hasattr(llm, 'set_cache'):
+            try:
+                llm.set_cache(LlamaRAMCache(capacity_bytes=prefix_cache_bytes))
+            except Exception as e:
+                print(f"[LocalWorker] Prefix cache disabled: {e}")
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._last_prefix = None
+        self.stats = {"requests": 0, "generations": 0, "batches": 0, "deduplicated": 0, "prefix_switches": 0, "cancelled": 0, "busy_time": 0.0}
+        self._stats_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"LocalWorker-{os.path.basename(str(self.model_path))}")
+        self._thread.start()
+
+    # --- API compatible con los wrappers (create/stream_chat_completion) ---
+
+    def _params(self, temperature, max_tokens, kwargs):
+        params = {"temperature": temperature, "max_tokens": max_tokens}
+        if kwargs.get("json_mode"):
+            # llama_cpp no conoce json_mode: se traduce a su response_format
+            params["response_format"] = {"type": "json_object"}
+        return params
+
+    def create_chat_completion(self, messages, temperature=0.7, max_tokens=1024, cancel_event=None,
+                               priority=PRIORITY_INTERACTIVE, **kwargs):
+        """Bloquea hasta el resultado. GenerationCancelled si cancel_event se activa."""
+        job = _Job(messages, self._params(temperature, max_tokens, kwargs), stream=False, cancel=cancel_event, priority=priority)
+        with cancel_scope(cancel_event, job.cancel_if_queued):
+            self._submit(job)
+            job.done.wait()
+        if job.error:
+            raise job.error
+        return job.result
+
+    def stream_chat_completion(self, messages, temperature=0.7, max_tokens=1024, cancel_event=None,
+                               priority=PRIORITY_INTERACTIVE, **kwargs):
+        job = _Job(messages, self._params(temperature, max_tokens, kwargs), stream=True, cancel=cancel_event, priority=priority)
+        with cancel_scope(cancel_event, job.cancel_if_queued):
+            self._submit(job)
+            while True:
+                chunk = job.chunks.get()
+                if chunk is _DONE:
+                    break
+                yield chunk
+        if job.error and not isinstance(job.error, GenerationCancelled):
+            yield f"[Stream Error: {job.error}]"
+
+    def _submit(self, job):
+        if self._closed:
+            raise RuntimeError(f"Local worker for {os.path.basename(str(self.model_path))} is closed")
+        with self._stats_lock:
+            self.stats["requests"] += 1
+        self._queue.put(job)
+
+    # --- Hilo de inferencia ---
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=max(0, remaining)) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _order(self, batch):
+        """
+        Agrupa por (prioridad, prefijo): primero la clase más urgente (hasta limits.local jobs
+        esperan aquí a la vez, un turno de chat no va detrás de una reflexión en segundo plano)
+        y, dentro de ella, el prefijo que ya está en el KV-cache
+        """
+        groups = {}
+        for job in batch:
+            groups.setdefault((job.priority, job.prefix), []).append(job)
+        keys = sorted(groups, key=lambda k: (k[0], k[1] != self._last_prefix, groups[k][0].enqueued))
+        return [groups[k] for k in keys]
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            stop = _STOP in batch
+            batch = [job for job in batch if job is not _STOP]
+            t0 = time.perf_counter()
+            for group in self._order(batch):
+                # Peticiones idénticas (no-stream) dentro del batch -> una sola generación
+                pending = {}
+                for job in group:
+                    if not job.claim():
+                        continue # cancelado en cola
+                    if job.stream:
+                        self._execute(job)
+                    else:
+                        # Sólo se fusionan jobs con el mismo token: cancelar uno no afecta a otros
+                        pending.setdefault((job.key, id(job.cancel)), []).append(job)
+                for jobs in pending.values():
+                    self._execute(jobs[0], followers=jobs[1:])
+            with self._stats_lock:
+                self.stats["batches"] += 1
+                self.stats["busy_time"] += time.perf_counter() - t0
+            if stop:
+                self.llm = None # la instancia (y su memoria) se libera con el worker
+                self._drain()
+                return
+
+    def _drain(self):
+        """Falla los jobs que se colaron en la cola durante el cierre"""
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if job is not _STOP and job.claim():
+                job.error = RuntimeError("Local worker closed")
+                if job.stream:
+                    job.chunks.put(_DONE)
+                job.done.set()
+
+    def _execute(self, job, followers=()):
+        if job.prefix != self._last_prefix:
+            with self._stats_lock:
+                self.stats["prefix_switches"] += 1
+            self._last_prefix = job.prefix
+        with self._stats_lock:
+            self.stats["generations"] += 1
+            self.stats["deduplicated"] += len(followers)
+        try:
+            # Siempre en modo stream: cerrar el generador entre tokens aborta la generación de llama.cpp
+            parts = []
+            stream = self.llm.create_chat_completion(messages=job.messages, stream=True, **job.params)
+            try:
+                for part in stream:
+                    if is_cancelled(job.cancel):
+                        with self._stats_lock:
+                            self.stats["cancelled"] += 1
+                        raise GenerationCancelled()
+                    content = part['choices'][0].get('delta', {}).get('content')
+                    if content:
+                        if job.stream:
+                            job.chunks.put(content)
+                        else:
+                            parts.append(content)
+            finally:
+                if hasattr(stream, 'close'):
+                    stream.close()
+            if not job.stream:
+                job.result = {'choices': [{'message': {'role': 'assistant', 'content': "".join(parts)}}]}
+        except Exception as e:
+            job.error = e
+        finally:
+            for f in followers:
+                f.result, f.error = job.result, job.error
+                f.done.set()
+            if job.stream:
+                job.chunks.put(_DONE)
+            job.done.set()
+
+    def close(self):
+        """Sirve lo ya encolado, termina el hilo y suelta la instancia Llama"""
+        self._closed = True
+        self._queue.put(_STOP)
+
+    def get_stats(self):
+        with self._stats_lock:
+            s = dict(self.stats)
+        s["queue_depth"] = self._queue.qsize()
+        s["avg_batch"] = round(s["requests"] / s["batches"], 2) if s["batches"] else 0.0
+        return s
@@ -0,0 +1,136 @@
+import time
+import threading
+from pathlib import Path
+
+from core.http_pool import get_shared_pool
+
+
+class ModelCatalog:
+    """
+    Descubrimiento de modelos cacheado (Ollama /api/tags + directorio GGUF).
+    Implements:
+    - Una sola ronda de descubrimiento en frío (las llamadas concurrentes esperan a la misma)
+    - Cache con TTL y refresco en segundo plano (stale-while-revalidate)
+    - Resolución de roles en memoria, sin red ni disco
+    """
+    def __init__(self, models_dir: Path, ollama_host: str = "http://localhost:11434", ttl: float = 60.0, http_pool=None):
+        self.models_dir = models_dir
+        self.ollama_host = ollama_host
+        self.ttl = ttl
+        self.http = http_pool or get_shared_pool()
+
+        self.ollama_models = [] # nombres de tags
+        self.ollama_online = False
+        self.gguf_files = []    # Paths resueltos
+        self.last_refresh = 0.0
+        self.refresh_count = 0
+
+        self._lock = threading.Lock()
+        self._refreshing = None # threading.Event mientras hay una ronda en curso
+
+    def _discover(self):
+        """Ronda de descubrimiento real (red + disco). Sin locks retenidos."""
+        tags, online = [], False
+        try:
+            # Sondeo rápido: con Ollama offline falla a la primera, sin backoff en el arranque
+            data = self.http.request_json(f"{self.ollama_host}/api/tags", timeout=1, retries=0)
+            tags = [m['name'] for m in data.get('models', [])]
+            online = True
+        except Exception:
+            pass # Ollama offline
+
+        files = []
+        try:
+            if self.models_dir.exists():
+                files = [p.resolve() for p in self.models_dir.glob("*.gguf")]
+        except OSError:
+            pass
+        return tags, online, files
+
+    def refresh(self, wait: bool = True):
+        """Lanza (o se une a) una ronda de descubrimiento. Si wait=False vuelve enseguida."""
+        with self._lock:
+            event = self._refreshing
+            owner = event is None
+            if owner:
+                event = self._refreshing = threading.Event()
+
+        if not owner:
+            if wait: event.wait()
+            return
+
+        def _run():
+            try:
+                tags, online, files = self._discover()
+                with self._lock:
+                    self.ollama_models, self.ollama_online, self.gguf_files = tags, online, files
+                    self.last_refresh = time.time()
+                    self.refresh_count += 1
+            finally:
+                with self._lock:
+                    self._refreshing = None
+                event.set()
+
+        if wait:
+            _run()
+        else:
+            threading.Thread(target=_run, daemon=True, name="ModelCatalogRefresh").start()
+
+    def _ensure_fresh(self):
+        """Frío: refresco síncrono. Caducado: se sirve lo cacheado y se refresca en background."""
+        if self.last_refresh == 0.0:
+            self.refresh(wait=True)
+        elif time.time() - self.last_refresh > self.ttl:
+            self.refresh(wait=False)
+
+    def find_ollama(self, match_pattern: str):
+        """Match "model" con "model:latest", "model:7b" o coincidencia parcial."""
+        self._ensure_fresh()
+        with self._lock:
+            tags = list(self.ollama_models)
+        for m_name in tags:
+            if m_name == match_pattern or m_name.startswith(match_pattern + ":") or match_pattern in m_name:
+                return m_name
+        return None
+
+    def find_gguf(self, match_pattern: str):
+        self._ensure_fresh()
+        with self._lock:
+            files = list(self.gguf_files)
+        for c in files:
+            if match_pattern.lower() in c.name.lower():
+                return c
+        return None
+
+    def candidates(self, role_config: dict):
+        """
+        Orden de resolución de un rol, idéntico al histórico de load_model:
+        por cada patrón -> Ollama, GGUF local, Google API.
+        Devuelve [(source, identifier), ...].
+        """
+        source_pref = role_config.get('source', 'local')
+        match_patterns = role_config.get('model_match', '')
+        if isinstance(match_patterns, str):
+            match_patterns = [match_patterns]
+
+        found = []
+        for match_pattern in match_patterns:
+            m_name = self.find_ollama(match_pattern)
+            if m_name:
+                found.append(("ollama", m_name))
+            path = self.find_gguf(match_pattern)
+            if path:
+                found.append(("gguf", path))
+            if source_pref == 'google_api':
+                found.append(("google_api", match_pattern))
+        return found
+
+    def get_status(self):
+        with self._lock:
+            return {
+                "ollama_online": self.ollama_online,
+                "ollama_models": len(self.ollama_models),
+                "gguf_files": len(self.gguf_files),
+                "age": round(time.time() - self.last_refresh, 1) if self.last_refresh else None,
+                "refreshes": self.refresh_count
+            }
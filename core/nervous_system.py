@@ -1,6 +1,8 @@
 import time
 import threading
-from PIL import Image, ImageChops, ImageStat
+import numpy as np
+import cv2
+from PIL import Image
 
 class ReflexAction:
     def __init__(self, action_type, params=None):
@@ -13,40 +15,91 @@ class ReflexController:
     The 'Reptilian Brain' of ARAFURA.
     Operates on raw visual heuristics, diffs, and rules.
     NO LLMS allowed here. Latency target: < 50ms.
+    Implements:
+    - Frames numpy BGR (vista del FrameRing, sin copia) o PIL; miniatura 128x128 en buffers
+      preasignados (cv2.resize/cvtColor con dst)
+    - Diff medio, movimiento por cuadrante, destellos de brillo y energía de bordes vectorizados
     """
+    SIZE = 128
+
     def __init__(self):
-        self.last_frame = None
+        self.last_frame = None # miniatura en gris del frame anterior
         self.last_process_time = 0
         self.diff_threshold = 15.0 # Sensitivity (0-255 scaling)
+        self.flash_threshold = 40.0 # salto de brillo medio (0-255) que cuenta como destello
         self.lock = threading.Lock()
         self.consecutive_still_frames = 0
         self.consecutive_motion_frames = 0
+        self.features = {}
+
+        n = self.SIZE
+        self._small = np.empty((n, n, 3), np.uint8)
+        self._gray = np.empty((n, n), np.uint8)
+        self._prev = np.empty((n, n), np.uint8)
+        self._diff = np.empty((n, n), np.uint8)
+        self._lap = np.empty((n, n), np.int16)
+        self._edges = np.empty((n, n), np.uint8)
+        self._prev_brightness = None
+
+    def _to_gray_thumb(self, frame):
+        """Miniatura gris 128x128 en self._gray. numpy: BGR/BGRA/gris; PIL: se convierte una vez."""
+        code = cv2.COLOR_BGR2GRAY
+        if isinstance(frame, Image.Image):
+            frame, code = np.asarray(frame.convert('RGB')), cv2.COLOR_RGB2GRAY
+        if frame.ndim == 3 and frame.shape[2] == 4:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY)
+        if frame.ndim == 2:
+            cv2.resize(frame, (self.SIZE, self.SIZE), dst=self._gray, interpolation=cv2.INTER_AREA)
+            return
+        cv2.resize(frame, (self.SIZE, self.SIZE), dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, code, dst=self._gray)
+
+    def _compute_features(self):
+        h = self.SIZE // 2
+        cv2.absdiff(self._prev, self._gray, dst=self._diff)
+        # Cuadrantes (tl, tr, bl, br): media de cada bloque 64x64 en una sola reducción
+        quadrants = self._diff.reshape(2, h, 2, h).mean(axis=(1, 3))
+        brightness = cv2.mean(self._gray)[0]
+        cv2.Laplacian(self._gray, cv2.CV_16S, dst=self._lap, ksize=3)
+        cv2.convertScaleAbs(self._lap, dst=self._edges)
+        return {
+            "mean_diff": cv2.mean(self._diff)[0],
+            "quadrants": [round(float(q), 2) for q in quadrants.ravel()],
+            "brightness": brightness,
+            "flash": self._prev_brightness is not None and abs(brightness - self._prev_brightness) > self.flash_threshold,
+            "edge_energy": cv2.mean(self._edges)[0],
+        }
 
-    def process_frame(self, current_frame: Image.Image, state_strategy: str) -> str:
+    def process_frame(self, current_frame, state_strategy: str) -> str:
         """
         Analyzes a frame and returns a signal:
         - 'STILL': Nothing happening.
         - 'MOTION': Significant change detected.
         - 'TRIGGER_THOUGHT': Complexity detected, wake up cortex.
+        Los rasgos del último frame quedan en self.features.
         """
-        if not current_frame:
+        if current_frame is None:
             return "NO_SIGNAL"
 
         with self.lock:
             now = time.time()
             # 1. Resize for speed (128px is enough for reflexes)
-            thumb = current_frame.resize((128, 128)).convert('L')
-            
-            if not self.last_frame:
-                self.last_frame = thumb
+            self._to_gray_thumb(current_frame)
+
+            if self.last_frame is None:
+                np.copyto(self._prev, self._gray)
+                self.last_frame = self._prev
+                self._prev_brightness = cv2.mean(self._gray)[0]
                 return "STILL"
 
-            # 2. Compute Diff
-            diff = ImageChops.difference(self.last_frame, thumb)
-            stat = ImageStat.Stat(diff)
-            mean_diff = sum(stat.mean) / len(stat.mean)
-            
-            self.last_frame = thumb
+            # 2. Compute Diff + rasgos
+            self.features = self._compute_features()
+            mean_diff = self.features["mean_diff"]
+            self._prev_brightness = self.features["brightness"]
+            # El frame actual pasa a ser el anterior intercambiando buffers (sin copia)
+            self._prev, self._gray = self._gray, self._prev
+            self.last_frame = self._prev
+            self.last_process_time = time.time() - now
             
             # 3. Heuristics based on Strategy
             # In AGGRESSIVE/GAMER mode, we are hyper-sensitive to motion
@@ -55,7 +108,7 @@ class ReflexController:
             else:
                 threshold = self.diff_threshold
 
-            if mean_diff > threshold:
+            if mean_diff > threshold or self.features["flash"]:
                 self.consecutive_motion_frames += 1
                 self.consecutive_still_frames = 0
                 return "MOTION"
@@ -76,5 +129,9 @@ class ReflexController:
         # Example Reflex Rule 2: Gamer Reflex (Stub)
         # If strategy is GAMER and we see a massive flash (explosion?), maybe click?
         # (This would need specific region monitoring, kept simple for now)
+        if signal == "MOTION" and state_strategy == "GAMER" and self.features.get("flash"):
+            quadrants = self.features["quadrants"]
+            zone = ("top-left", "top-right", "bottom-left", "bottom-right")[quadrants.index(max(quadrants))]
+            return ReflexAction("LOG", {"msg": f"⚡ [Reflex] Flash detected ({zone})."})
         
         return None
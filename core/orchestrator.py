@@ -1,4 +1,5 @@
 import threading
+import asyncio
 import time
 import json
 from pathlib import Path
@@ -10,11 +11,20 @@ from core.agents.visual_active import VisualAgent
 from core.monitor import SystemMonitor
 from core.memory.manager import MemoryManager
 from core.vision_pipeline import VisionPipeline
+from core.vision_process import VisionProcess
+from core.frame_encoding import encode_frame
+from core.adaptive_rate import AdaptiveRateController
+from core.frame_hash import FrameHashIndex
+from core.capture_arbiter import CaptureArbiter
 from core.memory_vector import VectorMemory
 import pyautogui
 from core.rag_manager import RAGManager
 from core.local_ocr import LocalOCREngine
 from core.nervous_system import ReflexController
+from core.reactor import Reactor
+from core.autonomy_pipeline import StagePipeline
+from core.scheduler import PRIORITY_AUTONOMY, PRIORITY_BACKGROUND
+from core.cancellation import CancellationToken
 
 class SystemState:
     """Formalizes ARAFURA's cognitive and operational state."""
@@ -30,7 +40,7 @@ class SystemState:
         self.autonomy_active = False
         self.gamer_mode = False
         self.hitl_paused = False
-        self.interrupt_signal = threading.Event()
+        self.interrupt_signal = CancellationToken() # Event-compatible; corta generaciones en vuelo
         self.mood = "NOMINAL" # PERSISTENT EMOTIONAL STATE
         self.strategy = "OBSERVATION" # ACTIVE OPERATIONAL STRATEGY
         self.active_incident = None # TRACK CURRENT ISSUE
@@ -80,7 +90,6 @@ class ArafuraOrchestrator:
         
         # 1. Cargar Identidad
         self.identity = self._load_identity()
-        self.perception_lock = threading.Lock() # Resource Arbiter for OCR/Vision
         
         # 2. Inicializar Cerebro (Router) and Memoria
         self.router = ModelRouter(base_path)
@@ -89,10 +98,24 @@ class ArafuraOrchestrator:
         # 3. Inicializar Cuerpo (Vision)
         self.visual = VisualAgent(self.memory, self.router) 
         self.visual.event_callback = self._emit_event # Connect callback
-        # Pass perception_lock via property injection later, or re-init here if lock existed.
-        # But lock is defined LATER in this init. Let's move lock init UP or pass it here.
-        # simpler: define lock earlier.
-        self.vision_pipeline = VisionPipeline(fps=5, capture_lock=self.perception_lock) # 5 FPS is enough for intelligence
+        # Cadencia coordinada: FPS de captura, intervalo de inferencia y power_level
+        rate_cfg = self.router.vision_config.get('adaptive_rate', {})
+        self.rate_controller = AdaptiveRateController(**rate_cfg.get('params', {})) if rate_cfg.get('enabled', True) else None
+        # Deduplicación perceptual: frames casi idénticos reutilizan el último análisis del VLM
+        dedup_cfg = self.router.vision_config.get('dedup', {})
+        self.dedup_enabled = dedup_cfg.get('enabled', True)
+        # Resource Arbiter for OCR/Vision: un grab físico por tick, las regiones son crops del último frame
+        self.capture_arbiter = CaptureArbiter(**self.router.vision_config.get('arbiter', {}))
+        pipeline_kwargs = dict(fps=5, arbiter=self.capture_arbiter, rate_controller=self.rate_controller,
+                               analyzed_index=FrameHashIndex(**dedup_cfg.get('params', {}))) # 5 FPS is enough for intelligence
+        process_cfg = self.router.vision_config.get('process', {})
+        if process_cfg.get('enabled', False):
+            # Captura/diff/codificación en otro proceso; los frames llegan por memoria compartida
+            self.vision_pipeline = VisionProcess(slot_bytes=int(process_cfg.get('max_frame_mb', 24) * 1048576), **pipeline_kwargs)
+        else:
+            self.vision_pipeline = VisionPipeline(**pipeline_kwargs)
+        self._reflex_seq = 0      # último frame del anillo analizado por el reflejo
+        self.recorder = None      # FrameRecorder activo (/grabar): frames + eventos emitidos
         
         # 3.1 OCR Engine (Disbled in v5.1 favor of VLM)
         # self.ocr_engine = LocalOCREngine()
@@ -116,6 +139,7 @@ class ArafuraOrchestrator:
         self.state = SystemState(persistence_path=state_path)
         self.running = True
         self.lock = threading.Lock()
+        self.reactor = Reactor("Orchestrator") # bucle de fondo: eventos (frames, entrada) + timers
         
         self.last_thought_time = 0
         self.last_perception_time = 0
@@ -134,6 +158,7 @@ class ArafuraOrchestrator:
         self.autonomy_action_count = 0
         self.last_autonomy_action = ""
         self.autonomy_loop_interval = 5  
+        self.autonomy_pipeline = self._build_autonomy_pipeline() # infer -> act -> learn en paralelo
         self.user_autonomy_prompt = ""  
 
         # WINDOW KNOWLEDGE MEMORY 📓
@@ -165,12 +190,55 @@ class ArafuraOrchestrator:
 
     def _emit_event(self, event_type: str, payload: dict):
         """Notifica al sistema externo (WS/TUI) de un evento"""
+        recorder = self.recorder
+        if recorder:
+            try:
+                recorder.add_event(event_type, payload)
+            except Exception as e:
+                print(f"[Recorder] Event Error: {e}")
         if self.event_callback:
             try:
                 self.event_callback(event_type, payload)
             except Exception as e:
                 print(f"Event Emit Error: {e}")
 
+    def _frame_b64(self, fmt="jpeg", quality=None, max_size=None):
+        """
+        Frame actual en base64 desde la cache encode-once del VisionPipeline: cada variante se
+        codifica una vez por frame y la comparten VLM, CORTEX y el evento vision_frame.
+        Sin frame en el pipeline recurre a una captura directa del VisualAgent.
+        Devuelve (b64, (w, h)) o (None, None).
+        """
+        if self.vision_pipeline.running:
+            _, b64 = self.vision_pipeline.get_encoded(fmt, quality, max_size)
+            if b64:
+                return b64, self.vision_pipeline.frame_size
+        captured = self.visual.capture_frame() if self.visual else None
+        if not captured:
+            return None, None
+        import cv2
+        import numpy as np
+        bgr = cv2.cvtColor(np.asarray(captured.convert('RGB')), cv2.COLOR_RGB2BGR)
+        return encode_frame(bgr, fmt, quality, max_size), captured.size
+
+    def _cursor_crop_b64(self, size=500):
+        """Crop PNG alrededor del cursor vía árbitro: recorte del frame del pipeline (o de la instantánea compartida)"""
+        cursor = getattr(self.visual, 'ghost_cursor', None)
+        if cursor:
+            sw, sh = pyautogui.size()
+            left = min(max(0, cursor.x - size // 2), max(0, sw - size))
+            top = min(max(0, cursor.y - size // 2), max(0, sh - size))
+            b64 = self.capture_arbiter.region_b64((left, top, min(sw, left + size), min(sh, top + size)), "png")
+            if b64:
+                return b64
+        crop_img = self.visual.capture_cursor_crop(size=size)
+        if not crop_img:
+            return None
+        import io, base64
+        buf = io.BytesIO()
+        crop_img.save(buf, format="PNG")
+        return base64.b64encode(buf.getvalue()).decode('utf-8')
+
     def _load_identity(self):
         """Carga la identidad base e inyecta metadatos temporales (Día de Persistencia)"""
         base_identity = ""
@@ -317,11 +385,21 @@ class ArafuraOrchestrator:
             self.memory.log("system", res)
             return res
 
+        if lower_input == "/grabar":
+            return self.stop_recording() if self.recorder else self.start_recording()
+
         if lower_input == "/status":
-            return f"[SYSTEM MONITOR]\n{self.monitor.get_status_str()}\nMode: {self.system_mode.upper()}"
+            status = f"[SYSTEM MONITOR]\n{self.monitor.get_status_str()}\nMode: {self.system_mode.upper()}"
+            if self.autonomy_pipeline.started is not None:
+                stages = self.autonomy_pipeline.get_stats()["stages"]
+                status += "\nAutonomy: " + " | ".join(
+                    f"{name} {st['processed']} ok, {st['service_ms']['p50']:.0f}ms p50, cola {st['depth']}"
+                    for name, st in stages.items())
+            return status
 
         if lower_input in ["/salir", "salir", "exit", "/exit"]:
             self.running = False
+            self.reactor.stop()
             self.memory.log("system", "Shutdown initiated by user.")
             return "Protocolo de desconexión iniciado. ARAFURA Core deteniéndose... 👋"
         
@@ -361,7 +439,7 @@ class ArafuraOrchestrator:
             self.state.gamer_mode = not self.state.gamer_mode
             self.state.save()
             self.system_mode = "vision" if self.state.gamer_mode else self.system_mode
-            self.last_perception_time = 0 # Forzar visual inmediata
+            self._wake_vision() # Forzar visual inmediata
             self._update_monitor_ui()
             if self.state.gamer_mode:
                 self._emit_event("visual_log", {"msg": "🎮 GAMER MODE ACTIVATED! Let's WIN!"})
@@ -424,6 +502,7 @@ class ArafuraOrchestrator:
             self.state.autonomy_active = False
             self.system_mode = "chat"
             self.state.interrupt_signal.set()
+            self.autonomy_pipeline.cancel()
             self._emit_event("visual_log", {"msg": "🛑 EMERGENCY STOP: Autonomy & Thread Interrupt."})
             self._update_monitor_ui()
             return f"🛑 **AUTONOMÍA DETENIDA**"
@@ -434,12 +513,13 @@ class ArafuraOrchestrator:
             try: seconds = int(parts[1])
             except: pass
         
-        # 2. Activar Motores
+        # 2. Activar Motores (un nuevo arranque rearma el interrupt de un "/actua stop" previo)
+        self.state.interrupt_signal.clear()
         self.state.autonomy_active = True
         self.autonomy_end_time = time.time() + seconds
         self.autonomy_action_count = 0
         self.system_mode = "vision"
-        self.last_perception_time = 0 # Forzar visual inmediata
+        self._wake_vision() # Forzar visual inmediata
         
         # 3. Lanzar Escaneo Inicial (Mejora la precision al arrancar)
         threading.Thread(target=self.scan_screen_routine, daemon=True).start()
@@ -450,15 +530,28 @@ class ArafuraOrchestrator:
     def _get_help_text(self):
         return """**ARAFURA SYSTEM COMMANDS**\n... (Ayuda corta) ..."""
 
-    def process_stream(self, user_input: str, task_type: str = "chat"):
-        """Versión generatriz de process_input para streaming de pensamientos"""
+    def _stable_system_prompt(self) -> str:
+        """
+        Identidad + gobernanza: idéntico turno a turno (la consulta de gobernanza es fija),
+        así el backend reutiliza el prefijo ya evaluado de su KV-cache.
+        """
+        gov_hits = self.rag.query("governance principles", limit=2)
+        if gov_hits:
+            return f"{self.identity}\n\n\n### GOVERNANCE:\n{gov_hits}"
+        return self.identity
+
+    def _prepare_stream(self, user_input: str, task_type: str = "chat"):
+        """
+        Paso común de process_stream / aprocess_stream: comandos, contexto, RAG y visión.
+        Devuelve (respuesta_directa, None) o (None, kwargs para router.stream_request).
+        """
         self.last_activity_time = time.time()
+        self.reactor.post("input")
         
         # 0. Verificar Comandos Primero
         cmd_res = self._check_system_commands(user_input)
         if cmd_res:
-            yield cmd_res
-            return
+            return cmd_res, None
 
         # LOG USER INPUT (Normal flowing message)
         self.memory.log("user", user_input)
@@ -467,38 +560,25 @@ class ArafuraOrchestrator:
 
         # 1. Preparar contexto (Vision + RAG)
         images = None
-        knowledge_context = ""
-        rag_hits = self.rag.query(user_input, limit=2)
-        if rag_hits: knowledge_context += f"\n\n### KNOWLEDGE:\n{rag_hits}"
-        
-        gov_hits = self.rag.query("governance principles", limit=2)
-        if gov_hits: knowledge_context += f"\n\n### GOVERNANCE:\n{gov_hits}"
-
-        sys_prompt = f"{self.identity}\n{knowledge_context}"
-
+        sys_prompt = self._stable_system_prompt()
         if self.state.gamer_mode:
              sys_prompt += f"\n\n{self.gamer_prompt}"
+
+        # El RAG cambia en cada turno: va después del historial para no romper el prefijo cacheado
+        knowledge_context = None
+        rag_hits = self.rag.query(user_input, limit=2)
+        if rag_hits: knowledge_context = f"### KNOWLEDGE:\n{rag_hits}"
         
         if self.system_mode == "vision" and self.visual:
             if not getattr(self.visual, 'active_window', None):
-                yield "❌ **VISION ERROR**: No active window selected. Use `/ventana` to list and `/ventana <N>` to select target."
-                return
+                return "❌ **VISION ERROR**: No active window selected. Use `/ventana` to list and `/ventana <N>` to select target.", None
 
             self.last_perception_time = time.time()
             try:
                 if getattr(self.visual, 'active_window', None):
-                    captured_img = self.visual.capture_frame()
-                    if captured_img:
-                         # Optimize: Resize and use JPEG
-                         img_copy = captured_img.copy()
-                         img_copy.thumbnail((1024, 1024))
-                         if img_copy.mode != 'RGB':
-                             img_copy = img_copy.convert('RGB')
-                         
-                         import io, base64
-                         buf = io.BytesIO()
-                         img_copy.save(buf, format="JPEG", quality=80)
-                         b64_img = base64.b64encode(buf.getvalue()).decode('utf-8')
+                    # Optimize: JPEG 1024px, codificado una vez y compartido
+                    b64_img, _ = self._frame_b64("jpeg", 80, max_size=1024)
+                    if b64_img:
                          images = [b64_img]
                          task_type = "visual"
                          self._emit_event("vision_frame", {"image": b64_img})
@@ -508,29 +588,57 @@ class ArafuraOrchestrator:
                             "You are ARAFURA's Visual Cortex. Answer questions concisely based strictly on current vision.\n"
                             "GROUNDING: Use [X, Y] (0-1000) for positions. Describe elements before acting."
                          )
+                         knowledge_context = None
             except Exception as e:
                 print(f"Stream vision capture error: {e}")
 
+        return None, {
+            "task_type": task_type,
+            "prompt": user_input,
+            "system_prompt": sys_prompt,
+            "context_prompt": knowledge_context,
+            "context_messages": self.context_history,
+            "images": images
+        }
+
+    def _stream_fallback_request(self, user_input: str):
+        """SMART FALLBACK: Vision no devolvió nada (consulta conversacional), se reintenta como Chat"""
+        return {
+            "task_type": "chat",
+            "prompt": user_input,
+            "system_prompt": self._stable_system_prompt(),
+            "context_prompt": "[Context: User asked this while in Vision Mode, but visual analysis was not applicable.]",
+            "context_messages": self.context_history
+        }
+
+    def _emit_stream_token(self, token: str, is_thinking: bool) -> bool:
+        """Emite un token al panel de reflexión y devuelve el nuevo estado <think>"""
+        if "<think>" in token: is_thinking = True
+        self._emit_event("thought_stream", {"token": token, "is_thinking": is_thinking})
+        if "</think>" in token: is_thinking = False
+        return is_thinking
+
+    def process_stream(self, user_input: str, task_type: str = "chat"):
+        """Versión generatriz de process_input para streaming de pensamientos"""
+        direct, request = self._prepare_stream(user_input, task_type)
+        if direct:
+            yield direct
+            return
+
         full_response = ""
         is_thinking = False
         
         try:
             self.state.interrupt_signal.clear() # Reset on new request
-            for token in self.router.stream_request(
-                task_type=task_type,
-                prompt=user_input,
-                system_prompt=sys_prompt,
-                context_messages=self.context_history,
-                images=images
-            ):
+            for token in self.router.stream_request(**request, cancel_event=self.state.interrupt_signal):
                 if self.state.interrupt_signal.is_set():
-                    yield "\n\n[INTRUPCIÓN: Operación cancelada por el usuario.]"
                     break
-                if "<think>" in token: is_thinking = True
-                self._emit_event("thought_stream", {"token": token, "is_thinking": is_thinking})
-                if "</think>" in token: is_thinking = False
+                is_thinking = self._emit_stream_token(token, is_thinking)
                 full_response += token
                 yield token
+            if self.state.interrupt_signal.is_set():
+                # El backend ya cortó su stream (cancel_event); sólo se avisa al usuario
+                yield "\n\n[INTRUPCIÓN: Operación cancelada por el usuario.]"
                 
             # 1.1 Resume from HITL if user responds
             if self.state.hitl_paused:
@@ -538,19 +646,14 @@ class ArafuraOrchestrator:
                 self._emit_event("visual_log", {"msg": "▶️ Resuming from HITL via chat input."})
 
             # SMART FALLBACK: If Vision returned nothing (e.g. conversational query), try Chat
-            if not full_response.strip() and self.system_mode == "vision":
+            if not full_response.strip() and self.system_mode == "vision" and not self.state.interrupt_signal.is_set():
                 print("[Orchestrator] Vision yielded empty response. Falling back to Chat.")
-                for token in self.router.stream_request(
-                    task_type="chat",
-                    prompt=user_input,
-                    system_prompt=f"{self.identity}\n[Context: User asked this while in Vision Mode, but visual analysis was not applicable.]",
-                    context_messages=self.context_history
-                ):
+                for token in self.router.stream_request(**self._stream_fallback_request(user_input)):
                      full_response += token
                      yield token
 
             # 2. Final Logic (Post-Stream)
-            final_response = self._finalize_response(full_response, regions if 'regions' in locals() else images)
+            final_response = self._finalize_response(full_response, request["images"])
             
             # Since the generator yielded the parts, the caller might only get parts.
             # But api.py joins them. To support [[INTERNAL]] logic, we check if it changed.
@@ -560,9 +663,49 @@ class ArafuraOrchestrator:
         except Exception as e:
             yield f"Error en stream: {e}"
 
+    async def aprocess_stream(self, user_input: str, task_type: str = "chat"):
+        """Versión asyncio de process_stream: los tokens fluyen en el event loop, sin hilo por sesión"""
+        # Preparación y post-proceso pueden tocar pantalla/disco: pasan brevemente por el executor
+        direct, request = await asyncio.to_thread(self._prepare_stream, user_input, task_type)
+        if direct:
+            yield direct
+            return
+
+        full_response = ""
+        is_thinking = False
+
+        try:
+            self.state.interrupt_signal.clear() # Reset on new request
+            async for token in self.router.astream_request(**request, cancel_event=self.state.interrupt_signal):
+                if self.state.interrupt_signal.is_set():
+                    break
+                is_thinking = self._emit_stream_token(token, is_thinking)
+                full_response += token
+                yield token
+            if self.state.interrupt_signal.is_set():
+                # El backend ya cortó su stream (cancel_event); sólo se avisa al usuario
+                yield "\n\n[INTRUPCIÓN: Operación cancelada por el usuario.]"
+
+            if self.state.hitl_paused:
+                self.state.hitl_paused = False
+                self._emit_event("visual_log", {"msg": "▶️ Resuming from HITL via chat input."})
+
+            if not full_response.strip() and self.system_mode == "vision" and not self.state.interrupt_signal.is_set():
+                print("[Orchestrator] Vision yielded empty response. Falling back to Chat.")
+                async for token in self.router.astream_request(**self._stream_fallback_request(user_input)):
+                    full_response += token
+                    yield token
+
+            final_response = await asyncio.to_thread(self._finalize_response, full_response, request["images"])
+            if len(final_response) > len(full_response):
+                yield final_response[len(full_response):]
+        except Exception as e:
+            yield f"Error en stream: {e}"
+
     def process_input(self, user_input: str, task_type: str = "chat"):
         """Procesa una entrada del usuario y devuelve respuesta (Legacy/Sync)."""
         self.last_activity_time = time.time()
+        self.reactor.post("input")
         
         with self.lock:
             # 0. Verificar Comandos
@@ -601,27 +744,20 @@ class ArafuraOrchestrator:
                 self.last_perception_time = time.time()
                 try: 
                     if getattr(self.visual, 'active_window', None):
-                        captured_img = self.visual.capture_frame()
-                        if captured_img:
-                             import io, base64
-                             buf = io.BytesIO()
-                             captured_img.save(buf, format="PNG")
-                             b64_img = base64.b64encode(buf.getvalue()).decode('utf-8')
+                        b64_img, _ = self._frame_b64("png")
+                        if b64_img:
                              images = [b64_img]
                              task_type = "visual"
                              self._emit_event("vision_frame", {"image": b64_img})
                 except Exception as e:
                     print(f"Vision capture error: {e}")
 
-            # 4. Contexto Adicional (RAG + Gobernanza)
-            knowledge_context = ""
+            # 4. Contexto Adicional (RAG). Identidad + gobernanza forman el prefijo estable.
+            knowledge_context = None
             rag_hits = self.rag.query(user_input, limit=2)
-            if rag_hits: knowledge_context += f"\n\n### KNOWLEDGE:\n{rag_hits}"
-            
-            gov_hits = self.rag.query("governance principles", limit=2)
-            if gov_hits: knowledge_context += f"\n\n### GOVERNANCE:\n{gov_hits}"
+            if rag_hits: knowledge_context = f"### KNOWLEDGE:\n{rag_hits}"
 
-            sys_prompt = f"{self.identity}\n{knowledge_context}"
+            sys_prompt = self._stable_system_prompt()
 
             if task_type == "visual":
                 sys_prompt += "\n\nYou are ARAFURA's Visual Cortex. Answer concisely based on vision. Use normalized coordinates [X, Y] (0-1000)."
@@ -630,12 +766,13 @@ class ArafuraOrchestrator:
                 task_type=task_type,
                 prompt=user_input,
                 system_prompt=sys_prompt,
+                context_prompt=knowledge_context,
                 context_messages=self.context_history,
                 images=images
             )
             
             # 5. Finalize with Multimodal Logic & Automation
-            final_response = self._finalize_response(response, images if images else (captured_img if 'captured_img' in locals() else None))
+            final_response = self._finalize_response(response, images or None)
             return final_response
 
     def _finalize_response(self, response: str, visual_context=None):
@@ -753,7 +890,7 @@ class ArafuraOrchestrator:
                         
                         # UX: Auto-activar vision mode e inmediata percepción
                         self.system_mode = "vision"
-                        self.last_perception_time = 0 # FORZAR REFRESCO INMEDIATO
+                        self._wake_vision() # FORZAR REFRESCO INMEDIATO
                         
                         # Force UI Update
                         self._emit_event("monitor_update", {
@@ -788,19 +925,11 @@ class ArafuraOrchestrator:
             query = parts[1] if len(parts) > 1 else "Describe lo que ves en detalle técnico."
             
             # Capture and Route
-            captured = self.visual.capture_frame()
-            if not captured:
+            # Optimize: JPEG 1024px (misma variante que el stream visual: se codifica una vez)
+            b64, frame_size = self._frame_b64("jpeg", 80, max_size=1024)
+            if not b64:
                 return "Error: No se pudo capturar frame."
             
-            # Optimize: Resize and use JPEG
-            img_copy = captured.copy()
-            img_copy.thumbnail((1024, 1024))
-            
-            import io, base64
-            buf = io.BytesIO()
-            img_copy.save(buf, format="JPEG", quality=80)
-            b64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-            
             res = self.router.route_request(
                 task_type="visual_chat",
                 prompt=query,
@@ -815,7 +944,7 @@ class ArafuraOrchestrator:
             
             # UPGRADE: Execute actions if found in Cortex thought
             # Extract actions using the existing parser
-            actions = self._extract_actions(res, img_size=(captured.width, captured.height))
+            actions = self._extract_actions(res, img_size=frame_size)
             if actions:
                 for act_cmd in actions:
                     self._emit_event("visual_log", {"msg": f"⚡ Cortex Executing: {act_cmd}"})
@@ -857,73 +986,55 @@ class ArafuraOrchestrator:
                 pass
 
     def run_background_loop(self):
-        """Coordinador Modular de Ciclos de Vida (Hardenened Architecture)"""
-        while self.running:
-            try:
-                now = time.time()
-                
-                # Ensure pipeline is running
-                if not self.vision_pipeline.running:
-                    self.vision_pipeline.start()
-                
-                # 1. Ciclo de Salud y Telemetría
-                self._cycle_monitor_ui(now)
-                
-                # 2. Ciclo de Visión y Autonomía
-                # 2. Ciclo de Visión y Autonomía
-                if not self.state.hitl_paused and not self.state.interrupt_signal.is_set():
-                    # REFLEX CHECK (Level 0) - Runs every cycle (high freq)
-                    # For safety, we only process vision if active window exists.
-                    if self.visual and getattr(self.visual, 'active_window', None):
-                        # Capture small frame for reflex analysis
-                        # FIX: VisionPipeline does not have get_latest_frame_pil, so we convert manual or use visual agent
-                        try:
-                            # Option A: Get current CV2 frame from pipeline and convert
-                            cv_frame = self.vision_pipeline.get_current_cv()
-                            if cv_frame is not None:
-                                # Convert BGR to RGB
-                                import cv2
-                                from PIL import Image
-                                rgb_frame = cv2.cvtColor(cv_frame, cv2.COLOR_BGR2RGB)
-                                frame = Image.fromarray(rgb_frame)
-                            else:
-                                # Fallback to slow capture
-                                frame = self.visual.capture_frame()
-                        except Exception:
-                            frame = None
-                        
-                        if frame:
-                            signal = self.nervous_system.process_frame(frame, self.state.strategy)
-                            
-                            if signal == "MOTION":
-                                # Wake up autonomy if active or gamer
-                                self._execute_vision_reflex_action(signal)
-                            elif signal == "STILL":
-                                 # If still for too long, maybe look deeper?
-                                 pass
-
-                    # FULL AUTONOMY CYCLE (Level 2) - Conditioned
-                    self._cycle_vision_autonomy(now)
-                
-                # 3. Ciclo de Reflexión Estratégica
-                self._cycle_deep_thought(now)
-                
-                # 4. Ciclo de Momentos de Vida / Spontaneity
-                self._cycle_life_moments(now)
-
-                # 5. Mantenimiento de Memoria
-                self._manage_memory()
-
-            except Exception as e:
-                print(f"致命的なエラー (Critical Background Error): {e}")
-                time.sleep(1)
-            
-            time.sleep(0.05)
+        """
+        Coordinador de ciclos de vida dirigido por eventos (antes, sondeo cada 50 ms):
+        - "frame": cada frame nuevo del pipeline -> reflejo (nivel 0)
+        - "input": entrada del usuario -> ciclo de visión sin esperar al siguiente tick
+        - timers: visión/autonomía (cadencia adaptativa), monitor, deep thought, life moments, memoria
+        """
+        if not self.vision_pipeline.running:
+            self.vision_pipeline.start()
+        r = self.reactor
+        r.on("frame", self._cycle_reflex)
+        r.on("input", self._on_user_input)
+        r.every("monitor", 1.0, self._cycle_monitor_ui, delay=0)
+        r.every("vision", self._vision_timer_interval, self._cycle_vision)
+        r.every("deep_thought", 20.0, self._cycle_deep_thought)
+        r.every("life_moments", 10.0, self._cycle_life_moments)
+        r.every("memory", 5.0, lambda now: self._manage_memory())
+        r.watch_frames(self.vision_pipeline)
+        r.run()
+
+    def _perception_allowed(self):
+        return not self.state.hitl_paused and not self.state.interrupt_signal.is_set()
+
+    def _cycle_reflex(self, seq):
+        """REFLEX CHECK (Level 0): un frame nuevo del anillo, sólo con ventana activa"""
+        if not self._perception_allowed() or not (self.visual and getattr(self.visual, 'active_window', None)):
+            return
+        # Vista sin copia del último frame del anillo (BGR numpy); el ReflexController trabaja sobre ella
+        seq, frame = self.vision_pipeline.get_frame()
+        if frame is None or seq == self._reflex_seq:
+            return
+        self._reflex_seq = seq
+        signal = self.nervous_system.process_frame(frame, self.state.strategy)
+        if signal == "MOTION":
+            # Wake up autonomy if active or gamer
+            self._execute_vision_reflex_action(signal)
+
+    def _on_user_input(self, _payload):
+        """Entrada del usuario: el ciclo de visión se reevalúa en el acto (p. ej. al salir de HITL)"""
+        self.reactor.reschedule("vision")
+
+    def _wake_vision(self):
+        """Fuerza un ciclo de visión inmediato (el timer "vision" se adelanta)"""
+        self.last_perception_time = 0
+        self.reactor.reschedule("vision")
 
     def _cycle_monitor_ui(self, now):
         """Gestiona la telemetría y sincronización de la UI"""
         # (Lógica extraída de run_background_loop)
-        if now - self.last_monitor_time > 1:
+        if now - self.last_monitor_time >= 1:
             self.last_monitor_time = now
             self.monitor.tick()
             
@@ -959,19 +1070,37 @@ class ArafuraOrchestrator:
         # If GAMER, maybe click? For now, we just Log it as "Reflex" and pass to Autonomy if critical.
         if self.state.gamer_mode:
             # In gamer mode, any motion implies need for attention
-             self.last_perception_time = 0 # Force immediate deep cycle
+             self._wake_vision() # Force immediate deep cycle
              
-    def _cycle_vision_autonomy(self, now):
-        """Ciclo crítico de percepción visual y acción"""
+    def _vision_interval(self):
+        """s entre ciclos de visión/autonomía"""
+        if self.rate_controller:
+            # Intervalo coordinado con el FPS de captura y la actividad de la escena
+            self.rate_controller.set_power(self.state.power_level, self.state.gamer_mode)
+            return self.rate_controller.inference_interval()
         # Power scaling: 1.0 (5s) -> 10.0 (0.2s)
         if self.state.power_level >= 9.0:
-            vision_interval = 0.1 # Ultra-Instinct
-        else:
-            # TURBO DEFAULT: 0.5s instead of 2.0s
-            base_interval = 0.5 if not self.state.gamer_mode else 0.3
-            vision_interval = base_interval / (self.state.power_level / 5.0)
+            return 0.1 # Ultra-Instinct
+        # TURBO DEFAULT: 0.5s instead of 2.0s
+        base_interval = 0.5 if not self.state.gamer_mode else 0.3
+        return base_interval / (self.state.power_level / 5.0)
+
+    def _vision_timer_interval(self):
+        """Cadencia del timer "vision": la de inferencia con ventana activa; 1 s de guardia si no"""
+        if self._perception_allowed() and self.visual and getattr(self.visual, 'active_window', None):
+            return self._vision_interval()
+        return 1.0
+
+    def _cycle_vision(self, now):
+        if not self.vision_pipeline.running: # sin pipeline no llegan eventos "frame"
+            self.vision_pipeline.start()
+        if self._perception_allowed():
+            self._cycle_vision_autonomy(now)
 
-        if self.visual and getattr(self.visual, 'active_window', None) and now - self.last_perception_time > vision_interval:
+    def _cycle_vision_autonomy(self, now):
+        """Ciclo crítico de percepción visual y acción"""
+        vision_interval = self._vision_interval()
+        if self.visual and getattr(self.visual, 'active_window', None) and now - self.last_perception_time >= vision_interval:
             self.last_perception_time = now
             try:
                 # Capture Base64 image
@@ -979,18 +1108,14 @@ class ArafuraOrchestrator:
                 if not b64_img: return
                 
                 # Precision Crop
-                crop_img = self.visual.capture_cursor_crop(size=500)
-                def encode_pil(img):
-                    import io, base64
-                    buf = io.BytesIO()
-                    img.save(buf, format="PNG")
-                    return base64.b64encode(buf.getvalue()).decode('utf-8')
-                b64_crop = encode_pil(crop_img) if crop_img else None
+                b64_crop = self._cursor_crop_b64(size=500)
 
                 # Emit Feed (Visual Cortex + Lupa) - ALWAYS ON if window active
                 self._emit_event("vision_frame", {"image": b64_img})
                 if b64_crop:
                     self._emit_event("vision_crop", {"image": b64_crop})
+                _, regions = self.vision_pipeline.get_dirty_regions(max_regions=8)
+                self._emit_event("vision_regions", {"regions": [r["bbox"] for r in regions]})
 
                 # STATE-DRIVEN ACTION BYPASS:
                 # If we are in OBSERVATION mode, do not act autonomously.
@@ -1024,14 +1149,75 @@ class ArafuraOrchestrator:
                 "Use [[ACTION: ...]]"
             )
 
+        # Contexto de la deduplicación: sin las regiones cambiadas, que varían en cada frame
+        dedup_context = ("reflex", prompt, self.state.gamer_mode, round(self.state.power_level), self.visual.active_window.title)
         images = [b64_img]
+        # Cambio localizado: miniatura para contexto + sólo los crops que cambiaron
+        localized = self._changed_region_images()
+        if localized:
+            images, regions_txt = localized
+            prompt += f"\nCHANGED REGIONS (0-1000, images 2..{len(images)}): {regions_txt}"
         if b64_crop: images.append(b64_crop)
         
-        res = self.router.route_request(task_type="visual", prompt=prompt, images=images)
+        res, analyzed = self._analyze_frame_once(
+            dedup_context,
+            lambda: self.router.route_request(task_type="visual", prompt=prompt, images=images, priority=PRIORITY_AUTONOMY, cancel_event=self.state.interrupt_signal)
+        )
+        if res:
+             self._process_autonomous_response(res, w, h, analyzed)
+
+    def _analyze_frame_once(self, context, infer, seq=None):
+        """
+        Deduplicación de inferencias visuales: si el frame seq (por defecto el último entregado)
+        es casi idéntico (hash perceptual) a uno ya analizado con el mismo contexto, devuelve esa respuesta
+        sin llamar al VLM; si no, llama a infer() y la recuerda.
+        Devuelve (respuesta, entrada del índice o None); antes de actuar, _claim_actions(entrada).
+        """
+        if not self.dedup_enabled:
+            return infer(), None
+        fhash = self.vision_pipeline.frame_hash(self.vision_pipeline.delivered_seq if seq is None else seq)
+        if fhash is None:
+            return infer(), None
+        index = self.vision_pipeline.analyzed
+        entry, distance = index.find(fhash, context)
+        if entry is not None:
+            stats = index.get_stats()
+            print(f"[Vision] ♻️ Frame repetido (d={distance}): reutilizando análisis (skip rate {stats['skip_rate']:.0%})")
+            return entry.value, entry
+        res = infer()
         if res:
-             self._process_autonomous_response(res, w, h)
+            return res, index.store(fhash, context, res)
+        return res, None
 
-    def _process_autonomous_response(self, res, w, h):
+    def _claim_actions(self, analyzed) -> bool:
+        """Las acciones de un análisis se ejecutan una vez: en un frame repetido ya se probaron sin cambiar la pantalla"""
+        if analyzed is None or self.vision_pipeline.analyzed.claim(analyzed):
+            return True
+        self._emit_event("visual_log", {"msg": "♻️ Pantalla sin cambios: acciones ya ejecutadas, no se repiten"})
+        return False
+
+    def _changed_region_images(self, max_ratio=0.25, max_regions=2):
+        """
+        Si sólo cambió una parte pequeña de la ventana (mapa de tiles sucios), devuelve
+        ([miniatura, crop1, ...], "[x1,y1,x2,y2] ...") con bboxes normalizados 0-1000; si no, None.
+        """
+        status = self.vision_pipeline.get_status()
+        frame_size = self.vision_pipeline.frame_size
+        if not frame_size or not (0 < status["dirty_ratio"] <= max_ratio):
+            return None
+        crops = self.vision_pipeline.get_dirty_crops("jpeg", 85, max_regions=max_regions, max_size=768)
+        _, thumb = self.vision_pipeline.get_encoded("jpeg", 70, max_size=512)
+        if not crops or not thumb:
+            return None
+        fw, fh = frame_size
+        boxes = " ".join(
+            "[{},{},{},{}]".format(c["bbox"][0] * 1000 // fw, c["bbox"][1] * 1000 // fh,
+                                   c["bbox"][2] * 1000 // fw, c["bbox"][3] * 1000 // fh)
+            for c in crops
+        )
+        return [thumb] + [c["image"] for c in crops], boxes
+
+    def _process_autonomous_response(self, res, w, h, analyzed=None):
         """Parsea y ejecuta acciones con el Action Budget integrado"""
         clean_res = res.replace('\n', ' ').strip()
         words = clean_res.split()
@@ -1044,6 +1230,8 @@ class ArafuraOrchestrator:
 
         # Actions
         actions = self._extract_actions(res, (w, h))
+        if actions and not self._claim_actions(analyzed):
+            return
         for action_cmd in actions:
             if self._spend_action_token():
                 decision_json = {"decision": action_cmd}
@@ -1055,12 +1243,12 @@ class ArafuraOrchestrator:
 
     def _cycle_deep_thought(self, now):
         """Pensamiento estratégico de fondo"""
-        if now - self.last_thought_time > 20:
+        if now - self.last_thought_time >= 20:
             self.last_thought_time = now
             try:
                 context_str = f"Focus: {self.visual.active_window.title if self.visual and self.visual.active_window else 'Nominal'}"
                 prompt = f"System Context: {context_str}. Generate a strategic thought (max 50 words)."
-                res = self.router.route_request("reflexion", prompt)
+                res = self.router.route_request("reflexion", prompt, priority=PRIORITY_BACKGROUND)
                 if res:
                     clean_res = res.replace('\n', ' ').strip()
                     self.thought_log.append(f"[{datetime.now().strftime('%H:%M:%S')}] {clean_res}")
@@ -1076,7 +1264,8 @@ class ArafuraOrchestrator:
                 self.last_life_thought_time = now
                 try:
                     prompt = "System is idle. You are ARAFURA. Generate a spontaneous technical observation."
-                    res = self.router.route_request("reflexion", prompt)
+                    # Espontaneidad: siempre muestreo nuevo, nunca respuesta cacheada
+                    res = self.router.route_request("reflexion", prompt, cache=False, priority=PRIORITY_BACKGROUND)
                     if res:
                         msg = f"🌿 [LIFE] {res.strip()}"
                         self._emit_event("thought_log", {"msg": msg})
@@ -1102,7 +1291,11 @@ class ArafuraOrchestrator:
                 self.context_history = self.context_history[-MAX_CONTEXT:]
 
     def _execute_autonomy_cycle(self, w, h, b64_img, b64_crop):
-        """Ciclo de autonomía avanzado con persistencia cognitiva"""
+        """
+        Ciclo de autonomía avanzado con persistencia cognitiva.
+        Aquí sólo se prepara el frame (prompt, contexto); inferencia, actuación y aprendizaje
+        corren en el AutonomyPipeline, así el frame N+1 se infiere mientras se ejecutan las acciones del N.
+        """
         # (Injecting cognitive state into prompt)
         strategy_context = f"CURRENT STRATEGY: {self.state.strategy}. MOOD: {self.state.mood}."
         now = time.time()
@@ -1110,10 +1303,7 @@ class ArafuraOrchestrator:
         
         # Check timeout
         if remaining <= 0:
-            self.state.autonomy_active = False
-            self.state.gamer_mode = False
-            self._emit_event("visual_log", {"msg": f"🛑 AUTONOMÍA FINALIZADA. Total acciones: {self.autonomy_action_count}"})
-            self._update_monitor_ui()
+            self._finish_autonomy()
             return
         
         # EMIT LIVE COUNTDOWN & STATUS
@@ -1128,11 +1318,6 @@ class ArafuraOrchestrator:
         self.visual_log.append(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
         self._emit_event("visual_log", {"msg": msg})
         
-        # Activate window before each cycle
-        try:
-            self.visual.force_activate()
-        except: pass
-        
         # QUERY VECTOR MEMORY: Has I seen this before?
         win_title = self.visual.active_window.title if self.visual.active_window else "Desconocida"
         
@@ -1144,61 +1329,110 @@ class ArafuraOrchestrator:
             "Output a short strategic thought AND if action is needed, use syntax: [[ACTION: click X Y]] (normalized 0-1000)."
         )
 
-        images = [b64_img]
+        # Cola de inferencia de 1: si el VLM va por detrás, gana el frame más reciente
+        self.autonomy_pipeline.submit({
+            "w": w, "h": h, "prompt": llava_prompt, "images": [b64_img], "win_title": win_title,
+            "seq": self.vision_pipeline.delivered_seq, "captured": now,
+            "context": ("autonomy", llava_prompt, self.state.gamer_mode, round(self.state.power_level)),
+        })
+
+    def _build_autonomy_pipeline(self):
+        """Etapas de la autonomía (vision.autonomy_pipeline en models.yaml)"""
+        cfg = self.router.vision_config.get('autonomy_pipeline', {})
+        self.autonomy_profit_delay = cfg.get('profit_delay', 0.2)
+        self.autonomy_max_stale = cfg.get('max_stale', 5.0)
+        return (StagePipeline("Autonomy")
+                .add_stage("infer", self._autonomy_infer, maxsize=1, drop_oldest=True)
+                .add_stage("act", self._autonomy_act, maxsize=cfg.get('act_queue', 1))
+                .add_stage("learn", self._autonomy_learn, maxsize=cfg.get('learn_queue', 16), drop_oldest=True))
+
+    def _autonomy_infer(self, job):
+        """Etapa 1: VLM (deduplicado por hash perceptual) y extracción de acciones"""
+        if not self.state.autonomy_active:
+            return None
         # Use visual_chat to allow mixed text + action syntax
-        try:
-            res = self.router.route_request(
+        res, analyzed = self._analyze_frame_once(
+            job["context"],
+            lambda: self.router.route_request(
                 task_type="visual_chat",
-                prompt=llava_prompt,
-                images=images
-            )
+                prompt=job["prompt"],
+                images=job["images"],
+                priority=PRIORITY_AUTONOMY,
+                cancel_event=self.state.interrupt_signal
+            ),
+            seq=job["seq"]
+        )
+        if not res:
+            return None
+        # Log Thought (Clean <think> blocks)
+        clean_res = res
+        if "<think>" in res:
+            import re
+            clean_res = re.sub(r"<think>.*?</think>", "", res, flags=re.DOTALL).strip()
+        
+        self.thought_log.append(f"[{datetime.now().strftime('%H:%M:%S')}] {clean_res[:100]}...")
+        self._emit_event("visual_log", {"msg": f"🧠 LOOP REFLECTION: {clean_res[:100]}..."})
+        
+        actions = self._extract_actions(res, (job["w"], job["h"]))
+        if not actions:
+            self._emit_event("visual_log", {"msg": "👁️ Watching..."})
+            return None
+        return {**job, "actions": actions, "analyzed": analyzed}
+
+    def _autonomy_act(self, job):
+        """Etapa 2: ejecuta las acciones; la comprobación de beneficio se deja a la etapa learn"""
+        if not self.state.autonomy_active or self.state.interrupt_signal.is_set():
+            return None
+        age = time.time() - job["captured"]
+        if age > self.autonomy_max_stale:
+            self._emit_event("visual_log", {"msg": f"⏭️ Acciones descartadas: frame de hace {age:.1f}s"})
+            return None
+        if not self._claim_actions(job["analyzed"]):
+            return None
+        # Activate window before acting
+        try:
+            self.visual.force_activate()
+        except: pass
+        
+        records = []
+        for act_cmd in job["actions"]:
+            if self.state.interrupt_signal.is_set():
+                break
+            self.autonomy_action_count += 1
+            self.last_autonomy_action = act_cmd
+            # PROFIT CHECK: Pre-Action
+            pre_equity = self.monitor.equity
+            self._emit_event("visual_log", {"msg": f"⚡ AUTONOMY EXEC: {act_cmd}"})
+            self.visual.execute_decision({"decision": act_cmd})
+            records.append({"action": act_cmd, "pre_equity": pre_equity, "at": time.time(), "win_title": job["win_title"]})
+        return records or None
+
+    def _autonomy_learn(self, records):
+        """Etapa 3: resultado de cada acción (equity tras profit_delay) y store_experience, fuera del camino de actuación"""
+        for rec in records:
+            # PROFIT CHECK: Post-Action (sin bloquear la actuación de los siguientes frames)
+            time.sleep(max(0.0, rec["at"] + self.autonomy_profit_delay - time.time()))
+            post_equity = self.monitor.equity
+            outcome = "Neutral"
+            if post_equity > rec["pre_equity"]:
+                outcome = f"PROFIT (+{post_equity - rec['pre_equity']:.2f})"
+                self._emit_event("visual_log", {"msg": f"💎 {outcome}"})
             
-            if res:
-                # Log Thought (Clean <think> blocks)
-                clean_res = res
-                if "<think>" in res:
-                    import re
-                    clean_res = re.sub(r"<think>.*?</think>", "", res, flags=re.DOTALL).strip()
-                
-                self.thought_log.append(f"[{datetime.now().strftime('%H:%M:%S')}] {clean_res[:100]}...")
-                self._emit_event("visual_log", {"msg": f"🧠 LOOP REFLECTION: {clean_res[:100]}..."})
-                
-                # Execute Actions
-                actions = self._extract_actions(res, (w, h))
-                if actions:
-                    for act_cmd in actions:
-                        self.autonomy_action_count += 1
-                        
-                        # PROFIT CHECK: Pre-Action
-                        pre_equity = self.monitor.equity
-                        
-                        self._emit_event("visual_log", {"msg": f"⚡ AUTONOMY EXEC: {act_cmd}"})
-                        self.visual.execute_decision({"decision": act_cmd})
-                        
-                        # PROFIT CHECK: Post-Action (Brief Wait)
-                        # In a real async system, we'd check this later. here we cheat slightly for immediate feedback.
-                        time.sleep(0.2) 
-                        post_equity = self.monitor.equity
-                        
-                        outcome = "Neutral"
-                        if post_equity > pre_equity:
-                            outcome = f"PROFIT (+{post_equity - pre_equity:.2f})"
-                            self._emit_event("visual_log", {"msg": f"💎 {outcome}"})
-                        
-                        # Store experience
-                        self.vector_memory.store_experience(
-                            category="visual",
-                            observation=f"Action in {win_title}",
-                            action=act_cmd,
-                            outcome=outcome
-                        )
-                else:
-                    self._emit_event("visual_log", {"msg": "👁️ Watching..."})
-                    
-        except Exception as e:
-            print(f"Autonomy Loop Error: {e}")
-
+            # Store experience
+            self.vector_memory.store_experience(
+                category="visual",
+                observation=f"Action in {rec['win_title']}",
+                action=rec["action"],
+                outcome=outcome
+            )
 
+    def _finish_autonomy(self):
+        self.state.autonomy_active = False
+        self.state.gamer_mode = False
+        self.autonomy_pipeline.cancel()
+        self._emit_event("visual_log", {"msg": f"🛑 AUTONOMÍA FINALIZADA. Total acciones: {self.autonomy_action_count}"})
+        self._emit_event("autonomy_pipeline", self.autonomy_pipeline.get_stats())
+        self._update_monitor_ui()
 
 
     def scan_screen_routine(self):
@@ -1210,20 +1444,11 @@ class ArafuraOrchestrator:
         self._emit_event("visual_log", {"msg": "🧠 INICIANDO REFLEXIÓN ESTRATÉGICA (COGNITIVE FLOW)..."})
         
         # 1. Capture Full Context
-        captured = self.visual.capture_frame()
-        if not captured:
+        # Optimize Image: JPEG 1024px desde la cache encode-once
+        b64_img, frame_size = self._frame_b64("jpeg", 80, max_size=1024)
+        if not b64_img:
             self._emit_event("visual_log", {"msg": "❌ No visual input for reflection."})
             return
-
-        # Optimize Image
-        img_copy = captured.copy()
-        img_copy.thumbnail((1024, 1024))
-        if img_copy.mode != 'RGB': img_copy = img_copy.convert('RGB')
-        
-        import io, base64
-        buf = io.BytesIO()
-        img_copy.save(buf, format="JPEG", quality=80)
-        b64_img = base64.b64encode(buf.getvalue()).decode('utf-8')
         
         # 2. Strategic Prompt
         # Uses the last user input to contextualize the reflection
@@ -1240,7 +1465,9 @@ class ArafuraOrchestrator:
         res = self.router.route_request(
             task_type="visual_chat", # Use visual_chat to allow mixed thought+action syntax
             prompt=prompt,
-            images=[b64_img]
+            images=[b64_img],
+            priority=PRIORITY_AUTONOMY,
+            cancel_event=self.state.interrupt_signal
         )
         
         # 4. Log and Emit
@@ -1252,7 +1479,7 @@ class ArafuraOrchestrator:
             
             # 5. EXECUTE ACTIONS
             # Reuse extraction logic
-            actions = self._extract_actions(res, (captured.width, captured.height))
+            actions = self._extract_actions(res, frame_size)
             if actions:
                 for act_cmd in actions:
                     self._emit_event("visual_log", {"msg": f"⚡ AUTONOMY EXEC: {act_cmd}"})
@@ -1274,7 +1501,9 @@ class ArafuraOrchestrator:
         w, h = pyautogui.size()
         tile_size = 500
         
+        import base64
         self.ocr_memory = [] # Clear previous OCR
+        scan_start = time.time()
         
         for y in range(0, h, tile_size):
             for x in range(0, w, tile_size):
@@ -1286,21 +1515,17 @@ class ArafuraOrchestrator:
                 center_x = x + (tile_size // 2)
                 center_y = y + (tile_size // 2)
                 
-                # 1. Capture High-Res Tile DIRECTLY (Bypassing Pipeline for verification)
+                # 1. High-Res Tile via Arbiter: crop del frame en vivo o de una única instantánea
+                # de pantalla para todo el barrido (sin parar la captura del pipeline)
                 try:
-                    from PIL import ImageGrab
-                    with self.perception_lock:
-                        img_crop = ImageGrab.grab(bbox=bbox)
+                    b64_crop = self.capture_arbiter.region_b64(
+                        bbox, "png", max_age=time.time() - scan_start + self.capture_arbiter.max_age)
                     
                     # Debug Save
-                    if x == 0 and y == 0:
-                        img_crop.save("debug_ocr_live.png")
-                        print("📸 [DEBUG] Saved debug_ocr_live.png (Direct Capture)")
-
-                    # Convert to B64 for Engine
-                    buffer = io.BytesIO()
-                    img_crop.save(buffer, format="PNG")
-                    b64_crop = base64.b64encode(buffer.getvalue()).decode('utf-8')
+                    if b64_crop and x == 0 and y == 0:
+                        with open("debug_ocr_live.png", "wb") as f:
+                            f.write(base64.b64decode(b64_crop))
+                        print("📸 [DEBUG] Saved debug_ocr_live.png (Arbiter Capture)")
                 except Exception as e:
                     print(f"⚠️ [OCR] Capture Failed: {e}")
                     b64_crop = None
@@ -1361,10 +1586,38 @@ class ArafuraOrchestrator:
         # Decoupling: Power 10 -> Max Aggressiveness & Frequency
         self.state.aggressiveness = self.state.power_level / 10.0
         self.state.perception_freq = self.state.power_level / 2.0 # Max 5Hz
+        if self.rate_controller:
+            self.rate_controller.set_power(self.state.power_level, self.state.gamer_mode)
         
         self._emit_event("visual_log", {"msg": f"⚡ SYSTEM OVERCLOCK: Power Level {self.state.power_level:.1f} (Freq: {self.state.perception_freq:.1f}Hz)"})
         self._update_monitor_ui()
 
+    def start_recording(self, path=None):
+        """Graba la sesión de percepción (frames del pipeline + eventos) para reproducirla headless"""
+        from core.frame_recording import FrameRecorder
+        if self.recorder:
+            return f"⏺️ Ya se está grabando en {self.recorder.path}"
+        cfg = self.router.vision_config.get('recording', {})
+        if path is None:
+            folder = self.base_path / cfg.get('dir', 'recordings')
+            path = folder / f"session_{time.strftime('%Y%m%d_%H%M%S')}.arec"
+        recorder = FrameRecorder(path, source=self.vision_pipeline.backend.name, **cfg.get('params', {}))
+        recorder.attach(self.vision_pipeline)
+        self.recorder = recorder
+        self._emit_event("visual_log", {"msg": f"⏺️ Grabando percepción en {path}"})
+        return f"⏺️ Grabación iniciada: {path}"
+
+    def stop_recording(self):
+        recorder, self.recorder = self.recorder, None
+        if not recorder:
+            return "No hay ninguna grabación activa."
+        recorder.close()
+        stats = recorder.get_stats()
+        msg = (f"⏹️ Grabación guardada: {recorder.path} ({stats['frames']} frames, {stats['events']} eventos, "
+               f"{stats['bytes'] / 1048576:.1f} MB, x{stats['ratio']} frente a crudo)")
+        self._emit_event("visual_log", {"msg": msg})
+        return msg
+
     def _spend_action_token(self):
         """Action Budget (Token Bucket) logic"""
         now = time.time()
@@ -1386,10 +1639,8 @@ class ArafuraOrchestrator:
         self.vision_pipeline.start()
         self.visual.start_ghost_cursor()
         
-        # Precarga concurrente
-        threading.Thread(target=self.router.load_model, args=("chat",)).start()
-        threading.Thread(target=self.router.load_model, args=("reflexion",)).start()
-        threading.Thread(target=self.router.load_model, args=("vision",)).start()
+        # Precarga + warm-up concurrente (residency: models.yaml -> residency.warm_roles)
+        self.router.residency.warm_up(self.router.residency_config.get('warm_roles', ["chat", "reflexion", "vision"]))
         
         # Iniciar Mouse Thread
         threading.Thread(target=self.run_mouse_loop, daemon=True).start()
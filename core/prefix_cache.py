@@ -0,0 +1,76 @@
+import json
+import hashlib
+import threading
+from collections import deque
+
+
+def _fingerprint(message: dict) -> str:
+    entry = {k: v for k, v in message.items() if k != "images"}
+    return hashlib.blake2b(json.dumps(entry, sort_keys=True, ensure_ascii=False).encode('utf-8'), digest_size=8).hexdigest()
+
+
+class PrefixTracker:
+    """
+    Seguimiento de prefijos de prompt estables por rol.
+    Implements:
+    - Huella por mensaje de cada petición enviada al backend
+    - Prefijo compartido con la petición anterior del mismo rol (lo que Ollama / llama.cpp
+      pueden reutilizar de su KV-cache sin re-evaluar)
+    - Time-to-first-token por rol, separado en prefijo reutilizado / prefijo nuevo
+    """
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._last = {}  # role -> [fingerprints]
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _role_stats(self, role):
+        s = self._stats.get(role)
+        if s is None:
+            s = self._stats[role] = {
+                "requests": 0, "prefix_hits": 0, "reused_chars": 0, "total_chars": 0,
+                "ttft_hit": deque(maxlen=self.window), "ttft_miss": deque(maxlen=self.window)
+            }
+        return s
+
+    def observe(self, role: str, messages: list) -> bool:
+        """Registra una petición. True si el system prompt coincide con la anterior del rol."""
+        prints = [_fingerprint(m) for m in messages]
+        with self._lock:
+            previous = self._last.get(role, [])
+            common = 0
+            for a, b in zip(previous, prints):
+                if a != b:
+                    break
+                common += 1
+            self._last[role] = prints
+
+            s = self._role_stats(role)
+            s["requests"] += 1
+            s["total_chars"] += sum(len(m.get("content") or "") for m in messages)
+            s["reused_chars"] += sum(len(m.get("content") or "") for m in messages[:common])
+            hit = common > 0
+            if hit:
+                s["prefix_hits"] += 1
+            return hit
+
+    def record_ttft(self, role: str, seconds: float, hit: bool):
+        with self._lock:
+            self._role_stats(role)["ttft_hit" if hit else "ttft_miss"].append(seconds)
+
+    def get_stats(self):
+        """Ratio de reutilización de prefijo y TTFT medio (ms) por rol"""
+        def avg_ms(values):
+            return round(sum(values) / len(values) * 1000, 1) if values else None
+
+        with self._lock:
+            out = {}
+            for role, s in self._stats.items():
+                out[role] = {
+                    "requests": s["requests"],
+                    "prefix_hits": s["prefix_hits"],
+                    "reused_ratio": round(s["reused_chars"] / s["total_chars"], 3) if s["total_chars"] else 0.0,
+                    "ttft_hit_ms": avg_ms(s["ttft_hit"]),
+                    "ttft_miss_ms": avg_ms(s["ttft_miss"]),
+                }
+            return out
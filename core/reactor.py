@@ -0,0 +1,153 @@
+import time
+import heapq
+import itertools
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class Reactor:
+    """
+    Planificador dirigido por eventos del bucle de fondo del orquestador (sustituye al sondeo de 50 ms).
+    Implements:
+    - Timers periódicos (monitor, deep thought, life moments, visión...) ordenados por vencimiento
+      en un montículo: el hilo duerme justo hasta el siguiente; el intervalo puede ser fijo o una
+      función que se evalúa en cada disparo (cadencia de inferencia adaptativa)
+    - post(evento, payload): despertar explícito desde cualquier hilo (frame nuevo, entrada del
+      usuario); los eventos repetidos antes de atenderse se fusionan y se entrega el último payload
+    - watch_frames(pipeline): hilo bloqueado en wait_for_frame que publica "frame" con su seq
+    - Sin eventos ni timers vencidos no hay despertares (CPU en reposo ~0)
+    """
+    def __init__(self, name: str = "Reactor"):
+        self.name = name
+        self._cond = threading.Condition()
+        self._pending = {}   # evento -> (payload, perf_counter del post)
+        self._handlers = {}
+        self._timers = []    # montículo (vencimiento monotonic, orden, nombre)
+        self._specs = {}     # nombre -> [intervalo, callback, vencimiento vigente]
+        self._order = itertools.count()
+        self._stop = threading.Event()
+        self._latency = deque(maxlen=512) # s entre post() y la ejecución del handler
+        self.stats = {"wakeups": 0, "events": 0, "coalesced": 0, "timers": 0, "errors": 0}
+
+    @property
+    def running(self):
+        return not self._stop.is_set()
+
+    # --- Registro ---
+
+    def on(self, event: str, handler):
+        """handler(payload) al atender el evento"""
+        self._handlers[event] = handler
+
+    def every(self, name: str, interval, callback, delay: float = None):
+        """callback(now) cada interval s (float o función sin argumentos); el primero tras delay (por defecto interval)"""
+        with self._cond:
+            self._specs[name] = [interval, callback, None]
+            self._schedule(name, self._interval(name) if delay is None else delay)
+            self._cond.notify()
+
+    def reschedule(self, name: str, delay: float = 0.0):
+        """Adelanta (o retrasa) el siguiente disparo del timer name"""
+        with self._cond:
+            if name in self._specs:
+                self._schedule(name, delay)
+                self._cond.notify()
+
+    def _interval(self, name):
+        interval = self._specs[name][0]
+        return interval() if callable(interval) else interval
+
+    def _schedule(self, name, delay):
+        due = time.monotonic() + max(0.0, delay)
+        self._specs[name][2] = due # las entradas anteriores del montículo quedan obsoletas
+        heapq.heappush(self._timers, (due, next(self._order), name))
+
+    # --- Eventos ---
+
+    def post(self, event: str, payload=None):
+        """Despierta el bucle (thread-safe). Si el evento ya estaba pendiente se fusiona."""
+        with self._cond:
+            if event in self._pending:
+                self.stats["coalesced"] += 1
+            self._pending[event] = (payload, time.perf_counter())
+            self._cond.notify()
+
+    def watch_frames(self, pipeline, event: str = "frame", timeout: float = 1.0):
+        """Publica event(seq) por cada frame nuevo del pipeline (los que lleguen en ráfaga se fusionan)"""
+        def watch():
+            seq = pipeline.frame_seq
+            while self.running:
+                new_seq, _ = pipeline.wait_for_frame(seq, timeout)
+                if new_seq is not None:
+                    seq = new_seq
+                    self.post(event, seq)
+        thread = threading.Thread(target=watch, daemon=True, name=f"{self.name}-frames")
+        thread.start()
+        return thread
+
+    # --- Bucle ---
+
+    def _next_timeout(self):
+        while self._timers and self._timers[0][0] != self._specs[self._timers[0][2]][2]:
+            heapq.heappop(self._timers) # reprogramado: entrada obsoleta
+        return None if not self._timers else self._timers[0][0] - time.monotonic()
+
+    def _call(self, fn, arg):
+        try:
+            fn(arg)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[{self.name}] Handler Error ({getattr(fn, '__name__', fn)}): {e}")
+
+    def run(self):
+        """Atiende eventos y timers hasta stop() (en el hilo que lo llama)"""
+        while self.running:
+            with self._cond:
+                while self.running and not self._pending:
+                    timeout = self._next_timeout()
+                    if timeout is not None and timeout <= 0:
+                        break
+                    self._cond.wait(timeout)
+                if not self.running:
+                    break
+                self.stats["wakeups"] += 1
+                events, self._pending = self._pending, {}
+
+            for event, (payload, posted) in events.items():
+                handler = self._handlers.get(event)
+                self.stats["events"] += 1
+                self._latency.append(time.perf_counter() - posted)
+                if handler:
+                    self._call(handler, payload)
+
+            while True:
+                with self._cond:
+                    timeout = self._next_timeout()
+                    if timeout is None or timeout > 0:
+                        break
+                    _, _, name = heapq.heappop(self._timers)
+                    callback = self._specs[name][1]
+                    self._specs[name][2] = None
+                self.stats["timers"] += 1
+                self._call(callback, time.time())
+                with self._cond:
+                    if self._specs[name][2] is None: # el callback no lo reprogramó
+                        self._schedule(name, self._interval(name))
+
+    def stop(self):
+        with self._cond:
+            self._stop.set()
+            self._cond.notify_all()
+
+    def get_stats(self):
+        lat = np.array(self._latency) * 1000 if self._latency else np.zeros(1)
+        now = time.monotonic()
+        with self._cond:
+            timers = {name: round(spec[2] - now, 3) for name, spec in self._specs.items() if spec[2] is not None}
+        return {
+            **self.stats,
+            "event_latency_ms": {"p50": round(float(np.percentile(lat, 50)), 3), "max": round(float(lat.max()), 3)},
+            "next_timers_s": timers,
+        }
@@ -0,0 +1,255 @@
+import time
+import threading
+from pathlib import Path
+
+from core.http_pool import get_shared_pool
+from core.scheduler import PRIORITY_BACKGROUND
+
+# Estados de residencia de un rol
+STATE_UNLOADED = "unloaded"
+STATE_LOADING = "loading"
+STATE_WARMING = "warming"
+STATE_READY = "ready"
+STATE_EVICTED = "evicted"
+STATE_FAILED = "failed"
+
+
+class _RoleResidency:
+    def __init__(self, role: str):
+        self.role = role
+        self.state = STATE_UNLOADED
+        self.model = None
+        self.load_time = None  # s: resolución + instanciación (load_model)
+        self.warm_time = None  # s: primera respuesta (carga real del modelo en Ollama / llama.cpp)
+        self.last_used = 0.0
+        self.uses = 0
+        self.error = None
+
+
+class ResidencyManager:
+    """
+    Residencia de modelos del router.
+    Implements:
+    - Warm-up de roles al arranque (load_model + prompt mínimo de 1 token) en paralelo
+    - Roles fijados (pinned): keep_alive=-1, nunca se expulsan
+    - Presupuesto de memoria: con /api/ps se expulsan los modelos fríos (LRU) con keep_alive=0;
+      los GGUF locales se liberan cerrando su worker
+    - Estado y tiempos de carga por rol (get_active_models(detailed=True))
+    """
+    def __init__(self, router, pinned=None, memory_budget_mb: float = 0, check_interval: float = 30.0,
+                 warm_prompt: str = "ok", http_pool=None):
+        self.router = router
+        self.pinned = set(pinned or [])
+        self.memory_budget_mb = memory_budget_mb
+        self.check_interval = check_interval
+        self.warm_prompt = warm_prompt
+        self.http = http_pool or get_shared_pool()
+        self._roles = {}
+        self._lock = threading.Lock()
+        self._monitor = None
+        self.last_ps = [] # último snapshot de /api/ps
+        self.evictions = 0
+
+    def _entry(self, role):
+        with self._lock:
+            entry = self._roles.get(role)
+            if entry is None:
+                entry = self._roles[role] = _RoleResidency(role)
+            return entry
+
+    def keep_alive_for(self, role: str, default=None):
+        """keep_alive de Ollama para un rol: -1 (indefinido) si está fijado"""
+        if role in self.pinned:
+            return -1
+        return default
+
+    # --- Warm-up ---
+
+    def warm_up(self, roles, wait: bool = False):
+        """Carga y calienta los roles en paralelo. Devuelve los hilos (join opcional)."""
+        threads = [
+            threading.Thread(target=self._warm_role, args=(role,), daemon=True, name=f"Warmup-{role}")
+            for role in roles
+        ]
+        for t in threads:
+            t.start()
+        if wait:
+            for t in threads:
+                t.join()
+        if self.memory_budget_mb and self._monitor is None:
+            self._monitor = threading.Thread(target=self._monitor_loop, daemon=True, name="ResidencyMonitor")
+            self._monitor.start()
+        return threads
+
+    def _warm_role(self, role):
+        entry = self._entry(role)
+        entry.state = STATE_LOADING
+        t0 = time.perf_counter()
+        try:
+            llm = self.router.load_model(role)
+        except Exception as e:
+            llm, entry.error = None, str(e)
+        entry.load_time = time.perf_counter() - t0
+        if llm is None:
+            entry.state = STATE_FAILED
+            print(f"[Residency] {role}: no model")
+            return
+        entry.model = self.router._model_id(llm)
+
+        # Prompt mínimo: fuerza la carga del modelo en memoria antes del primer turno real
+        entry.state = STATE_WARMING
+        t0 = time.perf_counter()
+        try:
+            with self.router.scheduler.slot(self.router.scheduler.backend_of(llm), PRIORITY_BACKGROUND):
+                res = llm.create_chat_completion(
+                    messages=[{"role": "user", "content": self.warm_prompt}], temperature=0.0, max_tokens=1
+                )
+            content = res['choices'][0]['message']['content']
+            if content.startswith(("Error Ollama", "Error Gemini")):
+                raise RuntimeError(content)
+            entry.warm_time = time.perf_counter() - t0
+            entry.state = STATE_READY
+            print(f"[Residency] {role} ready ({entry.model}) load={entry.load_time:.2f}s warm={entry.warm_time:.2f}s")
+        except Exception as e:
+            entry.error = str(e)
+            entry.state = STATE_FAILED
+            print(f"[Residency] {role} warm-up failed: {e}")
+        self.enforce_budget()
+
+    # --- Uso ---
+
+    def touch(self, role: str):
+        """Marca el rol como usado (LRU). Un rol expulsado vuelve a 'ready' al recargarse."""
+        entry = self._entry(role)
+        entry.last_used = time.time()
+        entry.uses += 1
+        if entry.state in (STATE_UNLOADED, STATE_EVICTED):
+            entry.state = STATE_READY
+            llm = self.router.loaded_models.get(role)
+            if llm is not None:
+                entry.model = self.router._model_id(llm)
+
+    # --- Presupuesto de memoria ---
+
+    def _ollama_ps(self):
+        data = self.http.request_json(f"{self.router.catalog.ollama_host}/api/ps", timeout=2, idempotent=True)
+        return data.get('models', [])
+
+    def _local_sizes(self):
+        """Modelos GGUF cargados: tamaño aproximado = tamaño del fichero"""
+        sizes = {}
+        for role, llm in list(self.router.loaded_models.items()):
+            path = getattr(llm, 'model_path', None)
+            if path and hasattr(llm, 'close'):
+                try:
+                    sizes[Path(path).name] = Path(path).stat().st_size
+                except OSError:
+                    pass
+        return sizes
+
+    def _roles_of(self, model_id):
+        return [r for r, llm in list(self.router.loaded_models.items()) if self.router._model_id(llm) == model_id]
+
+    def enforce_budget(self):
+        """Expulsa modelos no fijados, del menos usado al más usado, hasta cumplir el presupuesto"""
+        if not self.memory_budget_mb:
+            return []
+        resident = {}
+        try:
+            self.last_ps = self._ollama_ps()
+            for m in self.last_ps:
+                resident[m['name']] = ("ollama", m.get('size', 0))
+        except Exception:
+            self.last_ps = [] # Ollama offline: sólo cuentan los GGUF
+        for name, size in self._local_sizes().items():
+            resident[name] = ("gguf", size)
+
+        budget = self.memory_budget_mb * 1024 * 1024
+        total = sum(size for _, size in resident.values())
+        if total <= budget:
+            return []
+
+        def last_used(model_id):
+            return max((self._entry(r).last_used for r in self._roles_of(model_id)), default=0.0)
+
+        candidates = [
+            m for m in resident
+            if not any(r in self.pinned for r in self._roles_of(m))
+        ]
+        candidates.sort(key=last_used)
+
+        evicted = []
+        for model_id in candidates:
+            if total <= budget:
+                break
+            kind, size = resident[model_id]
+            if self._evict(model_id, kind):
+                total -= size
+                evicted.append(model_id)
+        return evicted
+
+    def _evict(self, model_id, kind) -> bool:
+        roles = self._roles_of(model_id)
+        try:
+            if kind == "ollama":
+                # keep_alive=0 descarga el modelo de inmediato; el wrapper se conserva y Ollama
+                # lo recargará en la siguiente petición
+                self.http.request_json(
+                    f"{self.router.catalog.ollama_host}/api/generate",
+                    {"model": model_id, "keep_alive": 0}, timeout=10
+                )
+            else:
+                with self.router._lock:
+                    worker = None
+                    for r in roles:
+                        worker = self.router.loaded_models.pop(r, None) or worker
+                    for key, inst in list(self.router._model_cache.items()):
+                        if inst is worker:
+                            del self.router._model_cache[key]
+                if worker is not None:
+                    worker.close()
+        except Exception as e:
+            print(f"[Residency] Evict {model_id} failed: {e}")
+            return False
+
+        for r in roles:
+            self._entry(r).state = STATE_EVICTED
+        self.evictions += 1
+        print(f"[Residency] Evicted {model_id} (roles: {', '.join(roles) or '-'})")
+        return True
+
+    def _monitor_loop(self):
+        while True:
+            time.sleep(self.check_interval)
+            try:
+                self.enforce_budget()
+            except Exception as e:
+                print(f"[Residency] Monitor error: {e}")
+
+    # --- Estado ---
+
+    def describe(self):
+        # Roles cargados fuera del warm-up (load_model directo) también se listan
+        for role, llm in list(self.router.loaded_models.items()):
+            entry = self._entry(role)
+            if entry.state == STATE_UNLOADED:
+                entry.state, entry.model = STATE_READY, self.router._model_id(llm)
+
+        resident = {m.get('name'): m for m in self.last_ps}
+        out = {}
+        with self._lock:
+            entries = list(self._roles.values())
+        for e in entries:
+            info = resident.get(e.model)
+            out[e.role] = {
+                "model": e.model,
+                "state": e.state,
+                "pinned": e.role in self.pinned,
+                "load_time": round(e.load_time, 3) if e.load_time is not None else None,
+                "warm_time": round(e.warm_time, 3) if e.warm_time is not None else None,
+                "last_used": e.last_used or None,
+                "uses": e.uses,
+                "size_mb": round(info.get('size', 0) / 1048576, 1) if info else None,
+                "error": e.error,
+            }
+        return out
@@ -0,0 +1,160 @@
+import time
+import json
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Respuestas que nunca se cachean (errores de backend / router)
+_ERROR_PREFIXES = ("[Router Error]", "Error Ollama", "Error Gemini", "[SYSTEM ERROR]", "Error:", "[Stream Error")
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class _Flight:
+    """Petición en curso compartida por llamadas duplicadas (single-flight)."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ResponseCache:
+    """
+    Cache direccionada por contenido para ModelRouter.route_request.
+    Implements:
+    - Clave = hash(rol, modelo, mensajes, system prompt, hashes de imágenes, parámetros)
+    - Expulsión LRU + TTL
+    - Coalescing single-flight de duplicados en vuelo (threads y asyncio)
+    """
+    def __init__(self, max_entries: int = 256, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict() # key -> (expires_at, value)
+        self._flights = {}            # key -> _Flight
+        self._aflights = {}           # (loop, key) -> asyncio.Future
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expired": 0}
+
+    @staticmethod
+    def make_key(role: str, model: str, messages: list, **params) -> str:
+        """Las imágenes (b64) se sustituyen por su hash para no serializar megas en la clave."""
+        norm = []
+        for m in messages:
+            entry = {k: v for k, v in m.items() if k != "images"}
+            if m.get("images"):
+                entry["images"] = [_digest(img.encode('utf-8')) for img in m["images"]]
+            norm.append(entry)
+        blob = json.dumps([role, model, norm, params], sort_keys=True, ensure_ascii=False)
+        return _digest(blob.encode('utf-8'))
+
+    @staticmethod
+    def is_cacheable(value) -> bool:
+        return isinstance(value, str) and bool(value.strip()) and not value.startswith(_ERROR_PREFIXES)
+
+    def get(self, key):
+        """Devuelve (hit, value)."""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return False, None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.stats["expired"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return True, value
+
+    def put(self, key, value, ttl: float = None):
+        if not self.is_cacheable(value):
+            return
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def get_or_compute(self, key, compute, ttl: float = None):
+        """Cache hit -> valor. Si ya hay una petición idéntica en vuelo, espera su resultado."""
+        hit, value = self.get(key)
+        if hit:
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+            self.put(key, flight.result, ttl)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    async def aget_or_compute(self, key, compute_coro, ttl: float = None):
+        """Variante asyncio: los duplicados en el mismo loop esperan el mismo Future."""
+        hit, value = self.get(key)
+        if hit:
+            return value
+
+        loop = asyncio.get_running_loop()
+        fkey = (id(loop), key)
+        fut = self._aflights.get(fkey)
+        if fut is not None:
+            with self._lock:
+                self.stats["coalesced"] += 1
+            return await asyncio.shield(fut)
+
+        with self._lock:
+            self.stats["misses"] += 1
+        fut = self._aflights[fkey] = loop.create_future()
+        try:
+            result = await compute_coro()
+            self.put(key, result, ttl)
+            fut.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception() # evita "exception was never retrieved" si no hay seguidores
+            raise
+        finally:
+            self._aflights.pop(fkey, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            s = dict(self.stats)
+            s["entries"] = len(self._entries)
+        total = s["hits"] + s["misses"] + s["coalesced"]
+        s["hit_ratio"] = round((s["hits"] + s["coalesced"]) / total, 3) if total else 0.0
+        return s
@@ -1,100 +1,190 @@
 import yaml
 import json
-import urllib.request
+import time
+import asyncio
 import threading
 from pathlib import Path
 import os
 
+from core.http_pool import get_shared_pool, configure_shared_pool
+from core.model_catalog import ModelCatalog
+from core.async_http import get_async_client
+from core.response_cache import ResponseCache
+from core.prefix_cache import PrefixTracker
+from core.cancellation import GenerationCancelled
+from core.local_worker import LocalInferenceWorker, default_threads
+from core.residency import ResidencyManager
+from core.scheduler import InferenceScheduler, PRIORITY_INTERACTIVE
+
 try:
     from llama_cpp import Llama
 except ImportError:
     Llama = None
 
 class OllamaWrapper:
-    def __init__(self, model_name: str, host: str = "http://localhost:11434"):
+    def __init__(self, model_name: str, host: str = "http://localhost:11434", http_pool=None, num_ctx: int = None, keep_alive=None):
         self.model_name = model_name
         self.host = host
         self.api_url = f"{host}/api/chat"
+        self.http = http_pool or get_shared_pool() # Keep-alive compartido
+        # num_ctx estable: si cambia entre peticiones Ollama recarga el modelo y pierde el KV-cache
+        self.num_ctx = num_ctx
+        self.keep_alive = keep_alive # mantiene el modelo (y su prefijo evaluado) residente
         # Monkey-patch para que el código existente crea que es un objeto Llama
         self.verbose = False 
 
-    def create_chat_completion(self, messages, temperature=0.7, max_tokens=1024, **kwargs):
-        """Simula la firma de llama_cpp.create_chat_completion"""
-        
+    def _build_payload(self, messages, temperature, max_tokens, stream):
         payload = {
             "model": self.model_name,
             "messages": messages,
-            "stream": False,
+            "stream": stream,
             "options": {
                 "temperature": temperature,
                 "num_predict": max_tokens
             }
         }
+        if self.num_ctx:
+            payload["options"]["num_ctx"] = self.num_ctx
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def create_chat_completion(self, messages, temperature=0.7, max_tokens=1024, cancel_event=None, **kwargs):
+        """Simula la firma de llama_cpp.create_chat_completion"""
+        payload = self._build_payload(messages, temperature, max_tokens, stream=False)
         
         try:
-            req = urllib.request.Request(
-                self.api_url, 
-                data=json.dumps(payload).encode('utf-8'),
-                headers={'Content-Type': 'application/json'}
-            )
-            with urllib.request.urlopen(req) as response:
-                result = json.loads(response.read().decode('utf-8'))
-                
+            result = self.http.request_json(self.api_url, payload, timeout=self.http.generation_timeout, cancel=cancel_event)
             content = result.get('message', {}).get('content', '')
             return {'choices': [{'message': {'content': content}}]}
+        except GenerationCancelled:
+            raise
         except Exception as e:
             return {'choices': [{'message': {'content': f"Error Ollama: {str(e)}"}}]}
 
-    def stream_chat_completion(self, messages, temperature=0.7, max_tokens=1024, **kwargs):
+    def stream_chat_completion(self, messages, temperature=0.7, max_tokens=1024, cancel_event=None, **kwargs):
         """Generador para streaming de tokens desde Ollama"""
-        payload = {
-            "model": self.model_name,
-            "messages": messages,
-            "stream": True,
-            "options": {
-                "temperature": temperature,
-                "num_predict": max_tokens
-            }
-        }
+        payload = self._build_payload(messages, temperature, max_tokens, stream=True)
         
         try:
-            req = urllib.request.Request(
-                self.api_url, 
-                data=json.dumps(payload).encode('utf-8'),
-                headers={'Content-Type': 'application/json'}
-            )
-            with urllib.request.urlopen(req) as response:
+            with self.http.stream(
+                "POST", self.api_url,
+                body=json.dumps(payload).encode('utf-8'),
+                headers={'Content-Type': 'application/json'},
+                timeout=self.http.generation_timeout,
+                cancel=cancel_event
+            ) as response:
                 for line in response:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return # la conexión a medio leer se descarta (Ollama aborta la generación)
                     if line:
                         chunk = json.loads(line.decode('utf-8'))
                         content = chunk.get('message', {}).get('content', '')
                         if content:
                             yield content
         except Exception as e:
+            if cancel_event is not None and cancel_event.is_set():
+                return # socket cortado por la cancelación: fin silencioso
+            yield f"[Stream Error: {e}]"
+
+    async def acreate_chat_completion(self, messages, temperature=0.7, max_tokens=1024, cancel_event=None, **kwargs):
+        """Versión asyncio de create_chat_completion (sin hilos)"""
+        payload = self._build_payload(messages, temperature, max_tokens, stream=False)
+
+        try:
+            result = await get_async_client().request_json(self.api_url, payload, timeout=self.http.generation_timeout, cancel=cancel_event)
+            content = result.get('message', {}).get('content', '')
+            return {'choices': [{'message': {'content': content}}]}
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            return {'choices': [{'message': {'content': f"Error Ollama: {str(e)}"}}]}
+
+    async def astream_chat_completion(self, messages, temperature=0.7, max_tokens=1024, cancel_event=None, **kwargs):
+        """Generador asíncrono de tokens desde Ollama"""
+        payload = self._build_payload(messages, temperature, max_tokens, stream=True)
+
+        try:
+            async with get_async_client().stream(
+                "POST", self.api_url,
+                body=json.dumps(payload).encode('utf-8'),
+                headers={'Content-Type': 'application/json'},
+                timeout=self.http.generation_timeout,
+                cancel=cancel_event
+            ) as response:
+                async for line in response.aiter_lines():
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    if line.strip():
+                        chunk = json.loads(line.decode('utf-8'))
+                        content = chunk.get('message', {}).get('content', '')
+                        if content:
+                            yield content
+        except Exception as e:
+            if cancel_event is not None and cancel_event.is_set():
+                return # socket cortado por la cancelación: fin silencioso
             yield f"[Stream Error: {e}]"
 
+# Base REST de Gemini (sobrescribible para proxies o un servidor SSE local de pruebas)
+GEMINI_API_BASE = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+
+
+class _SSEParser:
+    """Parser incremental de Server-Sent Events: línea a línea -> payload de cada evento 'data:'."""
+    def __init__(self):
+        self._data = []
+
+    def feed(self, line: bytes):
+        """Devuelve el payload de un evento completo (línea en blanco) o None."""
+        line = line.rstrip(b"\r\n")
+        if not line:
+            return self.flush()
+        if line.startswith(b":"):
+            return None # comentario / keep-alive
+        field, _, value = line.partition(b":")
+        if value.startswith(b" "):
+            value = value[1:]
+        if field == b"data":
+            self._data.append(value)
+        return None
+
+    def flush(self):
+        if not self._data:
+            return None
+        data, self._data = b"\n".join(self._data), []
+        return data
+
+
 class GeminiWrapper:
-    def __init__(self, model_name: str, api_key: str):
+    def __init__(self, model_name: str, api_key: str, http_pool=None, api_base: str = None):
         self.model_name = model_name
         self.api_key = api_key
-        self.api_url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent?key={api_key}"
+        self.http = http_pool or get_shared_pool()
+        base = (api_base or GEMINI_API_BASE).rstrip("/")
+        self.api_url = f"{base}/models/{model_name}:generateContent?key={api_key}"
+        self.stream_url = f"{base}/models/{model_name}:streamGenerateContent?alt=sse&key={api_key}"
 
-    def create_chat_completion(self, messages, temperature=0.0, max_tokens=1024, **kwargs):
-        """Streaming-less implementation for Gemini via REST API"""
-        
+    def _build_payload(self, messages, temperature, max_tokens, **kwargs):
         # Convert OpenAI-like messages to Gemini format
         contents = []
         system_instruction = None
+        pending_context = [] # system intermedios (context_prompt / RAG) -> se anteponen al siguiente turno de usuario
         
-        for m in messages:
+        for i, m in enumerate(messages):
             role = m['role']
             content = m['content']
             
             if role == 'system':
-                system_instruction = {"role": "user", "parts": [{"text": content}]} # Gemini often treats system as first user msg or separate field
+                if i == 0:
+                    system_instruction = content
+                else:
+                    pending_context.append(content)
                 continue
                 
             parts = [{"text": content}]
+            if pending_context and role != 'assistant':
+                parts.insert(0, {"text": "\n\n".join(pending_context)})
+                pending_context = []
             
             # Handle Images (base64)
             if 'images' in m:
@@ -109,6 +199,9 @@ class GeminiWrapper:
             gemini_role = "model" if role == "assistant" else "user"
             contents.append({"role": gemini_role, "parts": parts})
 
+        if pending_context:
+            contents.append({"role": "user", "parts": [{"text": "\n\n".join(pending_context)}]})
+
         # Payload construction
         payload = {
             "contents": contents,
@@ -124,34 +217,32 @@ class GeminiWrapper:
         
         # System Instruction for Gemini 1.5
         if system_instruction:
-             # Older API versions might simple prepend to contents, 
-             # but 1.5 supports system_instruction field.
-             # For safety/compatibility with standard REST, prepending to contents[0] is often safer 
-             # if we don't know exact version, but 'system_instruction' field is cleaner.
-             # Let's try prepending text to first user message context if possible, 
-             # OR use the proper field. Let's use the field.
-             payload["system_instruction"] = {"parts": [{"text": messages[0]['content']}]} if messages[0]['role'] == 'system' else None
+             payload["system_instruction"] = {"parts": [{"text": system_instruction}]}
+        return payload
 
+    @staticmethod
+    def _candidate_text(result) -> str:
+        """Texto del primer candidato (respuesta completa o fragmento SSE)"""
+        if "error" in result:
+            raise RuntimeError(result["error"].get("message", result["error"]))
         try:
-            req = urllib.request.Request(
-                self.api_url, 
-                data=json.dumps(payload).encode('utf-8'),
-                headers={'Content-Type': 'application/json'}
-            )
-            with urllib.request.urlopen(req) as response:
-                result = json.loads(response.read().decode('utf-8'))
-                
-            # Extract content
-            try:
-                text_content = result['candidates'][0]['content']['parts'][0]['text']
-            except (KeyError, IndexError):
-                text_content = ""
-                
-            return {
-                'choices': [
-                    {'message': {'content': text_content}}
-                ]
-            }
+            parts = result['candidates'][0]['content']['parts']
+        except (KeyError, IndexError):
+            return ""
+        return "".join(p.get('text', '') for p in parts)
+
+    def _parse_result(self, result):
+        return {'choices': [{'message': {'content': self._candidate_text(result)}}]}
+
+    def create_chat_completion(self, messages, temperature=0.0, max_tokens=1024, cancel_event=None, **kwargs):
+        """Streaming-less implementation for Gemini via REST API"""
+        payload = self._build_payload(messages, temperature, max_tokens, **kwargs)
+
+        try:
+            result = self.http.request_json(self.api_url, payload, timeout=self.http.generation_timeout, cancel=cancel_event)
+            return self._parse_result(result)
+        except GenerationCancelled:
+            raise
         except Exception as e:
             return {
                 'choices': [
@@ -159,6 +250,83 @@ class GeminiWrapper:
                 ]
             }
 
+    async def acreate_chat_completion(self, messages, temperature=0.0, max_tokens=1024, cancel_event=None, **kwargs):
+        """Versión asyncio de create_chat_completion"""
+        payload = self._build_payload(messages, temperature, max_tokens, **kwargs)
+
+        try:
+            result = await get_async_client().request_json(self.api_url, payload, timeout=self.http.generation_timeout, cancel=cancel_event)
+            return self._parse_result(result)
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            return {'choices': [{'message': {'content': f"Error Gemini: {str(e)}"}}]}
+
+    def stream_chat_completion(self, messages, temperature=0.0, max_tokens=1024, cancel_event=None, **kwargs):
+        """
+        Generador de tokens vía streamGenerateContent (SSE), mismo contrato que OllamaWrapper.
+        Si cancel_event se activa, se corta la lectura y la conexión se descarta.
+        """
+        payload = self._build_payload(messages, temperature, max_tokens, **kwargs)
+        parser = _SSEParser()
+
+        try:
+            with self.http.stream(
+                "POST", self.stream_url,
+                body=json.dumps(payload).encode('utf-8'),
+                headers={'Content-Type': 'application/json', 'Accept': 'text/event-stream'},
+                timeout=self.http.generation_timeout,
+                cancel=cancel_event
+            ) as response:
+                for line in response:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    data = parser.feed(line)
+                    if data:
+                        text = self._candidate_text(json.loads(data.decode('utf-8')))
+                        if text:
+                            yield text
+                data = parser.flush()
+                if data:
+                    text = self._candidate_text(json.loads(data.decode('utf-8')))
+                    if text:
+                        yield text
+        except Exception as e:
+            if cancel_event is not None and cancel_event.is_set():
+                return # socket cortado por la cancelación: fin silencioso
+            yield f"[Stream Error: {e}]"
+
+    async def astream_chat_completion(self, messages, temperature=0.0, max_tokens=1024, cancel_event=None, **kwargs):
+        """Generador asíncrono de tokens vía streamGenerateContent (SSE)"""
+        payload = self._build_payload(messages, temperature, max_tokens, **kwargs)
+        parser = _SSEParser()
+
+        try:
+            async with get_async_client().stream(
+                "POST", self.stream_url,
+                body=json.dumps(payload).encode('utf-8'),
+                headers={'Content-Type': 'application/json', 'Accept': 'text/event-stream'},
+                timeout=self.http.generation_timeout,
+                cancel=cancel_event
+            ) as response:
+                async for line in response.aiter_lines():
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    data = parser.feed(line)
+                    if data:
+                        text = self._candidate_text(json.loads(data.decode('utf-8')))
+                        if text:
+                            yield text
+                data = parser.flush()
+                if data:
+                    text = self._candidate_text(json.loads(data.decode('utf-8')))
+                    if text:
+                        yield text
+        except Exception as e:
+            if cancel_event is not None and cancel_event.is_set():
+                return # socket cortado por la cancelación: fin silencioso
+            yield f"[Stream Error: {e}]"
+
 class ModelRouter:
     def __init__(self, base_path: Path):
         self.base_path = base_path
@@ -168,8 +336,40 @@ class ModelRouter:
         self._model_cache = {}  # absolute_path -> Instance
         self.roles_config = {}
         self._lock = threading.Lock() # Thread safety
-        
+        self.catalog_config = {}
+        self.cache_config = {}
+        self.scheduler_config = {}
+        self.prefix_config = {}
+        self.residency_config = {}
+        self.vision_config = {}
+
         self._load_config()
+        # Catálogo de modelos (tags de Ollama + GGUF) cacheado con TTL
+        self.catalog = ModelCatalog(
+            self.models_dir,
+            ollama_host=self.catalog_config.get('ollama_host', "http://localhost:11434"),
+            ttl=self.catalog_config.get('ttl', 60)
+        )
+        # Cache de respuestas (LRU + TTL + single-flight)
+        self.response_cache = ResponseCache(
+            max_entries=self.cache_config.get('max_entries', 256),
+            ttl=self.cache_config.get('ttl', 30)
+        )
+        # Árbitro de inferencia (prioridades + límites por backend)
+        self.scheduler = InferenceScheduler(
+            limits=self.scheduler_config.get('limits'),
+            background_grace=self.scheduler_config.get('background_grace', 2.0)
+        )
+        # Prefijos estables por rol + TTFT
+        self.prefixes = PrefixTracker(window=self.prefix_config.get('ttft_window', 200))
+        # Warm-up, roles fijados y expulsión bajo presupuesto de memoria
+        self.residency = ResidencyManager(
+            self,
+            pinned=self.residency_config.get('pinned'),
+            memory_budget_mb=self.residency_config.get('memory_budget_mb', 0),
+            check_interval=self.residency_config.get('check_interval', 30),
+            warm_prompt=self.residency_config.get('warm_prompt', "ok")
+        )
 
     def _load_config(self):
         if self.config_path.exists():
@@ -179,120 +379,109 @@ class ModelRouter:
                 m_dir = data.get('paths', {}).get('models_dir')
                 if m_dir:
                     self.models_dir = self.base_path / m_dir
+                # Keep-alive pool compartido (pool_size por host, timeout, retries, backoff)
+                configure_shared_pool(**data.get('http', {}))
+                self.catalog_config = data.get('catalog', {})
+                self.cache_config = data.get('cache', {})
+                self.scheduler_config = data.get('scheduler', {})
+                self.prefix_config = data.get('prefix_cache', {})
+                self.residency_config = data.get('residency', {})
+                self.vision_config = data.get('vision', {})
 
     def load_model(self, role: str):
+        if role in self.loaded_models:
+            return self.loaded_models[role]
+
+        if role not in self.roles_config:
+            return None
+
+        # Descubrimiento fuera del lock: las precargas concurrentes comparten una sola ronda del catálogo
+        config = self.roles_config[role]
+        candidates = self.catalog.candidates(config)
+
         with self._lock:
             if role in self.loaded_models:
                 return self.loaded_models[role]
-                
-            if role not in self.roles_config:
-                return None
-                
-            config = self.roles_config[role]
-            source_pref = config.get('source', 'local')
-            match_patterns = config.get('model_match', '')
-            
-            if isinstance(match_patterns, str):
-                match_patterns = [match_patterns]
-            
-            for match_pattern in match_patterns:
-                # --- 1. TRY OLLAMA (if preferred or as fallback) ---
-                if source_pref == 'ollama' or True: # Try ollama regardless if it's in the list
-                    try:
-                        # Rapid check for Ollama availability
-                        with urllib.request.urlopen("http://localhost:11434/api/tags", timeout=1) as r:
-                             if r.status == 200:
-                                 # Check if model exists (exact match or prefix)
-                                 tags = json.loads(r.read().decode('utf-8')).get('models', [])
-                                 found = False
-                                 for m in tags:
-                                     m_name = m['name']
-                                     # Match "model" with "model:latest" or "model:7b" OR partial match
-                                     if m_name == match_pattern or m_name.startswith(match_pattern + ":") or match_pattern in m_name:
-                                         print(f"[Router] Encontrado en Ollama: {m_name}")
-                                         wrapper = OllamaWrapper(model_name=m_name)
-                                         self.loaded_models[role] = wrapper
-                                         return wrapper
-                    except:
-                        pass # Ollama offline or model not there
-
-                # --- 2. TRY LOCAL GGUF ---
-                if source_pref == 'local' or True:
-                    found_path = None
-                    if self.models_dir.exists():
-                        candidates = list(self.models_dir.glob("*.gguf"))
-                        for c in candidates:
-                            if match_pattern.lower() in c.name.lower():
-                                found_path = c.resolve()
-                                break
-                    
-                    if found_path:
-                        if str(found_path) in self._model_cache:
-                            instance = self._model_cache[str(found_path)]
-                            self.loaded_models[role] = instance
-                            return instance
-                        if Llama:
-                            print(f"[Router] Cargando GGUF: {found_path.name}...")
-                            try:
-                                llm = Llama(
-                                    model_path=str(found_path),
-                                    n_ctx=config.get('params', {}).get('n_ctx', 2048),
-                                    n_threads=4,
-                                    verbose=False
-                                )
-                                self._model_cache[str(found_path)] = llm
-                                self.loaded_models[role] = llm
-                                return llm
-                            except:
-                                pass
-
-                # --- 3. TRY GOOGLE API ---
-                if source_pref == 'google_api':
+
+            for source, ident in candidates:
+                # --- 1. OLLAMA ---
+                if source == "ollama":
+                    print(f"[Router] Encontrado en Ollama: {ident}")
+                    params = config.get('params', {})
+                    # Un wrapper por modelo: los roles que lo comparten usan el mismo num_ctx (el mayor)
+                    wrapper = self._model_cache.get(f"ollama:{ident}")
+                    if wrapper is None:
+                        wrapper = OllamaWrapper(model_name=ident, host=self.catalog.ollama_host)
+                        self._model_cache[f"ollama:{ident}"] = wrapper
+                    # Un rol fijado deja el modelo residente indefinidamente (keep_alive=-1)
+                    keep_alive = self.residency.keep_alive_for(role, params.get('keep_alive', self.prefix_config.get('keep_alive')))
+                    if keep_alive == -1 or wrapper.keep_alive is None:
+                        wrapper.keep_alive = keep_alive
+                    if params.get('n_ctx'):
+                        wrapper.num_ctx = max(wrapper.num_ctx or 0, params['n_ctx'])
+                    self.loaded_models[role] = wrapper
+                    return wrapper
+
+                # --- 2. LOCAL GGUF ---
+                if source == "gguf":
+                    if str(ident) in self._model_cache:
+                        instance = self._model_cache[str(ident)]
+                        self.loaded_models[role] = instance
+                        return instance
+                    if Llama:
+                        print(f"[Router] Cargando GGUF: {ident.name}...")
+                        params = config.get('params', {})
+                        try:
+                            llm = Llama(
+                                model_path=str(ident),
+                                n_ctx=params.get('n_ctx', 2048),
+                                n_threads=params.get('n_threads') or default_threads(),
+                                verbose=False
+                            )
+                            # El worker es el único dueño de la instancia (cola + micro-batching)
+                            worker = LocalInferenceWorker(
+                                llm,
+                                batch_window=params.get('batch_window', 0.005),
+                                max_batch=params.get('max_batch', 8)
+                            )
+                            self._model_cache[str(ident)] = worker
+                            self.loaded_models[role] = worker
+                            return worker
+                        except:
+                            pass
+
+                # --- 3. GOOGLE API ---
+                if source == "google_api":
                     api_key = os.environ.get("GEMINI_API_KEY")
                     if api_key:
-                        wrapper = GeminiWrapper(model_name=match_pattern, api_key=api_key)
+                        wrapper = GeminiWrapper(model_name=ident, api_key=api_key)
                         self.loaded_models[role] = wrapper
                         return wrapper
 
             print(f"[Router] CRITICAL: No model found for role '{role}' in any source.")
             return None
 
-    def route_request(self, task_type: str, prompt: str, system_prompt: str = None, context_messages: list = None, images: list = None):
-        # 1. Determinar Rol
-        selected_role = "chat"
-        
+    def _select_role(self, task_type: str) -> str:
+        """Determina el rol a partir del tipo de tarea"""
         if task_type in ["thought", "reflexion"]:
-            selected_role = "reflexion"
-        elif task_type in ["visual", "visual_perception", "image_analysis", "visual_chat"]:
-            selected_role = "vision"
-        elif task_type in ["logic", "code", "analysis", "complex_logic"]:
-            selected_role = "deep_thought"
-            
-        # 2. Obtener modelo 
-        llm = self.load_model(selected_role)
-        
-        # Fallback a chat
-        if not llm and selected_role != "chat":
-            print(f"[Router] Warn: Role {selected_role} not loaded. Fallback chat.")
-            # Critical: If Vision failed, DO NOT fallback silently. Mistral will hallucinate.
-            if selected_role == "vision":
-                return "[SYSTEM ERROR] Vision Model (llava) not available. Please run `ollama pull llava`."
-            
-            llm = self.load_model("chat")
-            
-        if not llm:
-            return "Error: No hay modelos disponibles."
+            return "reflexion"
+        if task_type in ["visual", "visual_perception", "image_analysis", "visual_chat"]:
+            return "vision"
+        if task_type in ["logic", "code", "analysis", "complex_logic"]:
+            return "deep_thought"
+        return "chat"
 
-        # 3. Generar
-        role_params = self.roles_config.get(selected_role, {}).get('params', {})
-        temp = role_params.get('temperature', 0.7)
-        # Algunos modelos (GGUF local) usan max_tokens, Ollama usa num_predict o options
-        
-        # 3. Generar
-        role_params = self.roles_config.get(selected_role, {}).get('params', {})
-        temp = role_params.get('temperature', 0.7)
-        
+    def _build_messages(self, selected_role: str, prompt: str, system_prompt: str = None, context_messages: list = None, images: list = None, context_prompt: str = None):
+        """
+        system_prompt debe ser estable entre turnos (identidad): forma el prefijo que el backend
+        reutiliza del KV-cache. Lo que cambia cada turno (RAG) va en context_prompt, justo antes
+        del mensaje del usuario.
+        """
         msgs = []
+
+        if context_prompt and selected_role == "vision":
+            system_prompt = f"{system_prompt}\n{context_prompt}" if system_prompt else context_prompt
+            context_prompt = None
         
         # Handling System Prompt
         # LLaVA (Ollama) often ignores 'system' role or handles it poorly. 
@@ -303,6 +492,9 @@ class ModelRouter:
         if context_messages:
             # Copy to avoid mutation issues
             msgs.extend([dict(m) for m in context_messages])
+
+            if context_prompt:
+                msgs.append({"role": "system", "content": context_prompt})
             
             if prompt:
                 msgs.append({"role": "user", "content": prompt})
@@ -332,72 +524,200 @@ class ModelRouter:
             
             if images and selected_role == "vision":
                 msg["images"] = images
+            if context_prompt:
+                msgs.append({"role": "system", "content": context_prompt})
             msgs.append(msg)
-        
-        try:
-            # Force JSON mode for specific task types if using a model that supports it
-            # 'visual' enforces JSON (for Autonomy). 'visual_chat' allows free text (for Cortex).
-            json_requested = task_type in ["visual", "complex_logic", "json_data"]
-            
-            res = llm.create_chat_completion(
-                messages=msgs,
-                temperature=temp,
-                max_tokens=2048,
-                json_mode=json_requested
-            )
-            return res['choices'][0]['message']['content']
-        except Exception as e:
-            return f"[Router Error] {e}"
+        return msgs
 
-    def stream_request(self, task_type: str, prompt: str, system_prompt: str = None, context_messages: list = None, images: list = None):
-        """Versión generadora de route_request para visualizar pensamientos en tiempo real"""
+    def _prepare_request(self, task_type: str, prompt: str, system_prompt: str = None, context_messages: list = None, images: list = None, context_prompt: str = None):
+        """
+        Resuelve rol + modelo y construye los mensajes (común a las variantes sync/async).
+        Devuelve (llm, role, msgs, temperature) o (None, error_msg, None, None).
+        """
         # 1. Determinar Rol
-        selected_role = "chat"
-        if task_type in ["thought", "reflexion"]: selected_role = "reflexion"
-        elif task_type in ["visual", "image_analysis"]: selected_role = "vision"
-        elif task_type in ["logic", "analysis", "complex_logic"]: selected_role = "deep_thought"
-            
+        selected_role = self._select_role(task_type)
+
         # 2. Obtener modelo 
         llm = self.load_model(selected_role)
+        
+        # Fallback a chat
+        if not llm and selected_role != "chat":
+            print(f"[Router] Warn: Role {selected_role} not loaded. Fallback chat.")
+            # Critical: If Vision failed, DO NOT fallback silently. Mistral will hallucinate.
+            if selected_role == "vision":
+                return None, "[SYSTEM ERROR] Vision Model (llava) not available. Please run `ollama pull llava`.", None, None
+            
+            llm = self.load_model("chat")
+            
         if not llm:
-            yield "Error: Modelo no cargado."
-            return
+            return None, "Error: No hay modelos disponibles.", None, None
 
-        # 3. Preparar Mensajes (Reutilizando lógica de construcción)
+        # 3. Generar
+        # Algunos modelos (GGUF local) usan max_tokens, Ollama usa num_predict o options
         role_params = self.roles_config.get(selected_role, {}).get('params', {})
         temp = role_params.get('temperature', 0.7)
-        
-        msgs = []
-        if system_prompt and selected_role != "vision":
-             msgs.append({"role": "system", "content": system_prompt})
-        
-        if context_messages:
-            msgs.extend([dict(m) for m in context_messages])
-            if prompt: msgs.append({"role": "user", "content": prompt})
-        else:
-            content = prompt if prompt else "..."
-            msg = {"role": "user", "content": content}
-            if images and selected_role == "vision": msg["images"] = images
-            msgs.append(msg)
 
-        # 4. Stream
-        if hasattr(llm, 'stream_chat_completion'):
-            for token in llm.stream_chat_completion(messages=msgs, temperature=temp):
-                yield token
-        else:
-            # Fallback a normal si no soporta stream
-            res = llm.create_chat_completion(messages=msgs, temperature=temp)
-            yield res['choices'][0]['message']['content']
-
-    def get_active_models(self):
-        """Returns a dict of role -> model_name for all loaded models."""
-        active = {}
-        for role, instance in self.loaded_models.items():
-            if hasattr(instance, 'model_name'):
-                active[role] = instance.model_name
-            elif hasattr(instance, 'model_path'):
-                # For local GGUF, get the filename as model name
-                active[role] = Path(instance.model_path).name
-            else:
-                active[role] = "unknown"
-        return active
+        self.residency.touch(selected_role if selected_role in self.loaded_models else "chat")
+        msgs = self._build_messages(selected_role, prompt, system_prompt, context_messages, images, context_prompt)
+        return llm, selected_role, msgs, temp
+
+    def _model_id(self, llm) -> str:
+        if hasattr(llm, 'model_name'):
+            return llm.model_name
+        if hasattr(llm, 'model_path'):
+            return Path(llm.model_path).name
+        return "unknown"
+
+    def _cache_key(self, role, llm, msgs, temp, json_requested):
+        return ResponseCache.make_key(role, self._model_id(llm), msgs, temperature=temp, json_mode=json_requested)
+
+    def _cache_ttl(self, role):
+        """TTL por rol (params.cache_ttl); 0 desactiva la cache para ese rol"""
+        return self.roles_config.get(role, {}).get('params', {}).get('cache_ttl')
+
+    def route_request(self, task_type: str, prompt: str, system_prompt: str = None, context_messages: list = None, images: list = None, cache: bool = True, priority: int = PRIORITY_INTERACTIVE, context_prompt: str = None, cancel_event=None):
+        """
+        Petición bloqueante. Con cache=True las respuestas idénticas (mismo rol, modelo, mensajes
+        e imágenes) se sirven desde ResponseCache y los duplicados en vuelo se fusionan.
+        cache=False fuerza un muestreo nuevo. `priority` es la clase del InferenceScheduler.
+        cancel_event (CancellationToken) aborta la espera de slot o la generación: devuelve "".
+        """
+        llm, selected_role, msgs, temp = self._prepare_request(task_type, prompt, system_prompt, context_messages, images, context_prompt)
+        if not llm:
+            return selected_role # mensaje de error
+
+        # Force JSON mode for specific task types if using a model that supports it
+        # 'visual' enforces JSON (for Autonomy). 'visual_chat' allows free text (for Cortex).
+        json_requested = task_type in ["visual", "complex_logic", "json_data"]
+
+        def generate():
+            self.prefixes.observe(selected_role, msgs)
+            try:
+                with self.scheduler.slot(self.scheduler.backend_of(llm), priority, cancel=cancel_event):
+                    res = llm.create_chat_completion(
+                        messages=msgs,
+                        temperature=temp,
+                        max_tokens=2048,
+                        json_mode=json_requested,
+                        cancel_event=cancel_event,
+                        priority=priority
+                    )
+                return res['choices'][0]['message']['content']
+            except GenerationCancelled:
+                return ""
+            except Exception as e:
+                return f"[Router Error] {e}"
+
+        if not cache or self._cache_ttl(selected_role) == 0:
+            return generate()
+        key = self._cache_key(selected_role, llm, msgs, temp, json_requested)
+        return self.response_cache.get_or_compute(key, generate, ttl=self._cache_ttl(selected_role))
+
+    def stream_request(self, task_type: str, prompt: str, system_prompt: str = None, context_messages: list = None, images: list = None, priority: int = PRIORITY_INTERACTIVE, context_prompt: str = None, cancel_event=None):
+        """
+        Versión generadora de route_request para visualizar pensamientos en tiempo real.
+        cancel_event (CancellationToken o threading.Event) corta el stream del backend en cuanto se activa.
+        """
+        llm, selected_role, msgs, temp = self._prepare_request(task_type, prompt, system_prompt, context_messages, images, context_prompt)
+        if not llm:
+            yield selected_role
+            return
+
+        # TTFT: desde la petición (incluida la espera de slot) hasta el primer token
+        t0 = time.perf_counter()
+        hit = self.prefixes.observe(selected_role, msgs)
+        first = True
+
+        # 4. Stream (el slot del scheduler se mantiene mientras dure la generación)
+        try:
+            with self.scheduler.slot(self.scheduler.backend_of(llm), priority, cancel=cancel_event):
+                if hasattr(llm, 'stream_chat_completion'):
+                    for token in llm.stream_chat_completion(messages=msgs, temperature=temp, cancel_event=cancel_event, priority=priority):
+                        if first:
+                            self.prefixes.record_ttft(selected_role, time.perf_counter() - t0, hit)
+                            first = False
+                        yield token
+                else:
+                    # Fallback a normal si no soporta stream
+                    res = llm.create_chat_completion(messages=msgs, temperature=temp, cancel_event=cancel_event, priority=priority)
+                    yield res['choices'][0]['message']['content']
+        except GenerationCancelled:
+            return
+
+    async def aroute_request(self, task_type: str, prompt: str, system_prompt: str = None, context_messages: list = None, images: list = None, cache: bool = True, priority: int = PRIORITY_INTERACTIVE, context_prompt: str = None, cancel_event=None):
+        """Variante asyncio de route_request: Ollama/Gemini sin hilo por petición"""
+        llm, selected_role, msgs, temp = await self._aprepare_request(task_type, prompt, system_prompt, context_messages, images, context_prompt)
+        if not llm:
+            return selected_role
+
+        json_requested = task_type in ["visual", "complex_logic", "json_data"]
+
+        async def generate():
+            self.prefixes.observe(selected_role, msgs)
+            try:
+                async with self.scheduler.aslot(self.scheduler.backend_of(llm), priority, cancel=cancel_event):
+                    if hasattr(llm, 'acreate_chat_completion'):
+                        res = await llm.acreate_chat_completion(
+                            messages=msgs, temperature=temp, max_tokens=2048, json_mode=json_requested, cancel_event=cancel_event, priority=priority
+                        )
+                    else:
+                        # GGUF local: la inferencia es CPU-bound, va al executor
+                        res = await asyncio.to_thread(
+                            llm.create_chat_completion, messages=msgs, temperature=temp, max_tokens=2048,
+                            json_mode=json_requested, cancel_event=cancel_event, priority=priority
+                        )
+                return res['choices'][0]['message']['content']
+            except GenerationCancelled:
+                return ""
+            except Exception as e:
+                return f"[Router Error] {e}"
+
+        if not cache or self._cache_ttl(selected_role) == 0:
+            return await generate()
+        key = self._cache_key(selected_role, llm, msgs, temp, json_requested)
+        return await self.response_cache.aget_or_compute(key, generate, ttl=self._cache_ttl(selected_role))
+
+    async def astream_request(self, task_type: str, prompt: str, system_prompt: str = None, context_messages: list = None, images: list = None, priority: int = PRIORITY_INTERACTIVE, context_prompt: str = None, cancel_event=None):
+        """Variante asyncio de stream_request: los tokens llegan directamente al event loop"""
+        llm, selected_role, msgs, temp = await self._aprepare_request(task_type, prompt, system_prompt, context_messages, images, context_prompt)
+        if not llm:
+            yield selected_role
+            return
+
+        t0 = time.perf_counter()
+        hit = self.prefixes.observe(selected_role, msgs)
+        first = True
+
+        try:
+            async with self.scheduler.aslot(self.scheduler.backend_of(llm), priority, cancel=cancel_event):
+                if hasattr(llm, 'astream_chat_completion'):
+                    async for token in llm.astream_chat_completion(messages=msgs, temperature=temp, cancel_event=cancel_event, priority=priority):
+                        if first:
+                            self.prefixes.record_ttft(selected_role, time.perf_counter() - t0, hit)
+                            first = False
+                        yield token
+                elif hasattr(llm, 'acreate_chat_completion'):
+                    res = await llm.acreate_chat_completion(messages=msgs, temperature=temp, cancel_event=cancel_event, priority=priority)
+                    yield res['choices'][0]['message']['content']
+                else:
+                    res = await asyncio.to_thread(llm.create_chat_completion, messages=msgs, temperature=temp, cancel_event=cancel_event, priority=priority)
+                    yield res['choices'][0]['message']['content']
+        except GenerationCancelled:
+            return
+
+    async def _aprepare_request(self, task_type, prompt, system_prompt, context_messages, images, context_prompt=None):
+        args = (task_type, prompt, system_prompt, context_messages, images, context_prompt)
+        if self._select_role(task_type) in self.loaded_models:
+            return self._prepare_request(*args)
+        # Primera carga del rol (catálogo / GGUF): puede bloquear, se hace fuera del loop
+        return await asyncio.to_thread(self._prepare_request, *args)
+
+    def get_active_models(self, detailed: bool = False):
+        """
+        Returns a dict of role -> model_name for all loaded models.
+        detailed=True: role -> {model, state, pinned, load_time, warm_time, last_used, ...}
+        """
+        if detailed:
+            return self.residency.describe()
+        # For local GGUF, the filename is the model name
+        return {role: self._model_id(instance) for role, instance in self.loaded_models.items()}
@@ -0,0 +1,218 @@
+import time
+import asyncio
+import threading
+from contextlib import contextmanager, asynccontextmanager
+
+from core.cancellation import GenerationCancelled, cancel_scope, is_cancelled
+
+# Clases de prioridad (menor = más urgente)
+PRIORITY_INTERACTIVE = 0 # turno del usuario (chat, /cortex)
+PRIORITY_AUTONOMY = 1    # reflejo visual / ciclo de autonomía
+PRIORITY_BACKGROUND = 2  # deep thought, life moments
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_AUTONOMY: "autonomy",
+    PRIORITY_BACKGROUND: "background",
+}
+
+
+class _Ticket:
+    """Petición de slot en la cola de un backend."""
+    def __init__(self, backend: str, priority: int, seq: int, loop=None):
+        self.backend = backend
+        self.priority = priority
+        self.seq = seq
+        self.enqueued = time.perf_counter()
+        self.granted = False
+        self.event = threading.Event() if loop is None else None
+        self.loop = loop
+        self.future = loop.create_future() if loop is not None else None
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+
+class _BackendState:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.waiting = []
+        self.running = {p: 0 for p in PRIORITY_NAMES}
+        self.last_interactive = 0.0
+        self.timer = None
+
+    @property
+    def running_total(self):
+        return sum(self.running.values())
+
+
+class InferenceScheduler:
+    """
+    Árbitro central de inferencia entre roles y hilos.
+    Implements:
+    - Clases de prioridad: interactive > autonomy > background
+    - Límite de concurrencia por backend (ollama / gemini / local)
+    - Aplazamiento del trabajo background mientras hay un turno de usuario activo
+      (y durante `background_grace` segundos tras terminarlo)
+    - Métricas de profundidad de cola y tiempo de espera por clase
+    """
+    def __init__(self, limits: dict = None, default_limit: int = 2, background_grace: float = 2.0):
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self.background_grace = background_grace
+        self._backends = {}
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._metrics = {
+            name: {"submitted": 0, "completed": 0, "timeouts": 0, "cancelled": 0, "deferred": 0, "wait_total": 0.0, "wait_max": 0.0}
+            for name in PRIORITY_NAMES.values()
+        }
+
+    @staticmethod
+    def backend_of(llm) -> str:
+        """Clave de backend para los límites de concurrencia"""
+        name = type(llm).__name__
+        if name == "OllamaWrapper":
+            return "ollama"
+        if name == "GeminiWrapper":
+            return "gemini"
+        return "local"
+
+    def _state(self, backend):
+        state = self._backends.get(backend)
+        if state is None:
+            state = self._backends[backend] = _BackendState(self.limits.get(backend, self.default_limit))
+        return state
+
+    def _enqueue(self, backend, priority, loop=None):
+        with self._lock:
+            self._seq += 1
+            ticket = _Ticket(backend, priority, self._seq, loop)
+            self._state(backend).waiting.append(ticket)
+            self._metrics[PRIORITY_NAMES[priority]]["submitted"] += 1
+            self._dispatch(backend)
+        return ticket
+
+    def _dispatch(self, backend):
+        """Concede slots libres en orden (prioridad, llegada). Llamar con self._lock."""
+        state = self._state(backend)
+        now = time.perf_counter()
+        while state.waiting and state.running_total < state.limit:
+            ticket = min(state.waiting, key=lambda t: (t.priority, t.seq))
+            if ticket.priority == PRIORITY_BACKGROUND:
+                # Deferral: el background no arranca con un turno de usuario en curso o recién terminado
+                if state.running[PRIORITY_INTERACTIVE]:
+                    return
+                remaining = self.background_grace - (now - state.last_interactive)
+                if remaining > 0:
+                    self._schedule_redispatch(backend, state, remaining)
+                    return
+            state.waiting.remove(ticket)
+            state.running[ticket.priority] += 1
+            ticket.granted = True
+            waited = now - ticket.enqueued
+            m = self._metrics[PRIORITY_NAMES[ticket.priority]]
+            m["wait_total"] += waited
+            m["wait_max"] = max(m["wait_max"], waited)
+            ticket.wake()
+
+    def _schedule_redispatch(self, backend, state, delay):
+        if state.timer is not None:
+            return
+        self._metrics["background"]["deferred"] += 1
+
+        def _fire():
+            with self._lock:
+                state.timer = None
+                self._dispatch(backend)
+
+        state.timer = threading.Timer(delay, _fire)
+        state.timer.daemon = True
+        state.timer.start()
+
+    def _release(self, ticket):
+        with self._lock:
+            state = self._state(ticket.backend)
+            state.running[ticket.priority] -= 1
+            if ticket.priority == PRIORITY_INTERACTIVE:
+                state.last_interactive = time.perf_counter()
+            self._metrics[PRIORITY_NAMES[ticket.priority]]["completed"] += 1
+            self._dispatch(ticket.backend)
+
+    def _abandon(self, ticket, reason: str = "timeouts") -> bool:
+        """Retira un ticket no concedido. Devuelve False si ya se había concedido."""
+        with self._lock:
+            if ticket.granted:
+                return False
+            self._state(ticket.backend).waiting.remove(ticket)
+            self._metrics[PRIORITY_NAMES[ticket.priority]][reason] += 1
+            self._dispatch(ticket.backend)
+            return True
+
+    @contextmanager
+    def slot(self, backend: str, priority: int = PRIORITY_INTERACTIVE, timeout: float = None, cancel=None):
+        """
+        Bloquea hasta obtener un slot del backend. TimeoutError si no llega a tiempo;
+        GenerationCancelled si `cancel` se activa durante la espera.
+        """
+        ticket = self._enqueue(backend, priority)
+        with cancel_scope(cancel, ticket.event.set):
+            if not ticket.event.wait(timeout) and self._abandon(ticket):
+                raise TimeoutError(f"Inference slot timeout ({backend}, {PRIORITY_NAMES[priority]})")
+        if is_cancelled(cancel):
+            if not self._abandon(ticket, "cancelled"):
+                self._release(ticket)
+            raise GenerationCancelled()
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    @asynccontextmanager
+    async def aslot(self, backend: str, priority: int = PRIORITY_INTERACTIVE, timeout: float = None, cancel=None):
+        """Variante asyncio: espera en un Future, sin bloquear el event loop"""
+        ticket = self._enqueue(backend, priority, loop=asyncio.get_running_loop())
+        try:
+            with cancel_scope(cancel, ticket.wake):
+                await asyncio.wait_for(asyncio.shield(ticket.future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            if self._abandon(ticket):
+                raise
+            # Concedido justo al cancelar: se devuelve el slot
+            self._release(ticket)
+            raise
+        if is_cancelled(cancel):
+            if not self._abandon(ticket, "cancelled"):
+                self._release(ticket)
+            raise GenerationCancelled()
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    def get_metrics(self):
+        """Profundidad de cola, slots en uso y tiempos de espera por clase"""
+        with self._lock:
+            backends = {}
+            for name, state in self._backends.items():
+                depth = {p: 0 for p in PRIORITY_NAMES.values()}
+                for t in state.waiting:
+                    depth[PRIORITY_NAMES[t.priority]] += 1
+                backends[name] = {
+                    "limit": state.limit,
+                    "running": {PRIORITY_NAMES[p]: n for p, n in state.running.items()},
+                    "queue_depth": depth,
+                }
+            classes = {}
+            for name, m in self._metrics.items():
+                c = dict(m)
+                c["wait_avg"] = m["wait_total"] / m["completed"] if m["completed"] else 0.0
+                classes[name] = c
+        return {"backends": backends, "classes": classes}
@@ -0,0 +1,196 @@
+import time
+import weakref
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Cabecera (int64): [0] = seq publicada, [1] = escrituras; después, por slot:
+_SEQ, _H, _W, _C, _HAS_ORIGIN, _OX, _OY = range(7)
+_META = 8     # campos int64 por slot
+_HEADER = 8   # int64 de cabecera global
+
+
+class SharedFrameRing:
+    """
+    FrameRing sobre multiprocessing.shared_memory (misma interfaz de lectura y escritura).
+    Implements:
+    - Un bloque de control (secuencias, forma, timestamp y origen de cada slot) y un bloque de
+      datos con N slots de slot_bytes; el proceso de captura escribe, el resto lee vistas numpy
+      directamente sobre la memoria compartida (sin copia ni pickle)
+    - Validación por secuencia igual que FrameRing: el slot se invalida (seq = 0) antes de
+      sobrescribirlo y el lector comprueba valid(seq) tras usar la vista
+    - wait_for(): en el proceso escritor lo despierta commit(); en los lectores, notify() desde
+      el canal de control
+    El creador (create) es el propietario: los segmentos se liberan al recolectarse o al salir.
+    """
+    def __init__(self, ctl, data, slots: int, slot_bytes: int, owner: bool = False):
+        self.size = slots
+        self.slot_bytes = slot_bytes
+        self._ctl, self._data = ctl, data
+        self._header = np.ndarray((_HEADER,), np.int64, ctl.buf)
+        self._meta = np.ndarray((slots, _META), np.int64, ctl.buf, offset=_HEADER * 8)
+        self._stamps = np.ndarray((slots,), np.float64, ctl.buf, offset=(_HEADER + slots * _META) * 8)
+        self._pending = None
+        self._pending_buf = None
+        self._cond = threading.Condition()
+        self.allocations = 0
+        self._finalizer = weakref.finalize(self, SharedFrameRing._release, ctl, data, owner)
+
+    @classmethod
+    def create(cls, slots: int = 4, slot_bytes: int = 3840 * 2160 * 3):
+        """Reserva los segmentos (proceso propietario). slot_bytes = tamaño máximo de un frame"""
+        if slots < 2:
+            raise ValueError("SharedFrameRing needs at least 2 slots")
+        ctl = shared_memory.SharedMemory(create=True, size=(_HEADER + slots * _META + slots) * 8)
+        data = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        np.ndarray(((_HEADER + slots * _META + slots),), np.int64, ctl.buf).fill(0)
+        return cls(ctl, data, slots, slot_bytes, owner=True)
+
+    @classmethod
+    def attach(cls, ctl_name: str, data_name: str, slots: int, slot_bytes: int):
+        """Abre un anillo creado en otro proceso (los argumentos son los de .names)"""
+        return cls(shared_memory.SharedMemory(name=ctl_name), shared_memory.SharedMemory(name=data_name),
+                   slots, slot_bytes)
+
+    @property
+    def names(self):
+        return self._ctl.name, self._data.name, self.size, self.slot_bytes
+
+    @staticmethod
+    def _release(ctl, data, unlink):
+        for shm in (ctl, data):
+            try:
+                shm.close()
+            except BufferError:
+                pass # aún hay vistas vivas: el SO libera la memoria al terminar el proceso
+            if unlink:
+                try:
+                    shm.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def close(self):
+        """Suelta las vistas de control y cierra (y, si es el propietario, libera) los segmentos"""
+        self._header = self._meta = self._stamps = self._pending_buf = None
+        self._finalizer()
+
+    # --- Escritura (un único productor: el hilo de captura del proceso hijo) ---
+
+    def acquire(self, shape, dtype=np.uint8) -> np.ndarray:
+        if np.dtype(dtype) != np.uint8 or len(shape) not in (2, 3):
+            raise ValueError(f"SharedFrameRing stores uint8 frames (got {dtype}, {shape})")
+        nbytes = int(np.prod(shape))
+        if nbytes > self.slot_bytes:
+            raise ValueError(f"Frame {tuple(shape)} exceeds slot size ({self.slot_bytes} bytes)")
+        idx = (self.seq + 1) % self.size
+        meta = self._meta[idx]
+        with self._cond:
+            meta[_SEQ] = 0 # invalidar antes de sobrescribir
+        meta[_H], meta[_W] = shape[0], shape[1]
+        meta[_C] = shape[2] if len(shape) == 3 else 0
+        self._pending = idx
+        self._pending_buf = np.ndarray(tuple(shape), np.uint8, self._data.buf, offset=idx * self.slot_bytes)
+        return self._pending_buf
+
+    @property
+    def pending(self):
+        return self._pending_buf
+
+    def commit(self, timestamp: float = None, origin: tuple = None) -> int:
+        idx = self._pending
+        if idx is None:
+            raise RuntimeError("commit() without acquire()")
+        self._pending = self._pending_buf = None
+        meta = self._meta[idx]
+        with self._cond:
+            seq = int(self._header[0]) + 1
+            self._stamps[idx] = timestamp or time.time()
+            meta[_HAS_ORIGIN] = origin is not None
+            if origin is not None:
+                meta[_OX], meta[_OY] = origin
+            meta[_SEQ] = seq
+            self._header[0] = seq # publicar al final
+            self._header[1] += 1
+            self._cond.notify_all()
+            return seq
+
+    def write(self, frame: np.ndarray, timestamp: float = None) -> int:
+        np.copyto(self.acquire(frame.shape, frame.dtype), frame)
+        return self.commit(timestamp)
+
+    # --- Lectura ---
+
+    @property
+    def seq(self) -> int:
+        return int(self._header[0])
+
+    @property
+    def writes(self) -> int:
+        return int(self._header[1])
+
+    def _slot(self, seq):
+        idx = seq % self.size
+        if seq <= 0 or self._meta[idx, _SEQ] != seq:
+            return None
+        return idx
+
+    def _view(self, idx, seq):
+        h, w, c = (int(v) for v in self._meta[idx, _H:_C + 1])
+        if self._meta[idx, _SEQ] != seq:
+            return None # el escritor cambió el slot mientras se leía su forma
+        view = np.ndarray((h, w, c) if c else (h, w), np.uint8, self._data.buf, offset=idx * self.slot_bytes)
+        view.flags.writeable = False
+        return view
+
+    def get(self, seq: int):
+        idx = self._slot(seq)
+        return None if idx is None else self._view(idx, seq)
+
+    def latest(self):
+        seq = self.seq
+        idx = self._slot(seq)
+        view = None if idx is None else self._view(idx, seq)
+        return (seq, view) if view is not None else (0, None)
+
+    def previous(self, seq: int):
+        return self.get(seq - 1)
+
+    def memoryview(self, seq: int = None):
+        view = self.latest()[1] if seq is None else self.get(seq)
+        return None if view is None else memoryview(view)
+
+    def timestamp(self, seq: int) -> float:
+        idx = self._slot(seq)
+        return 0.0 if idx is None else float(self._stamps[idx])
+
+    def origin(self, seq: int):
+        idx = self._slot(seq)
+        if idx is None or not self._meta[idx, _HAS_ORIGIN]:
+            return None
+        return int(self._meta[idx, _OX]), int(self._meta[idx, _OY])
+
+    def valid(self, seq: int) -> bool:
+        return self._slot(seq) is not None
+
+    def notify(self):
+        """Despierta a los wait_for() locales (el lector recibió un aviso de frame nuevo)"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait_for(self, after_seq: int, timeout: float = None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.seq > after_seq, timeout):
+                return None, None
+        seq, view = self.latest()
+        return (seq, view) if view is not None else (None, None)
+
+    def get_stats(self):
+        return {
+            "slots": self.size,
+            "seq": self.seq,
+            "writes": self.writes,
+            "allocations": self.allocations,
+            "resident_mb": round(self.size * self.slot_bytes / 1048576, 2),
+            "shared": True,
+        }
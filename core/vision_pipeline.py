@@ -3,21 +3,28 @@ import time
 import threading
 import numpy as np
 import cv2
-from PIL import ImageGrab, Image
-import base64
-import io
-from datetime import datetime
+
+from core.frame_ring import FrameRing
+from core.frame_encoding import FrameEncodingCache
+from core.capture_backends import create_backend
+from core.dirty_tiles import DirtyTileMap
+from core.frame_hash import FrameHashIndex
+from core.capture_arbiter import CaptureArbiter
 
 class VisionPipeline:
     """
     ARAFURA v4.0 - Asynchronous Vision Pipeline
     Implements:
-    - Dedicated Capture Thread (30 FPS capability)
-    - Shared Buffer (Virtual)
-    - Differential Vision (Pixel Delta Detection)
-    - Windows/Linux Compatibility
+    - Dedicated Capture Thread (30 FPS capability), FPS adaptativo opcional (AdaptiveRateController)
+    - Shared Buffer: FrameRing de frames preasignados con secuencia (vistas sin copia)
+    - Differential Vision (Pixel Delta Detection) + mapa de tiles sucios con sus regiones
+    - Índice de hashes perceptuales de frames ya analizados (deduplicación de llamadas VLM)
+    - Encode-once: cada variante (formato, calidad, tamaño, crop) de un frame se codifica una vez
+    - Windows/Linux Compatibility: backend de captura intercambiable (mss, PIL, sintético)
+    - CaptureArbiter: grabs físicos serializados; crops de región servidos desde el último frame
     """
-    def __init__(self, target_window=None, fps=5, capture_lock=None):
+    def __init__(self, target_window=None, fps=5, arbiter=None, ring_slots=4, capture_backend=None, tile_size=32,
+                 rate_controller=None, analyzed_index=None, ring=None):
         self.target_window = target_window
         self.fps = fps
         self.interval = 1.0 / fps
@@ -25,15 +32,29 @@ class VisionPipeline:
         self.thread = None
         
         # Shared Buffer (State)
-        self.last_frame = None
+        self.ring = ring or FrameRing(ring_slots) # o un SharedFrameRing (proceso de captura aparte)
+        self.last_frame = None     # vistas de sólo lectura sobre el anillo
         self.current_frame = None
+        self._diff = None          # buffer preasignado para absdiff
+        self.encodings = FrameEncodingCache(max_frames=self.ring.size)
+        self.tiles = DirtyTileMap(tile=tile_size)
+        self.analyzed = analyzed_index or FrameHashIndex()
+        self._hashes = {}          # seq -> hash perceptual (últimos frames)
+        self.delivered_seq = 0     # seq del último frame entregado por get_latest_frame
+        self.backend = create_backend(capture_backend)
+        self.real_fps = 0.0        # FPS conseguidos (media exponencial)
+        self.rate = rate_controller # si existe, decide el FPS según la actividad de la escena
+        self._last_capture = None
+        self._origin = None        # (left, top) en pantalla del frame que se está capturando
+        self._wake = threading.Event() # el árbitro adelanta el siguiente tick
         self.delta_score = 0.0
         self.is_changed = False
         
         # Config
         self.delta_threshold = 0.001  # 0.1% change required to trigger "changed"
         self.lock = threading.Lock() # Internal state lock
-        self.capture_lock = capture_lock # external shared resource lock (Arbiter)
+        self.arbiter = arbiter or CaptureArbiter(self) # shared screen access (OCR, crops, vision)
+        self.arbiter.pipeline = self
 
     def start(self):
         """Starts the asynchronous capture loop"""
@@ -47,6 +68,7 @@ class VisionPipeline:
     def stop(self):
         """Stops the capture loop"""
         self.running = False
+        self._wake.set()
         if self.thread:
             self.thread.join(timeout=2)
         print("[VisionPipeline] Stopped.")
@@ -60,57 +82,78 @@ class VisionPipeline:
         """Internal loop running in a dedicated thread"""
         while self.running:
             start_time = time.time()
+            cpu_start = time.thread_time()
             
             frame = self._capture_screen()
             if frame is not None:
                 self._update_buffer(frame)
+                if self.rate and self.last_frame is not None: # el primer frame no es movimiento
+                    self.fps = self.rate.observe(self.delta_score, self.tiles.dirty_ratio,
+                                                 time.thread_time() - cpu_start, start_time)
+                    self.interval = 1.0 / self.fps
+                if self._last_capture is not None:
+                    fps = 1.0 / max(1e-6, start_time - self._last_capture)
+                    self.real_fps = fps if not self.real_fps else 0.8 * self.real_fps + 0.2 * fps
+                self._last_capture = start_time
             
-            # Control FPS
+            # Control FPS (el árbitro puede despertar el bucle antes de tiempo)
             elapsed = time.time() - start_time
             sleep_time = max(0, self.interval - elapsed)
-            time.sleep(sleep_time)
+            self._wake.wait(sleep_time)
+            self._wake.clear()
+        self.backend.close() # recursos del backend ligados a este hilo (mss)
 
     def _capture_screen(self):
         """Platform-agnostic screen capture"""
         try:
-            # Arbiter Lock
-            if self.capture_lock: self.capture_lock.acquire()
-            try:
-                if self.target_window:
-                    # Capture specific window
-                    w = self.target_window
-                    bbox = (w.left, w.top, w.left + w.width, w.top + w.height)
-                    img = ImageGrab.grab(bbox=bbox)
-                else:
-                    # Full screen fallback
-                    img = ImageGrab.grab()
-                
-                # Convert to NumPy for CV2 processing
-                return cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
-            finally:
-                 if self.capture_lock: self.capture_lock.release()
+            bbox = None # Full screen fallback
+            if self.target_window:
+                # Capture specific window
+                w = self.target_window
+                bbox = (w.left, w.top, w.left + w.width, w.top + w.height)
+            self._origin = (bbox[0], bbox[1]) if bbox else self.backend.screen_origin()
+
+            # El backend escribe el frame BGR directamente en el slot libre del anillo
+            return self.arbiter.grab(self.backend, bbox, self.ring)
         except Exception as e:
             # print(f"[VisionPipeline] Capture error: {e}")
             return None
 
     def _update_buffer(self, new_frame):
-        """Updates the shared buffer and calculates differential delta"""
+        """Publishes a frame in the ring and calculates differential delta"""
         with self.lock:
+            origin = None # posición en pantalla desconocida para frames externos
+            if new_frame is self.ring.pending:
+                origin = self._origin
+            else:
+                # Frame externo: se copia al slot libre (_capture_screen ya escribe en él)
+                slot = self.ring.acquire(new_frame.shape, new_frame.dtype)
+                np.copyto(slot, new_frame)
+                new_frame = slot
+
             if self.current_frame is not None:
                 self.last_frame = self.current_frame
-                
+
                 # DIFFERENTIAL VISION: Calculate MSE or structural difference
-                # Fast Delta: Mean Squared Error or Absolute Difference
+                # Fast Delta: Absolute Difference sobre un buffer reutilizado
                 if self.last_frame.shape == new_frame.shape:
-                    diff = cv2.absdiff(self.last_frame, new_frame)
-                    self.delta_score = np.mean(diff) / 255.0
+                    if self._diff is None or self._diff.shape != new_frame.shape:
+                        self._diff = np.empty_like(new_frame)
+                    cv2.absdiff(self.last_frame, new_frame, dst=self._diff)
+                    channels = new_frame.shape[2] if new_frame.ndim == 3 else 1
+                    self.delta_score = float(np.mean(cv2.mean(self._diff)[:channels])) / 255.0
                     self.is_changed = self.delta_score > self.delta_threshold
+                    self.tiles.update(self._diff)
                 else:
                     self.is_changed = True
+                    self.tiles.mark_all(*new_frame.shape)
             else:
                 self.is_changed = True
-            
-            self.current_frame = new_frame
+                self.tiles.mark_all(*new_frame.shape)
+
+            # Publicar al final: quien espere en wait_for_frame ve el delta ya calculado
+            seq = self.ring.commit(origin=origin)
+            self.current_frame = self.ring.get(seq)
 
     def get_latest_frame(self, force=False):
         """
@@ -124,10 +167,11 @@ class VisionPipeline:
             if not self.is_changed and not force:
                 return None, False
             
-            # Convert to JPEG for transmission
-            _, buffer = cv2.imencode('.jpg', self.current_frame, [int(cv2.IMWRITE_JPEG_QUALITY), 80])
-            b64_str = base64.b64encode(buffer).decode('utf-8')
-            
+            # JPEG compartido con el resto de consumidores del mismo frame
+            seq = self.ring.seq
+            b64_str = self.encodings.get(seq, self.current_frame, "jpeg", 80)
+            self.delivered_seq = seq
+
             # Reset change flag after delivery
             change_detected = self.is_changed
             self.is_changed = False 
@@ -138,9 +182,17 @@ class VisionPipeline:
         """Returns visual health metrics"""
         return {
             "fps": self.fps,
+            "real_fps": round(self.real_fps, 2),
+            "capture": self.backend.get_stats(),
+            "rate": self.rate.get_stats() if self.rate else None,
             "delta_score": round(self.delta_score, 6),
             "is_animated": self.delta_score > 0.05,
-            "active": self.running
+            "dirty_ratio": round(self.tiles.dirty_ratio, 4),
+            "active": self.running,
+            "ring": self.ring.get_stats(),
+            "encodings": self.encodings.get_stats(),
+            "dedup": self.analyzed.get_stats(),
+            "arbiter": self.arbiter.get_stats()
         }
 
     def check_impact(self, reference_frame_cv):
@@ -159,34 +211,122 @@ class VisionPipeline:
             score = np.mean(diff) / 255.0
             return score > self.delta_threshold, score
 
-    def get_current_cv(self):
-        """Returns the raw current frame for reference"""
+    def get_current_cv(self, copy=True):
+        """
+        Returns a copy of the current frame for reference.
+        copy=False devuelve una vista de sólo lectura sobre el anillo (sin copia), que se
+        sobrescribe cuando su slot se reutiliza (ring_slots frames después)
+        """
         with self.lock:
-            return self.current_frame.copy() if self.current_frame is not None else None
+            if self.current_frame is None:
+                return None
+            return self.current_frame.copy() if copy else self.current_frame
 
-    def get_region_crop(self, bbox: tuple):
+    @property
+    def frame_seq(self):
+        """Secuencia del último frame publicado (0 = ninguno)"""
+        return self.ring.seq
+
+    @property
+    def frame_size(self):
+        """(w, h) del último frame, o None"""
+        frame = self.current_frame
+        return None if frame is None else (frame.shape[1], frame.shape[0])
+
+    def get_frame(self, seq=None):
+        """(seq, vista de sólo lectura) del frame pedido o del último; vista None si ya salió del anillo"""
+        if seq is None:
+            return self.ring.latest()
+        return seq, self.ring.get(seq)
+
+    def get_encoded(self, fmt="jpeg", quality=None, max_size=None, crop=None, seq=None):
         """
-        Captures a specific region of the screen (x, y, x2, y2).
-        Returns Base64 encoded PNG for high fidelity.
-        Used for Tile Scanning (500x500).
+        (seq, base64) del frame en el formato pedido, codificado como mucho una vez por variante.
+        crop = (x1, y1, x2, y2) relativo al frame; max_size limita el lado mayor (thumbnail).
+        Devuelve (None, None) si aún no hay frame o el pedido ya salió del anillo.
         """
-        try:
-            # Arbiter Lock
-            if self.capture_lock: self.capture_lock.acquire()
-            try:
-                # Capture using ImageGrab (efficient for regions)
-                img = ImageGrab.grab(bbox=bbox)
-                
-                # Convert to buffer
-                buffer = io.BytesIO()
-                img.save(buffer, format="PNG")
-                b64_str = base64.b64encode(buffer.getvalue()).decode('utf-8')
-                return b64_str
-            finally:
-                if self.capture_lock: self.capture_lock.release()
-        except Exception as e:
-            print(f"[VisionPipeline] Region capture error: {e}")
+        for _ in range(2):
+            seq, frame = self.get_frame(seq)
+            if frame is None:
+                return None, None
+            b64 = self.encodings.get(seq, frame, fmt, quality, max_size, crop)
+            if self.ring.valid(seq):
+                return seq, b64
+            # El slot se reutilizó durante la codificación: descartar y repetir con el último
+            self.encodings.clear()
+            seq = None
+        return None, None
+
+    def frame_hash(self, seq=None):
+        """Hash perceptual (tipo del índice analyzed) del frame seq o del último; None si no está"""
+        seq, frame = self.get_frame(seq)
+        if frame is None:
+            return None
+        fhash = self._hashes.get(seq)
+        if fhash is None:
+            fhash = self.analyzed.hash(frame)
+            if not self.ring.valid(seq):
+                return None
+            self._hashes = {s: h for s, h in self._hashes.items() if s > seq - self.ring.size}
+            self._hashes[seq] = fhash
+        return fhash
+
+    def get_dirty_regions(self, pad=0, max_regions=None):
+        """(seq, regiones) que cambiaron respecto al frame anterior, de mayor a menor"""
+        with self.lock:
+            regions = self.tiles.regions(pad)
+            return self.ring.seq, regions[:max_regions] if max_regions else regions
+
+    def get_dirty_crops(self, fmt="png", quality=None, max_regions=4, pad=8, max_size=None):
+        """
+        Crops codificados de las regiones cambiadas del último frame, para enviar al VLM sólo lo
+        que cambió. [{"bbox": (x1, y1, x2, y2), "image": b64, "score": s}]
+        """
+        seq, regions = self.get_dirty_regions(pad, max_regions)
+        crops = []
+        for r in regions:
+            _, b64 = self.get_encoded(fmt, quality, max_size, crop=r["bbox"], seq=seq)
+            if b64 is None:
+                break # el frame salió del anillo
+            crops.append({"bbox": r["bbox"], "image": b64, "score": r["score"]})
+        return crops
+
+    def get_tile_map(self):
+        """Copia de las puntuaciones por tile (th x tw, 0-1) del último frame"""
+        with self.lock:
+            return None if self.tiles.scores is None else self.tiles.scores.copy()
+
+    def wake(self):
+        """Adelanta el siguiente tick de captura (peticiones de región con el frame viejo)"""
+        self._wake.set()
+
+    def step(self):
+        """
+        Un tick de captura síncrono, sin hilo ni control de FPS (replay determinista y benchmarks).
+        Devuelve el seq publicado o None si el backend no dio frame (p. ej. grabación terminada).
+        """
+        frame = self._capture_screen()
+        if frame is None:
             return None
+        self._update_buffer(frame)
+        return self.ring.seq
+
+    def wait_for_frame(self, after_seq=0, timeout=None):
+        """Bloquea hasta el siguiente frame posterior a after_seq. Devuelve (seq, vista) o (None, None)"""
+        seq, view = self.ring.wait_for(after_seq, timeout)
+        with self.lock: # _update_buffer termina de publicar current_frame/delta_score
+            return seq, view
+
+    def get_region_crop(self, bbox: tuple):
+        """
+        Region of the screen (x, y, x2, y2) as Base64 PNG for high fidelity.
+        Used for Tile Scanning (500x500): served by the arbiter as a crop of the freshest
+        frame (or shared full-screen snapshot) instead of a grab per tile.
+        """
+        b64_str = self.arbiter.region_b64(bbox, "png")
+        if b64_str is None:
+            print(f"[VisionPipeline] Region capture error: {bbox}")
+        return b64_str
 
 if __name__ == "__main__":
     # Test execution
@@ -0,0 +1,304 @@
+import itertools
+import threading
+import multiprocessing as mp
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+from core.vision_pipeline import VisionPipeline
+from core.frame_encoding import FrameEncodingCache, encode_frame
+from core.shared_frame_ring import SharedFrameRing
+from core.adaptive_rate import AdaptiveRateController
+
+# Parámetros de AdaptiveRateController que se replican en el proceso hijo
+_RATE_PARAMS = ("idle_fps", "max_fps", "cpu_budget", "activity_low", "activity_high",
+                "hold_s", "decay", "idle_inference_stretch")
+
+
+def _window_rect(window):
+    if window is None:
+        return None
+    return {"left": window.left, "top": window.top, "width": window.width, "height": window.height}
+
+
+def _child_main(ring_names, conn, options):
+    """Proceso de captura: VisionPipeline normal escribiendo en el SharedFrameRing"""
+    ring = SharedFrameRing.attach(*ring_names)
+    rate = AdaptiveRateController(**options["rate"]) if options["rate"] is not None else None
+    vp = VisionPipeline(fps=options["fps"], capture_backend=options["backend"], tile_size=options["tile_size"],
+                        rate_controller=rate, ring=ring)
+    send_lock = threading.Lock()
+
+    def send(msg):
+        with send_lock:
+            conn.send(msg)
+
+    def notify_frames():
+        seq = 0
+        while vp.running:
+            if vp.wait_for_frame(seq, timeout=0.5)[0] is None:
+                continue
+            with vp.lock:
+                seq = vp.ring.seq
+                tiles = vp.tiles
+                frame = {
+                    "seq": seq,
+                    "delta_score": vp.delta_score,
+                    "is_changed": vp.is_changed,
+                    "scores": None if tiles.scores is None else tiles.scores.copy(),
+                    "shape": tiles.frame_shape,
+                    "fps": vp.fps,
+                    "real_fps": vp.real_fps,
+                    "capture": vp.backend.get_stats(),
+                    "rate": (rate.fps, rate.state, rate.activity, rate._frame_cost) if rate else None,
+                }
+            send(("frame", frame))
+
+    def encode(req_id, seq, key):
+        frame = ring.get(seq)
+        try:
+            b64 = None if frame is None else encode_frame(frame, *key)
+            # Slot reutilizado durante la codificación: el padre lo detecta con valid(seq)
+            send(("encoded", req_id, b64 if ring.valid(seq) else None, None))
+        except Exception as e:
+            send(("encoded", req_id, None, str(e)))
+
+    encoder = ThreadPoolExecutor(max_workers=2, thread_name_prefix="VisionEncode")
+    vp.start()
+    threading.Thread(target=notify_frames, daemon=True, name="VisionNotify").start()
+    try:
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                break
+            cmd = msg[0]
+            if cmd == "stop":
+                break
+            elif cmd == "window":
+                vp.set_window(SimpleNamespace(**msg[1]) if msg[1] else None)
+            elif cmd == "power" and rate:
+                rate.set_power(msg[1], msg[2])
+            elif cmd == "wake":
+                vp.wake()
+            elif cmd == "encode":
+                encoder.submit(encode, *msg[1:])
+    finally:
+        vp.stop()
+        encoder.shutdown(wait=True)
+        try:
+            send(("stopped",))
+        except (OSError, ValueError):
+            pass
+        ring.close()
+
+
+class _RemoteEncodingCache(FrameEncodingCache):
+    """Encode-once del padre cuyas variantes se codifican en el proceso de captura"""
+    def __init__(self, owner, max_frames=4, timeout=2.0):
+        super().__init__(max_frames)
+        self.owner = owner
+        self.timeout = timeout
+
+    def _encode(self, seq, frame, key):
+        return self.owner._remote_encode(seq, key, self.timeout)
+
+
+class VisionProcess(VisionPipeline):
+    """
+    VisionPipeline en un proceso aparte: captura, conversión de color, diff, tiles y codificación
+    dejan de competir por el GIL con los bucles del orquestador y el servidor FastAPI.
+    Implements:
+    - Frames en un SharedFrameRing: orquestador, árbitro y API leen vistas numpy de la memoria
+      compartida (sin copia ni pickle); hash perceptual, reflejos y crops funcionan igual
+    - Canal de control (Pipe): ventana, power_level, wake y peticiones de codificación hacia el
+      hijo; avisos de frame (seq, delta, puntuaciones de tiles, FPS) hacia el padre
+    - get_encoded/get_latest_frame: la variante se codifica en el hijo, una vez, y se cachea aquí
+    - Misma interfaz que VisionPipeline (drop-in en el orquestador); el AdaptiveRateController
+      local refleja el estado del hijo y le reenvía los cambios de power_level
+    """
+    def __init__(self, target_window=None, fps=5, arbiter=None, ring_slots=4, capture_backend=None, tile_size=32,
+                 rate_controller=None, analyzed_index=None, slot_bytes=3840 * 2160 * 3):
+        super().__init__(target_window, fps, arbiter, ring_slots, capture_backend, tile_size,
+                         rate_controller, analyzed_index, ring=SharedFrameRing.create(ring_slots, slot_bytes))
+        self.encodings = _RemoteEncodingCache(self, max_frames=ring_slots)
+        self._backend_spec = capture_backend # el hijo crea su propio backend; el de aquí sirve al árbitro
+        self._seq = 0                        # último frame avisado por el hijo (current_frame)
+        self.process = None
+        self._conn = None
+        self._send_lock = threading.Lock()
+        self._requests = {}
+        self._req_ids = itertools.count(1)
+        self._sent = {}                     # último estado enviado al hijo (ventana, power)
+        self._capture_stats = {}
+
+    # --- Ciclo de vida ---
+
+    def start(self):
+        if self.running:
+            return
+        ctx = mp.get_context("spawn") # sin fork de un proceso con hilos (y es lo que hay en Windows)
+        self._conn, child_conn = ctx.Pipe()
+        options = {
+            "fps": self.fps,
+            "backend": self._backend_spec,
+            "tile_size": self.tiles.tile,
+            "rate": {k: getattr(self.rate, k) for k in _RATE_PARAMS} if self.rate else None,
+        }
+        self.process = ctx.Process(target=_child_main, args=(self.ring.names, child_conn, options),
+                                   daemon=True, name="VisionProcess")
+        self.process.start()
+        child_conn.close()
+        self._sent = {}
+        self.running = True
+        self._sync_child()
+        self.thread = threading.Thread(target=self._listen, daemon=True, name="VisionListener")
+        self.thread.start()
+        print(f"[VisionProcess] Started (pid {self.process.pid}).")
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        try:
+            self._send(("stop",))
+        except (OSError, ValueError):
+            pass
+        if self.process:
+            self.process.join(timeout=3)
+            if self.process.is_alive():
+                self.process.terminate()
+        if self.thread:
+            self.thread.join(timeout=2)
+        self._fail_requests("Vision process stopped")
+        print("[VisionProcess] Stopped.")
+
+    def _send(self, msg):
+        with self._send_lock:
+            self._conn.send(msg)
+
+    # --- Canal de control ---
+
+    def _sync_child(self):
+        """Reenvía al hijo los cambios de ventana y de power_level hechos en este proceso"""
+        rect = _window_rect(self.target_window)
+        if rect != self._sent.get("window", ()):
+            self._sent["window"] = rect
+            self._send(("window", rect))
+        if self.rate:
+            power = (self.rate.power_level, self.rate.gamer_mode)
+            if power != self._sent.get("power"):
+                self._sent["power"] = power
+                self._send(("power",) + power)
+
+    def _listen(self):
+        while self.running:
+            try:
+                msg = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            if msg[0] == "frame":
+                self._on_frame(msg[1])
+                try:
+                    self._sync_child()
+                except (OSError, ValueError):
+                    break
+            elif msg[0] == "encoded":
+                _, req_id, b64, error = msg
+                req = self._requests.pop(req_id, None)
+                if req:
+                    req.value, req.error = b64, error
+                    req.done.set()
+            elif msg[0] == "stopped":
+                break
+        self.running = False
+        self._fail_requests("Vision process exited")
+        self.ring.notify()
+
+    def _on_frame(self, info):
+        seq = info["seq"]
+        with self.lock:
+            frame = self.ring.get(seq)
+            if frame is None:
+                return # ya sobrescrito: llegará el aviso del siguiente
+            self.last_frame = self.current_frame
+            self.current_frame = frame
+            self._seq = seq
+            self.delta_score = info["delta_score"]
+            self.is_changed = info["is_changed"]
+            if info["scores"] is not None:
+                self.tiles.load(info["scores"], info["shape"])
+            self.fps = info["fps"]
+            self.interval = 1.0 / self.fps
+            self.real_fps = info["real_fps"]
+            self._capture_stats = info["capture"]
+            if self.rate and info["rate"]:
+                self.rate.fps, self.rate.state, self.rate.activity, self.rate._frame_cost = info["rate"]
+        self.ring.notify()
+
+    def _remote_encode(self, seq, key, timeout):
+        req = SimpleNamespace(done=threading.Event(), value=None, error=None)
+        req_id = next(self._req_ids)
+        self._requests[req_id] = req
+        try:
+            self._send(("encode", req_id, seq, key))
+        except (OSError, ValueError, AttributeError) as e:
+            self._requests.pop(req_id, None)
+            raise RuntimeError(f"Vision process unavailable: {e}")
+        if not req.done.wait(timeout):
+            self._requests.pop(req_id, None)
+            raise TimeoutError(f"Remote encode timeout (seq {seq})")
+        if req.error:
+            raise ValueError(req.error)
+        return req.value
+
+    def _fail_requests(self, reason):
+        for req_id in list(self._requests):
+            req = self._requests.pop(req_id, None)
+            if req:
+                req.error = reason
+                req.done.set()
+
+    # --- Interfaz VisionPipeline ---
+
+    def get_latest_frame(self, force=False):
+        """Como VisionPipeline.get_latest_frame, sin retener self.lock mientras codifica el hijo"""
+        with self.lock:
+            if self.current_frame is None or (not self.is_changed and not force):
+                return None, False
+            seq, change_detected = self._seq, self.is_changed
+            self.is_changed = False
+        seq, b64_str = self.get_encoded("jpeg", 80, seq=seq)
+        if b64_str is None:
+            return None, False
+        self.delivered_seq = seq
+        return b64_str, change_detected
+
+    def get_encoded(self, fmt="jpeg", quality=None, max_size=None, crop=None, seq=None):
+        try:
+            return super().get_encoded(fmt, quality, max_size, crop, seq)
+        except (TimeoutError, RuntimeError, ValueError) as e:
+            print(f"[VisionProcess] Encode error: {e}")
+            return None, None
+
+    def get_dirty_regions(self, pad=0, max_regions=None):
+        with self.lock:
+            regions = self.tiles.regions(pad)
+            return self._seq, regions[:max_regions] if max_regions else regions
+
+    def set_window(self, window_obj):
+        with self.lock:
+            self.target_window = window_obj
+        if self.running:
+            self._sync_child()
+
+    def wake(self):
+        if self.running:
+            self._send(("wake",))
+
+    def get_status(self):
+        status = super().get_status()
+        status["capture"] = self._capture_stats
+        status["process"] = {"pid": self.process.pid if self.process else None,
+                             "alive": bool(self.process and self.process.is_alive()),
+                             "pending_encodes": len(self._requests)}
+        return status
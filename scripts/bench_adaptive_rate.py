@@ -0,0 +1,115 @@
+"""
+Benchmark: FPS adaptativo del VisionPipeline frente a 5 FPS fijos.
+Backend sintético con guion de actividad: quieto -> animación -> quieto -> cursor parpadeando.
+Mide frames y CPU del hilo de captura por fase, latencia de reacción al empezar la animación,
+el intervalo de inferencia resultante y el respeto del presupuesto de CPU.
+
+Uso: python scripts/bench_adaptive_rate.py [--phase 3.0] [--width 1920] [--height 1080]
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import cv2
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.vision_pipeline import VisionPipeline
+from core.adaptive_rate import AdaptiveRateController
+from core.capture_backends import SyntheticCaptureBackend
+
+PHASES = ["quieto", "animación", "quieto ", "cursor"]
+
+
+class ScriptedBackend(SyntheticCaptureBackend):
+    """Escritorio sintético cuya actividad depende de la fase del guion"""
+    def __init__(self, width, height, phase_s):
+        super().__init__(width, height)
+        self.phase_s = phase_s
+        self.t0 = None
+
+    def phase(self):
+        return min(len(PHASES) - 1, int((time.perf_counter() - self.t0) / self.phase_s))
+
+    def _grab_into(self, bbox, ring):
+        if self._base is None:
+            self._base = self._desktop()
+        slot = ring.acquire(self._base.shape)
+        np.copyto(slot, self._base)
+        i, self._i = self._i, self._i + 1
+        name = PHASES[self.phase()]
+        if name == "animación": # vídeo / scroll: una gran zona cambia en cada frame
+            cv2.rectangle(slot, (100, 100), (1300, 800), (i * 40 % 255, 90, 200), -1)
+        elif name == "cursor" and (time.perf_counter() * 2) % 2 < 1:
+            cv2.rectangle(slot, (400, 300), (401, 320), (0, 0, 0), -1)
+        return slot
+
+
+def run(width, height, phase_s, rate):
+    backend = ScriptedBackend(width, height, phase_s)
+    backend._base = backend._desktop() # fuera de la medida
+    vp = VisionPipeline(fps=5, capture_backend=backend, rate_controller=rate)
+    frames = [0] * len(PHASES)
+    cpu = [0.0] * len(PHASES)
+    reaction = None
+    intervals = {}
+    backend.t0 = time.perf_counter()
+    vp.start()
+    last_seq, last_cpu = 0, 0.0
+    anim_start = backend.t0 + phase_s
+    while time.perf_counter() - backend.t0 < phase_s * len(PHASES):
+        time.sleep(0.02)
+        p = backend.phase()
+        seq, c = vp.ring.seq, backend.cpu_time
+        frames[p] += seq - last_seq
+        cpu[p] += c - last_cpu
+        last_seq, last_cpu = seq, c
+        if rate:
+            intervals.setdefault(p, []).append(rate.inference_interval())
+            if reaction is None and p == 1 and rate.fps >= rate.ceiling() * 0.9:
+                reaction = time.perf_counter() - anim_start
+    vp.stop()
+    return frames, cpu, reaction, intervals
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--phase", type=float, default=3.0)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    fixed = run(args.width, args.height, args.phase, None)
+    rate = AdaptiveRateController(idle_fps=1.0, max_fps=15.0, cpu_budget=0.25, hold_s=0.5)
+    rate.set_power(10.0)
+    adaptive = run(args.width, args.height, args.phase, rate)
+
+    print(f"{'fase':<11} {'fijo 5fps':>18} {'adaptativo':>22}  intervalo de inferencia")
+    for p, name in enumerate(PHASES):
+        f_fps = fixed[0][p] / args.phase
+        a_fps = adaptive[0][p] / args.phase
+        iv = adaptive[3].get(p, [0])
+        print(f"{name:<11} {f_fps:6.1f} fps {fixed[1][p] * 1000:6.0f}ms cpu   {a_fps:6.1f} fps {adaptive[1][p] * 1000:6.0f}ms cpu"
+              f"   {min(iv):.2f}-{max(iv):.2f}s")
+    print(f"Reacción a la animación: {adaptive[2] * 1000:.0f}ms hasta el techo de FPS" if adaptive[2] is not None else "Reacción: no alcanzó el techo")
+    f_total, a_total = sum(fixed[1]), sum(adaptive[1])
+    print(f"CPU de captura total: fijo {f_total * 1000:.0f}ms vs adaptativo {a_total * 1000:.0f}ms")
+    print(f"Controlador: {rate.get_stats()}")
+
+    # Presupuesto: el coste por frame limita el FPS aunque haya movimiento
+    tight = AdaptiveRateController(idle_fps=1.0, max_fps=30.0, cpu_budget=0.02)
+    tight.set_power(10.0)
+    for _ in range(20):
+        fps = tight.observe(delta_score=0.2, dirty_ratio=1.0, frame_cost=0.004)
+    print(f"Presupuesto 2% de CPU con 4ms/frame: {fps:.1f} fps (límite {0.02 / 0.004:.1f})")
+    assert abs(fps - 5.0) < 0.01
+
+    assert adaptive[0][1] > fixed[0][1]              # más FPS con animación
+    assert adaptive[0][0] < fixed[0][0]              # menos con la pantalla quieta
+    assert adaptive[0][3] < fixed[0][3]              # el cursor no dispara el FPS
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark: ciclo de autonomía secuencial (antes) frente a etapas encadenadas (StagePipeline).
+Costes simulados: VLM --vlm-ms, --actions acciones por respuesta con execute_decision --exec-ms,
+comprobación de beneficio 200 ms y store_experience --store-ms. El frame sale de un VisionPipeline
+sintético real (JPEG encode-once) a la cadencia del timer de visión (--interval).
+Antes: todo en el hilo de fondo, frame tras frame. Ahora: infer -> act -> learn en hilos, el
+frame N+1 se infiere mientras se ejecutan las acciones del N.
+
+Uso: python scripts/bench_autonomy_pipeline.py [--seconds 8] [--vlm-ms 400] [--actions 2] [--interval 0.3]
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.vision_pipeline import VisionPipeline
+from core.autonomy_pipeline import StagePipeline
+
+PROFIT_DELAY = 0.2
+
+
+class Agent:
+    """Las tres fases del ciclo con los costes simulados; anota cuándo se actúa sobre cada frame"""
+    def __init__(self, vlm_s, exec_s, store_s, n_actions):
+        self.vlm_s, self.exec_s, self.store_s, self.n_actions = vlm_s, exec_s, store_s, n_actions
+        self.actions = 0
+        self.stored = 0
+        self.reaction = [] # s desde la captura hasta la primera acción de ese frame
+
+    def infer(self, job):
+        time.sleep(self.vlm_s) # route_request(visual_chat)
+        return {**job, "actions": [f"click {100 * i} 200" for i in range(self.n_actions)]}
+
+    def act(self, job):
+        records = []
+        for i, cmd in enumerate(job["actions"]):
+            time.sleep(self.exec_s) # execute_decision (movimiento + click)
+            if i == 0:
+                self.reaction.append(time.perf_counter() - job["captured"])
+            self.actions += 1
+            records.append({"action": cmd, "at": time.perf_counter()})
+        return records
+
+    def learn(self, records):
+        for rec in records:
+            time.sleep(max(0.0, rec["at"] + PROFIT_DELAY - time.perf_counter()))
+            time.sleep(self.store_s) # store_experience (embedding + índice)
+            self.stored += 1
+
+    def sequential_cycle(self, job):
+        """_execute_autonomy_cycle de antes: todo seguido, sleep(0.2) por acción incluido"""
+        job = self.infer(job)
+        for i, cmd in enumerate(job["actions"]):
+            time.sleep(self.exec_s)
+            if i == 0:
+                self.reaction.append(time.perf_counter() - job["captured"])
+            self.actions += 1
+            time.sleep(PROFIT_DELAY)
+            time.sleep(self.store_s)
+            self.stored += 1
+
+
+def frames(vp, seconds, interval):
+    """Timer de visión: un frame JPEG cada interval s durante seconds (o cuando el consumidor lo deje)"""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        t0 = time.perf_counter()
+        b64, _ = vp.get_latest_frame(force=True)
+        yield {"images": [b64], "seq": vp.delivered_seq, "captured": t0}
+        time.sleep(max(0.0, interval - (time.perf_counter() - t0)))
+
+
+def run(mode, args):
+    vp = VisionPipeline(fps=15, capture_backend="synthetic")
+    vp.start()
+    vp.wait_for_frame(0, timeout=5)
+    agent = Agent(args.vlm_ms / 1000, args.exec_ms / 1000, args.store_ms / 1000, args.actions)
+    submitted, pipe = 0, None
+    t0 = time.perf_counter()
+    if mode == "sequential":
+        for job in frames(vp, args.seconds, args.interval):
+            submitted += 1
+            agent.sequential_cycle(job)
+    else:
+        pipe = (StagePipeline("Autonomy")
+                .add_stage("infer", agent.infer, maxsize=1, drop_oldest=True)
+                .add_stage("act", agent.act, maxsize=1)
+                .add_stage("learn", agent.learn, maxsize=16, drop_oldest=True))
+        for job in frames(vp, args.seconds, args.interval):
+            submitted += 1
+            pipe.submit(job)
+    elapsed = time.perf_counter() - t0
+    stats = pipe.get_stats() if pipe else None
+    if pipe:
+        pipe.stop()
+    vp.stop()
+    return {
+        "frames": submitted,
+        "actions_s": agent.actions / elapsed,
+        "cycles_s": agent.actions / args.actions / elapsed,
+        "reaction": np.array(agent.reaction) * 1000,
+        "stats": stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=8.0)
+    parser.add_argument("--vlm-ms", type=float, default=400.0)
+    parser.add_argument("--exec-ms", type=float, default=150.0)
+    parser.add_argument("--store-ms", type=float, default=80.0)
+    parser.add_argument("--actions", type=int, default=2)
+    parser.add_argument("--interval", type=float, default=0.3)
+    args = parser.parse_args()
+
+    seq = run("sequential", args)
+    pip = run("pipelined", args)
+
+    print(f"\n{'':<30} {'secuencial':>11} {'etapas':>9}")
+    print(f"{'frames del timer de visión':<30} {seq['frames']:11d} {pip['frames']:9d}")
+    print(f"{'ciclos con acción /s':<30} {seq['cycles_s']:11.2f} {pip['cycles_s']:9.2f}")
+    print(f"{'acciones /s':<30} {seq['actions_s']:11.2f} {pip['actions_s']:9.2f}")
+    for q in (50, 99):
+        print(f"{f'captura -> acción p{q} (ms)':<30} {np.percentile(seq['reaction'], q):11.0f} "
+              f"{np.percentile(pip['reaction'], q):9.0f}")
+
+    stats = pip["stats"]
+    print(f"\nEtapas (latencia extremo a extremo p50 {stats['latency_ms']['p50']:.0f} ms):")
+    print(f"{'etapa':<8} {'proc.':>6} {'desc.':>6} {'espera p50':>11} {'servicio p50':>13} {'util.':>6} {'/s':>6}")
+    for name, st in stats["stages"].items():
+        print(f"{name:<8} {st['processed']:6d} {st['dropped']:6d} {st['wait_ms']['p50']:9.0f}ms "
+              f"{st['service_ms']['p50']:11.0f}ms {st['utilization']:6.0%} {st['throughput']:6.2f}")
+
+    bottleneck = max(args.vlm_ms, args.actions * args.exec_ms) / 1000
+    assert pip["cycles_s"] > seq["cycles_s"] * 1.5
+    assert pip["cycles_s"] > 0.7 / bottleneck                   # cerca del límite de la etapa más lenta
+    assert stats["stages"]["infer"]["dropped"] > 0              # frames viejos descartados, no encolados
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
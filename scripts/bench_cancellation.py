@@ -0,0 +1,176 @@
+"""
+Benchmark: time-to-stop de generaciones en vuelo al activar SystemState.interrupt_signal.
+Mide, para cada backend, cuánto tarda route_request / stream_request en devolver el control
+tras la cancelación y comprueba que el slot del scheduler queda libre.
+
+- Ollama (mock HTTP lento): petición bloqueante, stream síncrono y variante asyncio
+- GGUF local (stub de Llama con un token cada --token-delay s) vía LocalInferenceWorker
+- Espera de slot en el InferenceScheduler (backend saturado)
+
+Uso: python scripts/bench_cancellation.py [--generation 3.0] [--cancel-after 0.3]
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+BASE = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE))
+from core.router import ModelRouter, OllamaWrapper
+from core.local_worker import LocalInferenceWorker
+from core.cancellation import CancellationToken
+from core.scheduler import PRIORITY_AUTONOMY, PRIORITY_INTERACTIVE
+
+
+class SlowOllamaHandler(BaseHTTPRequestHandler):
+    """Generación lenta: un token por segundo en stream, respuesta tras `generation` s si no."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    generation = 3.0
+    aborted = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        try:
+            if payload.get("stream"):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                t_end = time.time() + self.generation
+                while time.time() < t_end:
+                    data = json.dumps({"message": {"content": "tok "}, "done": False}).encode() + b"\n"
+                    self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+                    time.sleep(1.0)
+                self.wfile.write(b"0\r\n\r\n")
+            else:
+                time.sleep(self.generation)
+                body = json.dumps({"message": {"content": "respuesta completa"}, "done": True}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            SlowOllamaHandler.aborted += 1
+
+
+class SlowLlama:
+    """Stub de llama_cpp.Llama: un token cada `delay` s (sólo se usa en modo stream)"""
+    def __init__(self, tokens=200, delay=0.02):
+        self.model_path = "slow.gguf"
+        self.tokens = tokens
+        self.delay = delay
+        self.generated = 0
+
+    def create_chat_completion(self, messages, stream=False, **kwargs):
+        def gen():
+            for _ in range(self.tokens):
+                time.sleep(self.delay)
+                self.generated += 1
+                yield {"choices": [{"delta": {"content": "t"}}]}
+        return gen()
+
+
+def cancel_later(token, delay):
+    marks = {}
+
+    def _fire():
+        time.sleep(delay)
+        marks["t"] = time.perf_counter()
+        token.set()
+    threading.Thread(target=_fire, daemon=True).start()
+    return marks
+
+
+def report(label, marks, t_end, router, backend):
+    stop_ms = (t_end - marks["t"]) * 1000
+    running = router.scheduler.get_metrics()["backends"].get(backend, {}).get("running", {})
+    busy = sum(running.values())
+    print(f"{label:<38} time-to-stop={stop_ms:7.1f}ms  slots ocupados tras parar={busy}")
+    return stop_ms
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--generation", type=float, default=3.0)
+    parser.add_argument("--cancel-after", type=float, default=0.3)
+    args = parser.parse_args()
+    SlowOllamaHandler.generation = args.generation
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowOllamaHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+
+    router = ModelRouter(BASE)
+    router.loaded_models["reflexion"] = OllamaWrapper("mock", host=host)
+    router.loaded_models["chat"] = LocalInferenceWorker(SlowLlama())
+    results = {}
+
+    # 1. Ollama bloqueante (ciclo de autonomía)
+    token = CancellationToken()
+    marks = cancel_later(token, args.cancel_after)
+    res = router.route_request("reflexion", "hola", cache=False, priority=PRIORITY_AUTONOMY, cancel_event=token)
+    results["ollama"] = report("Ollama route_request (bloqueante)", marks, time.perf_counter(), router, "ollama")
+    assert res == "", res
+
+    # 2. Ollama stream
+    token = CancellationToken()
+    marks = cancel_later(token, args.cancel_after)
+    tokens = list(router.stream_request("reflexion", "hola", cancel_event=token))
+    results["ollama_stream"] = report("Ollama stream_request", marks, time.perf_counter(), router, "ollama")
+
+    # 3. Ollama asyncio
+    async def astream():
+        token = CancellationToken()
+        marks = cancel_later(token, args.cancel_after)
+        async for _ in router.astream_request("reflexion", "hola", cancel_event=token):
+            pass
+        return marks, time.perf_counter()
+    marks, t_end = asyncio.run(astream())
+    results["ollama_async"] = report("Ollama astream_request", marks, t_end, router, "ollama")
+
+    # 4. GGUF local
+    llm = router.loaded_models["chat"].llm
+    token = CancellationToken()
+    marks = cancel_later(token, args.cancel_after)
+    res = router.route_request("chat", "hola", cache=False, priority=PRIORITY_AUTONOMY, cancel_event=token)
+    results["local"] = report("GGUF local route_request", marks, time.perf_counter(), router, "local")
+    print(f"  tokens generados: {llm.generated}/{llm.tokens}")
+
+    # 5. Espera de slot: backend saturado por un turno interactivo
+    holder = threading.Event()
+
+    def hold():
+        with router.scheduler.slot("ollama", PRIORITY_INTERACTIVE):
+            with router.scheduler.slot("ollama", PRIORITY_INTERACTIVE):
+                holder.set()
+                time.sleep(args.cancel_after * 3)
+    threading.Thread(target=hold, daemon=True).start()
+    holder.wait()
+    token = CancellationToken()
+    marks = cancel_later(token, args.cancel_after)
+    res = router.route_request("reflexion", "otra", cache=False, priority=PRIORITY_AUTONOMY, cancel_event=token)
+    t_end = time.perf_counter()
+    print(f"{'Espera de slot (scheduler)':<38} time-to-stop={(t_end - marks['t']) * 1000:7.1f}ms  "
+          f"cancelled={router.scheduler.get_metrics()['classes']['autonomy']['cancelled']}")
+
+    time.sleep(1.2) # el mock detecta el socket cerrado en su siguiente escritura
+    print(f"Streams abortados en el servidor: {SlowOllamaHandler.aborted}")
+    print(f"Sin cancelación, cada generación habría tardado {args.generation * 1000:.0f}ms")
+    assert all(v < 100 for v in results.values()), results
+    print("OK")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
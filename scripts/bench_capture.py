@@ -0,0 +1,100 @@
+"""
+Benchmark: FPS conseguidos y CPU por frame de cada backend de captura del VisionPipeline.
+
+1. Pipeline completo (hilo de captura + FrameRing + delta) sin límite de FPS con cada backend
+   disponible. Sin $DISPLAY (headless) sólo funciona el sintético; pil/mss se marcan como no
+   disponibles.
+2. Coste de conversión a BGR con datos del tamaño de pantalla, sin servidor X: lo que hace
+   cada backend con el resultado del grab (PIL.Image RGB vs buffer BGRA de mss), frente a la
+   ruta anterior (np.array + cvtColor con arrays nuevos en cada frame).
+
+Uso: python scripts/bench_capture.py [--seconds 2] [--width 1920] [--height 1080]
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import cv2
+from PIL import Image
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.vision_pipeline import VisionPipeline
+from core.capture_backends import create_backend, available_backends
+from core.frame_ring import FrameRing
+
+
+def run_pipeline(backend, seconds):
+    vp = VisionPipeline(fps=1000, capture_backend=backend)
+    vp.start()
+    time.sleep(seconds)
+    vp.stop()
+    return vp.ring.seq / seconds, vp.backend.get_stats(), vp.get_status()
+
+
+def conversion_costs(width, height, n=30):
+    rgb = np.zeros((height, width, 3), np.uint8)
+    cv2.randu(rgb, 0, 255)
+    pil_img = Image.fromarray(rgb)
+    bgra_raw = bytearray(cv2.cvtColor(rgb, cv2.COLOR_RGB2BGRA).tobytes()) # ScreenShot.raw de mss
+    ring = FrameRing(4)
+
+    def legacy():
+        return cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
+
+    def pil_backend():
+        slot = ring.acquire((height, width, 3))
+        cv2.cvtColor(np.asarray(pil_img), cv2.COLOR_RGB2BGR, dst=slot)
+        ring.commit()
+
+    def mss_backend():
+        bgra = np.frombuffer(bgra_raw, dtype=np.uint8).reshape(height, width, 4)
+        slot = ring.acquire((height, width, 3))
+        cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=slot)
+        ring.commit()
+
+    out = {}
+    for name, fn in (("anterior (np.array + cvtColor)", legacy), ("pil -> slot", pil_backend), ("mss BGRA -> slot", mss_backend)):
+        fn()
+        c0 = time.process_time()
+        for _ in range(n):
+            fn()
+        out[name] = (time.process_time() - c0) / n * 1000
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    print(f"Backends instalados: {available_backends()}")
+    print("1. Pipeline completo, sin límite de FPS")
+    results = {}
+    for name in ("mss", "pil", "synthetic"):
+        if name not in available_backends():
+            print(f"  {name:<10} no instalado")
+            continue
+        kwargs = {"width": args.width, "height": args.height} if name == "synthetic" else {}
+        backend = create_backend(name, **kwargs)
+        fps, stats, status = run_pipeline(backend, args.seconds)
+        if not stats["frames"]:
+            print(f"  {name:<10} no disponible (sin pantalla)")
+            continue
+        results[name] = fps
+        print(f"  {name:<10} {fps:7.1f} FPS  captura={stats['capture_ms']:6.2f}ms/frame  "
+              f"cpu={stats['cpu_ms']:6.2f}ms/frame  real_fps(EMA)={status['real_fps']}")
+
+    print(f"2. Conversión a BGR de un frame {args.width}x{args.height} (CPU por frame)")
+    for name, ms in conversion_costs(args.width, args.height).items():
+        print(f"  {name:<32} {ms:6.2f}ms")
+
+    assert results.get("synthetic", 0) > 5, results
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
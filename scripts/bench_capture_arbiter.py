@@ -0,0 +1,155 @@
+"""
+Benchmark: CaptureArbiter frente al mutex global (perception_lock) de antes.
+Pipeline a 5 FPS sobre un backend sintético con coste de grab simulado, mientras corren a la vez:
+- un barrido OCR de tiles 500x500 por toda la pantalla (con tiempo de OCR simulado por tile)
+- un consumidor de crops del cursor a 10 Hz
+Antes: cada región era un grab físico bajo el mismo cerrojo que la captura en vivo.
+Ahora: las regiones son crops del último frame / de una instantánea compartida.
+Mide grabs físicos, latencia de región y el mayor hueco entre ticks del pipeline; además, con
+el pipeline capturando sólo una ventana, cuántas instantáneas de pantalla necesita el barrido.
+
+Uso: python scripts/bench_capture_arbiter.py [--grab-ms 25] [--ocr-ms 40] [--window 2.5]
+"""
+import sys
+import time
+import argparse
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.vision_pipeline import VisionPipeline
+from core.capture_arbiter import CaptureArbiter
+from core.capture_backends import SyntheticCaptureBackend
+from core.frame_ring import FrameRing
+from core.frame_encoding import encode_frame
+
+W, H, TILE = 1920, 1080, 500
+
+
+class SlowBackend(SyntheticCaptureBackend):
+    """Escritorio sintético con el coste de un grab físico real (se cuenta cada uno)"""
+    def __init__(self, grab_s):
+        super().__init__(W, H)
+        self.grab_s = grab_s
+        self.ticks = []   # instantes de los grabs del hilo del pipeline
+        self.grabs = 0
+        self._lock = threading.Lock()
+
+    def _grab_into(self, bbox, ring):
+        time.sleep(self.grab_s)
+        with self._lock:
+            self.grabs += 1
+        if threading.current_thread().name == "capture":
+            self.ticks.append(time.perf_counter())
+        return super()._grab_into(bbox, ring)
+
+
+class GlobalLockArbiter(CaptureArbiter):
+    """Comportamiento anterior: cada región es un grab físico propio bajo el cerrojo global"""
+    def region_b64(self, bbox, fmt="png", quality=None, max_size=None, max_age=None):
+        self.stats["regions"] += 1
+        ring = FrameRing(2)
+        with self._device:
+            frame = self._backend().grab_into(bbox, ring)
+        return encode_frame(frame, fmt, quality, max_size)
+
+
+def ocr_sweep(arbiter, ocr_s, latencies):
+    start = time.time()
+    for y in range(0, H, TILE):
+        for x in range(0, W, TILE):
+            t0 = time.perf_counter()
+            b64 = arbiter.region_b64((x, y, min(x + TILE, W), min(y + TILE, H)), "png",
+                                     max_age=time.time() - start + arbiter.max_age)
+            latencies.append(time.perf_counter() - t0)
+            assert b64
+            time.sleep(ocr_s) # Tesseract
+
+
+def cursor_crops(arbiter, stop, latencies):
+    i = 0
+    while not stop.is_set():
+        x, y = 200 + (i * 53) % 1200, 50 + (i * 31) % 500
+        t0 = time.perf_counter()
+        assert arbiter.region_b64((x, y, x + 500, y + 500), "png")
+        latencies.append(time.perf_counter() - t0)
+        i += 1
+        time.sleep(0.1)
+
+
+def run(arbiter_cls, grab_s, ocr_s, window, target_window=None):
+    backend = SlowBackend(grab_s)
+    backend._base = backend._desktop()
+    arbiter = arbiter_cls()
+    vp = VisionPipeline(target_window=target_window, fps=5, arbiter=arbiter, capture_backend=backend)
+    vp.start()
+    vp.thread.name = "capture"
+    vp.wait_for_frame(0, timeout=2)
+    backend.grabs, backend.ticks = 0, []
+    arbiter.stats = {k: 0 for k in arbiter.stats}
+
+    ocr_lat, crop_lat = [], []
+    stop = threading.Event()
+    consumer = threading.Thread(target=cursor_crops, args=(arbiter, stop, crop_lat))
+    consumer.start()
+    t0 = time.perf_counter()
+    ocr_sweep(arbiter, ocr_s, ocr_lat)
+    sweep = time.perf_counter() - t0
+    time.sleep(max(0.0, window - sweep))
+    stop.set()
+    consumer.join()
+    vp.stop()
+    gaps = np.diff(backend.ticks) if len(backend.ticks) > 1 else np.array([0.0])
+    return {
+        "grabs": backend.grabs,
+        "regions": arbiter.stats["regions"],
+        "sweep_s": sweep,
+        "ocr_ms": np.mean(ocr_lat) * 1000,
+        "crop_p50": np.percentile(crop_lat, 50) * 1000,
+        "crop_p99": np.percentile(crop_lat, 99) * 1000,
+        "max_gap": gaps.max() * 1000,
+        "ticks": len(backend.ticks),
+        "stats": arbiter.get_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--grab-ms", type=float, default=25.0)
+    parser.add_argument("--ocr-ms", type=float, default=40.0)
+    parser.add_argument("--window", type=float, default=2.5)
+    args = parser.parse_args()
+
+    old = run(GlobalLockArbiter, args.grab_ms / 1000, args.ocr_ms / 1000, args.window)
+    new = run(CaptureArbiter, args.grab_ms / 1000, args.ocr_ms / 1000, args.window)
+
+    print(f"{'':<24} {'cerrojo global':>15} {'árbitro':>10}")
+    print(f"{'regiones servidas':<24} {old['regions']:15d} {new['regions']:10d}")
+    print(f"{'grabs físicos':<24} {old['grabs']:15d} {new['grabs']:10d}")
+    print(f"{'ticks del pipeline':<24} {old['ticks']:15d} {new['ticks']:10d}")
+    print(f"{'barrido OCR (s)':<24} {old['sweep_s']:15.2f} {new['sweep_s']:10.2f}")
+    print(f"{'tile OCR medio (ms)':<24} {old['ocr_ms']:15.1f} {new['ocr_ms']:10.1f}")
+    print(f"{'crop cursor p50 (ms)':<24} {old['crop_p50']:15.1f} {new['crop_p50']:10.1f}")
+    print(f"{'crop cursor p99 (ms)':<24} {old['crop_p99']:15.1f} {new['crop_p99']:10.1f}")
+    print(f"{'mayor hueco de captura':<24} {old['max_gap']:13.0f}ms {new['max_gap']:8.0f}ms")
+    print(f"Árbitro: {new['stats']}")
+
+    # Pipeline limitado a una ventana: los tiles de fuera salen de instantáneas compartidas
+    win = SimpleNamespace(left=60, top=50, width=1600, height=900)
+    windowed = run(CaptureArbiter, args.grab_ms / 1000, args.ocr_ms / 1000, args.window, win)
+    stats = windowed["stats"]
+    print(f"Con ventana {win.width}x{win.height}: {stats['regions']} regiones, {stats['from_pipeline']} del frame en vivo, "
+          f"{stats['from_snapshot']} de {stats['snapshots']} instantánea(s); barrido OCR {windowed['sweep_s']:.2f}s")
+
+    assert new["stats"]["snapshots"] == 0                # pantalla completa en el pipeline: todo son crops
+    assert new["grabs"] - new["ticks"] < old["grabs"] - old["ticks"]
+    assert new["crop_p50"] < old["crop_p50"]
+    assert stats["misses"] == 0 and stats["snapshots"] <= args.window / 0.5 + 2  # no un grab por tile
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: mapa de tiles sucios del VisionPipeline.
+- Coste por frame del mapa (32x32) sobre el absdiff ya calculado
+- Cursor parpadeando vs diálogo abierto vs cambio de página: delta global vs regiones
+- Bytes enviados al VLM: frame completo vs miniatura + crops de lo que cambió
+
+Uso: python scripts/bench_dirty_tiles.py [--width 1920] [--height 1080] [--tile 32]
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import cv2
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.vision_pipeline import VisionPipeline
+from core.dirty_tiles import DirtyTileMap
+from core.capture_backends import SyntheticCaptureBackend
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--tile", type=int, default=32)
+    args = parser.parse_args()
+
+    page = SyntheticCaptureBackend(args.width, args.height)._desktop()
+    cursor_on = page.copy()
+    cv2.rectangle(cursor_on, (400, 300), (401, 320), (0, 0, 0), -1)           # cursor de texto
+    dialog = page.copy()
+    cv2.rectangle(dialog, (700, 400), (1100, 650), (210, 200, 190), -1)      # diálogo modal
+    cv2.putText(dialog, "Guardar cambios?", (740, 480), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    other_page = cv2.bitwise_not(page)                                        # cambio de página
+
+    # 1. Coste del mapa
+    diff = cv2.absdiff(page, dialog)
+    tiles = DirtyTileMap(args.tile)
+    tiles.update(diff)
+    n = 50
+    t0 = time.perf_counter()
+    for _ in range(n):
+        tiles.update(diff)
+        tiles._regions = None
+        tiles.regions()
+    cost = (time.perf_counter() - t0) / n * 1000
+    th, tw = tiles.scores.shape
+    print(f"Mapa {tw}x{th} tiles de {args.tile}px sobre {args.width}x{args.height}: {cost:.2f}ms/frame (update + regiones)")
+
+    # 2. Escenarios
+    vp = VisionPipeline(tile_size=args.tile)
+    print(f"{'escenario':<18} {'delta global':>12} {'tiles sucios':>13} regiones")
+    results = {}
+    for name, a, b in (("cursor parpadea", page, cursor_on), ("diálogo", page, dialog), ("cambio de página", page, other_page)):
+        vp._update_buffer(a)
+        vp._update_buffer(b)
+        status = vp.get_status()
+        _, regions = vp.get_dirty_regions()
+        results[name] = (status, regions)
+        print(f"{name:<18} {status['delta_score']:12.5f} {status['dirty_ratio']:12.2%}  "
+              f"{[r['bbox'] for r in regions[:3]]}{' ...' if len(regions) > 3 else ''}")
+
+    cursor_regions = results["cursor parpadea"][1]
+    assert len(cursor_regions) == 1 and cursor_regions[0]["tiles"] <= 2, cursor_regions
+    dialog_box = results["diálogo"][1][0]["bbox"]
+    assert dialog_box[0] <= 700 and dialog_box[2] >= 1100 and dialog_box[1] <= 400 and dialog_box[3] >= 650, dialog_box
+    assert results["cambio de página"][0]["dirty_ratio"] > 0.5
+
+    # 3. Bytes al VLM con el diálogo (cambio localizado)
+    vp._update_buffer(page)
+    vp._update_buffer(dialog)
+    _, full = vp.get_encoded("jpeg", 80)
+    _, thumb = vp.get_encoded("jpeg", 70, max_size=512)
+    crops = vp.get_dirty_crops("jpeg", 85, max_regions=2, max_size=768)
+    sent = len(thumb) + sum(len(c["image"]) for c in crops)
+    print(f"VLM: frame completo {len(full) / 1024:.0f}KB vs miniatura + {len(crops)} crop(s) {sent / 1024:.0f}KB")
+    assert sent < len(full)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
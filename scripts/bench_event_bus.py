@@ -0,0 +1,173 @@
+"""
+Benchmark: difusión de eventos orquestador -> WebSocket con EventBus frente a una corrutina
+run_coroutine_threadsafe por evento (thread_safe_emit de antes).
+Carga durante --seconds desde tres hilos (como el bucle de autonomía): vision_frame de ~--frame-kb
+KB a 30 Hz, visual_log a 300/s y tokens de thought_stream a 1000/s; al final un chat_response.
+El ConnectionManager real de server/api.py difunde a --clients sockets simulados.
+Mide coste de emitir en el hilo productor, retraso del event loop, frames serializados,
+entrega completa y en orden de los temas sin pérdida, y tiempo hasta vaciar lo pendiente.
+
+Los sockets simulados escriben a --client-mbps: si no dan abasto con los frames, con una
+corrutina por evento se acumulan (y los envíos concurrentes pueden desordenarse).
+
+Uso: python scripts/bench_event_bus.py [--seconds 3] [--clients 2] [--frame-kb 300] [--client-mbps 50]
+"""
+import sys
+import time
+import asyncio
+import argparse
+import threading
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.event_bus import EventBus
+from server.api import ConnectionManager, broadcast_batch
+import server.api as api
+
+
+class FakeSocket:
+    """WebSocket simulado: envío a mbps (cede el loop mientras "escribe"); anota lo recibido"""
+    def __init__(self, mbps):
+        self.bytes_s = mbps * 125000
+        self.received = {}
+        self.frames = 0
+
+    async def send_text(self, data):
+        await asyncio.sleep(len(data) / self.bytes_s) # el envío real cede el loop
+        if data.startswith('{"type":"vision_frame"'):
+            self.frames += 1
+            return
+        kind = data[9:data.index('"', 9)]
+        if kind in ("visual_log", "thought_stream", "chat_response"):
+            n = int(data[data.index('"n":') + 4:data.index("}", data.index('"n":'))])
+            self.received.setdefault(kind, []).append(n)
+
+
+def producers(emit, seconds, frame_kb):
+    frame = "A" * (frame_kb * 1024)
+    stop = time.perf_counter() + seconds
+    emit_cost = []
+
+    def timed(topic, payload):
+        t0 = time.perf_counter()
+        emit(topic, payload)
+        emit_cost.append(time.perf_counter() - t0)
+
+    def loop(topic, rate, make):
+        i = 0
+        while time.perf_counter() < stop:
+            timed(topic, make(i))
+            i += 1
+            time.sleep(1.0 / rate)
+        return i
+
+    counts = {}
+    specs = [("vision_frame", 30, lambda i: {"image": frame, "n": i}),
+             ("visual_log", 300, lambda i: {"msg": f"⚡ AUTONOMY EXEC: click {i}", "n": i}),
+             ("thought_stream", 1000, lambda i: {"token": "tok", "n": i})]
+    threads = [threading.Thread(target=lambda s=s: counts.__setitem__(s[0], loop(*s))) for s in specs]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    timed("chat_response", {"content": "fin", "n": 0})
+    counts["chat_response"] = 1
+    return counts, emit_cost
+
+
+def run(mode, args):
+    api.manager = manager = ConnectionManager() # broadcast_batch difunde con api.manager
+    sockets = [FakeSocket(args.client_mbps) for _ in range(args.clients)]
+    loop = asyncio.new_event_loop()
+    lag = []
+    bus = EventBus()
+
+    async def probe():
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag.append(time.perf_counter() - t0 - 0.005)
+
+    def serve():
+        asyncio.set_event_loop(loop)
+        loop.call_soon(lambda: [manager.attach(s) for s in sockets])
+        loop.create_task(probe())
+        if mode == "bus":
+            loop.create_task(bus.run(broadcast_batch))
+        loop.run_forever()
+
+    server = threading.Thread(target=serve, daemon=True)
+    server.start()
+    time.sleep(0.1)
+
+    if mode == "bus":
+        emit = bus.post
+    else:
+        emit = lambda t, p: asyncio.run_coroutine_threadsafe(manager.broadcast({"type": t, "payload": p}), loop)
+
+    cpu0 = time.process_time()
+    counts, emit_cost = producers(emit, args.seconds, args.frame_kb)
+    t_end = time.perf_counter()
+    expected = {k: v for k, v in counts.items() if k != "vision_frame"}
+    while any(len(s.received.get(k, [])) < v for s in sockets for k, v in expected.items()):
+        if time.perf_counter() - t_end > 60:
+            break
+        time.sleep(0.005)
+    drain = time.perf_counter() - t_end
+    cpu = time.process_time() - cpu0
+
+    async def shutdown():
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        loop.stop()
+    asyncio.run_coroutine_threadsafe(shutdown(), loop)
+    server.join()
+
+    ordered = all(s.received.get(k, []) == list(range(v)) for s in sockets for k, v in expected.items())
+    return {
+        "emit_p99_us": np.percentile(emit_cost, 99) * 1e6,
+        "lag_p99_ms": np.percentile(lag, 99) * 1000,
+        "lag_max_ms": max(lag) * 1000,
+        "frames_posted": counts["vision_frame"],
+        "frames_sent": sockets[0].frames,
+        "ordered": ordered,
+        "drain_ms": drain * 1000,
+        "cpu_s": cpu,
+        "stats": bus.get_stats() if mode == "bus" else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--frame-kb", type=int, default=300)
+    parser.add_argument("--client-mbps", type=float, default=50.0)
+    args = parser.parse_args()
+
+    old = run("per-event", args)
+    new = run("bus", args)
+    print(f"{'':<32} {'corrutina/evento':>17} {'EventBus':>10}")
+    print(f"{'emitir p99 (µs, hilo productor)':<32} {old['emit_p99_us']:17.1f} {new['emit_p99_us']:10.1f}")
+    print(f"{'retraso del loop p99 (ms)':<32} {old['lag_p99_ms']:17.2f} {new['lag_p99_ms']:10.2f}")
+    print(f"{'retraso del loop máx (ms)':<32} {old['lag_max_ms']:17.2f} {new['lag_max_ms']:10.2f}")
+    print(f"{'vision_frame emitidos/enviados':<32} {old['frames_posted']:>8}/{old['frames_sent']:<8} "
+          f"{new['frames_posted']:>5}/{new['frames_sent']:<4}")
+    print(f"{'temas ordenados completos y en orden':<32} {str(old['ordered']):>13} {str(new['ordered']):>10}")
+    print(f"{'vaciado tras la carga (ms)':<32} {old['drain_ms']:17.1f} {new['drain_ms']:10.1f}")
+    print(f"{'CPU (s)':<32} {old['cpu_s']:17.2f} {new['cpu_s']:10.2f}")
+    print(f"EventBus: {new['stats']}")
+
+    assert new["ordered"]
+    assert new["frames_sent"] <= new["frames_posted"]
+    assert new["stats"]["batches"] < new["stats"]["delivered"]   # lotes, no una corrutina por evento
+    assert new["stats"]["overflowed"] == 0
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
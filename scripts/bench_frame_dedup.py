@@ -0,0 +1,124 @@
+"""
+Benchmark: deduplicación perceptual de frames antes del VLM.
+Secuencia sintética de escritorio: cursor parpadeando y reloj que cambia (ruido) con cambios
+reales intercalados (diálogo, cambio de página, menú). Un VLM simulado cuenta las inferencias.
+- Distancia de Hamming de cada tipo de cambio (dhash / phash)
+- Barrido de umbral: skip rate y cambios reales perdidos
+- Coste del hash por frame
+
+Uso: python scripts/bench_frame_dedup.py [--frames 120] [--width 1920] [--height 1080]
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import cv2
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.vision_pipeline import VisionPipeline
+from core.frame_hash import FrameHashIndex, HASHES, hamming
+from core.capture_backends import SyntheticCaptureBackend
+
+
+def make_frames(width, height, n):
+    """[(frame, cambio_real)]: escritorio con ruido y un cambio real cada 30 frames"""
+    page = SyntheticCaptureBackend(width, height)._desktop()
+    dialog = page.copy()
+    cv2.rectangle(dialog, (700, 400), (1100, 650), (210, 200, 190), -1)
+    cv2.putText(dialog, "Guardar cambios?", (740, 480), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    other_page = cv2.bitwise_not(page)
+    menu = other_page.copy()
+    cv2.rectangle(menu, (40, 60), (360, 520), (245, 245, 245), -1)          # menú desplegable
+    scenes = [page, dialog, other_page, menu]
+    frames = []
+    for i in range(n):
+        scene = scenes[(i // 30) % len(scenes)]
+        f = scene.copy()
+        if i % 2:  # cursor de texto
+            cv2.rectangle(f, (400, 300), (401, 320), (0, 0, 0), -1)
+        cv2.putText(f, f"12:{i // 10:02d}", (width - 110, height - 15), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        frames.append((f, i % 30 == 0))
+    return frames
+
+
+class MockVLM:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, seq):
+        self.calls += 1
+        time.sleep(0.001)
+        return f"análisis del frame {seq} [[ACTION: click 500 500]]"
+
+
+def run(frames, kind, threshold):
+    """Mismo flujo que Orchestrator._analyze_frame_once sobre el VisionPipeline"""
+    vp = VisionPipeline(analyzed_index=FrameHashIndex(threshold=threshold, kind=kind))
+    vlm = MockVLM()
+    missed = 0
+    context = ("reflex", "prompt", False, 5, "Escritorio")
+    for frame, real in frames:
+        vp._update_buffer(frame)
+        vp.get_latest_frame(force=True)
+        fhash = vp.frame_hash(vp.delivered_seq)
+        res, _ = vp.analyzed.lookup(fhash, context)
+        if res is None:
+            res = vlm(vp.delivered_seq)
+            vp.analyzed.store(fhash, context, res)
+        elif real:
+            missed += 1
+    return vlm.calls, missed, vp.get_status()["dedup"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    frames = make_frames(args.width, args.height, max(args.frames, 91))
+    real_changes = sum(1 for _, real in frames if real)
+
+    # 1. Distancias por tipo de cambio
+    page, cursor, clock = frames[0][0], frames[1][0], frames[10][0]
+    dialog, other, menu = frames[30][0], frames[60][0], frames[90][0]
+    print(f"{'cambio':<18} {'dhash':>6} {'phash':>6}")
+    dist = {}
+    pairs = (("cursor", page, cursor), ("reloj", page, clock), ("diálogo", page, dialog),
+             ("cambio de página", page, other), ("menú", other, menu))
+    for name, a, b in pairs:
+        d = {k: hamming(h(a), h(b)) for k, h in HASHES.items()}
+        dist[name] = d
+        print(f"{name:<18} {d['dhash']:6d} {d['phash']:6d}")
+
+    # 2. Coste del hash
+    for kind, h in HASHES.items():
+        t0 = time.perf_counter()
+        for _ in range(50):
+            h(page)
+        print(f"{kind}: {(time.perf_counter() - t0) / 50 * 1000:.2f}ms/frame ({args.width}x{args.height})")
+
+    # 3. Barrido de umbral
+    print(f"\n{len(frames)} frames, {real_changes} cambios reales; sin deduplicación = {len(frames)} llamadas al VLM")
+    print(f"{'hash':<6} {'umbral':>6} {'llamadas':>9} {'skip rate':>10} {'perdidos':>9}")
+    default = None
+    for kind in HASHES:
+        for threshold in (0, 2, 4, 8, 16, 32):
+            calls, missed, stats = run(frames, kind, threshold)
+            print(f"{kind:<6} {threshold:6d} {calls:9d} {stats['skip_rate']:10.1%} {missed:9d}")
+            if kind == "dhash" and threshold == 4:
+                default = (calls, missed, stats)
+
+    calls, missed, stats = default
+    print(f"\nPor defecto (dhash, umbral 4): {calls} llamadas, skip rate {stats['skip_rate']:.1%}")
+    assert all(dist[n][k] <= 4 for n in ("cursor", "reloj") for k in HASHES)
+    assert all(dist[n][k] > 4 for n in ("diálogo", "cambio de página", "menú") for k in HASHES)
+    assert missed == 0                      # ningún cambio real se sirve desde la cache
+    assert calls <= real_changes + 1        # el ruido no dispara inferencias
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: codificación de un mismo frame por todos sus consumidores.
+Antes: get_latest_frame (JPEG), crop del cursor (PNG), miniatura del stream (JPEG 1024),
+process_input (PNG) y _finalize_response/CORTEX (PNG otra vez) codificaban cada uno su copia.
+Después: FrameEncodingCache del VisionPipeline, una codificación por variante y frame.
+
+Uso: python scripts/bench_frame_encoding.py [--width 1920] [--height 1080] [--frames 20]
+"""
+import io
+import sys
+import time
+import base64
+import argparse
+import threading
+from pathlib import Path
+
+import numpy as np
+import cv2
+from PIL import Image
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.vision_pipeline import VisionPipeline
+
+
+def desktop_frame(width, height, i):
+    """Frame BGR con aspecto de escritorio: fondo plano, ventanas, texto y un cursor que se mueve"""
+    frame = np.full((height, width, 3), (48, 40, 36), np.uint8)
+    cv2.rectangle(frame, (80, 60), (width - 300, height - 120), (245, 245, 245), -1)
+    cv2.rectangle(frame, (80, 60), (width - 300, 100), (120, 80, 30), -1)
+    for row in range(20):
+        cv2.putText(frame, f"linea {row} del documento abierto en la ventana {i}", (100, 140 + row * 40),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (20, 20, 20), 2)
+    x, y = 200 + (i * 53) % (width - 400), 200 + (i * 31) % (height - 400)
+    cv2.circle(frame, (x, y), 12, (0, 0, 255), -1)
+    return frame
+
+
+def pil_b64(img, fmt, **kw):
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **kw)
+    return base64.b64encode(buf.getvalue()).decode('utf-8')
+
+
+def legacy_consumers(frame):
+    """Lo que hacía cada consumidor con su propia captura PIL"""
+    _, buf = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 80]) # get_latest_frame
+    base64.b64encode(buf).decode('utf-8')
+    img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    pil_b64(img.crop((700, 300, 1200, 800)), "PNG")                           # crop del cursor
+    thumb = img.copy()
+    thumb.thumbnail((1024, 1024))
+    pil_b64(thumb, "JPEG", quality=80)                                        # stream / cortex
+    pil_b64(img, "PNG")                                                       # process_input
+    pil_b64(img, "PNG")                                                       # _finalize_response
+
+
+def cached_consumers(vp):
+    vp.get_latest_frame(force=True)
+    vp.get_encoded("png", crop=(700, 300, 1200, 800))
+    vp.get_encoded("jpeg", 80, max_size=1024)
+    vp.get_encoded("png")
+    vp.get_encoded("png")      # _finalize_response reutiliza la lista b64
+    vp.get_encoded("jpeg", 80, max_size=1024) # /cortex y reflexión: misma variante que el stream
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--frames", type=int, default=20)
+    args = parser.parse_args()
+    frames = [desktop_frame(args.width, args.height, i) for i in range(args.frames)]
+
+    legacy_consumers(frames[0]) # calentamiento
+    t0 = time.perf_counter()
+    for f in frames:
+        legacy_consumers(f)
+    legacy = (time.perf_counter() - t0) / len(frames) * 1000
+
+    vp = VisionPipeline()
+    t0 = time.perf_counter()
+    for f in frames:
+        vp._update_buffer(f)
+        cached_consumers(vp)
+    cached = (time.perf_counter() - t0) / len(frames) * 1000
+    stats = vp.encodings.get_stats()
+    print(f"Antes      : {legacy:7.1f}ms de codificación por frame (5 codificaciones)")
+    print(f"Encode-once: {cached:7.1f}ms por frame  encodes={stats['encodes']} hits={stats['hits']} "
+          f"reutilización={stats['reuse_ratio']:.0%}")
+
+    # Consumidores simultáneos del mismo frame: una sola codificación
+    vp._update_buffer(desktop_frame(args.width, args.height, 999))
+    before = vp.encodings.stats["encodes"]
+    results = []
+    ts = [threading.Thread(target=lambda: results.append(vp.get_encoded("png")[1])) for _ in range(8)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    assert vp.encodings.stats["encodes"] - before == 1 and len(set(results)) == 1
+    print(f"8 hilos pidiendo el mismo PNG: 1 codificación, coalesced={vp.encodings.stats['coalesced']}")
+
+    # Variantes correctas
+    _, thumb = vp.get_encoded("jpeg", 80, max_size=1024)
+    img = Image.open(io.BytesIO(base64.b64decode(thumb)))
+    assert max(img.size) == 1024, img.size
+    assert cached < legacy
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
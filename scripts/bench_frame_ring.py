@@ -0,0 +1,149 @@
+"""
+Benchmark: asignaciones y churn de memoria del buffer de VisionPipeline.
+Antes: cada captura crea un array BGR nuevo (+ el de absdiff) y el bucle de reflejos copia el
+frame completo en cada iteración (50 ms) antes de pasarlo a RGB/PIL.
+Después: FrameRing preasignado, vistas de sólo lectura y buffers reutilizados.
+
+Simula capturas a --fps y un consumidor de reflejos a --reflex-hz sobre frames sintéticos
+(sin escritorio): mide los bytes numpy/cv2 pedidos por frame (tracemalloc, pico por llamada),
+fallos de página menores (memoria recién mapeada) y tiempo de CPU. Las imágenes PIL usan su
+propio allocator y no cuentan en ninguno de los dos casos.
+
+Uso: python scripts/bench_frame_ring.py [--width 1920] [--height 1080] [--frames 60]
+"""
+import sys
+import time
+import argparse
+import resource
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import cv2
+from PIL import Image
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.vision_pipeline import VisionPipeline
+
+
+class LegacyBuffer:
+    """Réplica del buffer anterior: arrays nuevos por captura y copia en get_current_cv"""
+    def __init__(self):
+        self.current_frame = None
+        self.last_frame = None
+        self.delta_score = 0.0
+
+    def capture(self, rgb):
+        new_frame = cv2.cvtColor(np.array(rgb), cv2.COLOR_RGB2BGR)
+        if self.current_frame is not None:
+            self.last_frame = self.current_frame
+            diff = cv2.absdiff(self.last_frame, new_frame)
+            self.delta_score = np.mean(diff) / 255.0
+        self.current_frame = new_frame
+
+    def reflex(self):
+        cv_frame = self.current_frame.copy()
+        return Image.fromarray(cv2.cvtColor(cv_frame, cv2.COLOR_BGR2RGB))
+
+
+class RingBuffer:
+    """Camino nuevo: captura sobre el slot del anillo, reflejo sólo con frames nuevos"""
+    def __init__(self):
+        self.vp = VisionPipeline()
+        self.seq = 0
+        self.rgb = None
+
+    def capture(self, rgb):
+        slot = self.vp.ring.acquire(rgb.shape)
+        cv2.cvtColor(np.asarray(rgb), cv2.COLOR_RGB2BGR, dst=slot)
+        self.vp._update_buffer(slot)
+
+    def reflex(self):
+        seq, cv_frame = self.vp.get_frame()
+        if seq == self.seq:
+            return None
+        if self.rgb is None:
+            self.rgb = np.empty_like(cv_frame)
+        cv2.cvtColor(cv_frame, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        self.seq = seq
+        return Image.fromarray(self.rgb)
+
+
+def source_frames(width, height, count):
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        f = base.copy()
+        f[(i * 37) % height:(i * 37) % height + 40, :200] = i % 255 # "cursor" que se mueve
+        frames.append(f)
+    return frames
+
+
+def _transient(fn, *args):
+    """Bytes pedidos por fn por encima de lo que había antes (pico de tracemalloc)"""
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    fn(*args)
+    return tracemalloc.get_traced_memory()[1] - before
+
+
+def run(impl, frames, reads_per_frame):
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    transient = 0
+    flt0 = resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+    cpu0 = time.process_time()
+    for rgb in frames:
+        transient += _transient(impl.capture, rgb)
+        for _ in range(reads_per_frame):
+            transient += _transient(impl.reflex)
+    cpu = time.process_time() - cpu0
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt - flt0
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n = len(frames)
+    return {
+        "mb_per_frame": transient / n / 1048576,
+        "faults_per_frame": faults / n,
+        "ms_per_frame": cpu / n * 1000,
+        "retained_mb": (current - base) / 1048576,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--fps", type=float, default=5)
+    parser.add_argument("--reflex-hz", type=float, default=20)
+    args = parser.parse_args()
+
+    frames = source_frames(args.width, args.height, args.frames)
+    reads = max(1, int(args.reflex_hz / args.fps))
+    frame_mb = args.width * args.height * 3 / 1048576
+    print(f"Frame {args.width}x{args.height} BGR = {frame_mb:.1f}MB, {args.fps:g} fps, reflejo a {args.reflex_hz:g} Hz ({reads} lecturas/frame)")
+
+    run(LegacyBuffer(), frames[:3], reads) # calentamiento de cv2/PIL
+    results = {}
+    for name, impl in (("Antes (copias)", LegacyBuffer()), ("FrameRing    ", RingBuffer())):
+        r = results[name] = run(impl, frames, reads)
+        print(f"{name}: {r['mb_per_frame']:6.1f}MB asignados/frame ({r['mb_per_frame'] * args.fps:6.1f}MB/s)  "
+              f"fallos de página={r['faults_per_frame']:7.0f}/frame  cpu={r['ms_per_frame']:6.1f}ms/frame  "
+              f"retenido={r['retained_mb']:.1f}MB")
+
+    ring = impl.vp.ring
+    print(f"Anillo: {ring.get_stats()}")
+    seq, view = impl.vp.get_frame()
+    assert not view.flags.writeable and view.base is not None
+    assert ring.wait_for(seq, timeout=0.01) == (None, None)
+    assert ring.allocations == ring.size
+    old, new = results["Antes (copias)"], results["FrameRing    "]
+    print(f"Churn: {old['mb_per_frame']:.1f} -> {new['mb_per_frame']:.1f} MB/frame")
+    assert new["mb_per_frame"] < old["mb_per_frame"]
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
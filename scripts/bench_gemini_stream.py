@@ -0,0 +1,131 @@
+"""
+Banco de pruebas de GeminiWrapper contra un servidor SSE local que imita streamGenerateContent.
+Comprueba el parseo incremental (eventos partidos, comentarios, varios 'data:'), compara el
+tiempo hasta el primer token con la respuesta bloqueante y mide lo que tarda en parar al
+activar el interrupt_signal.
+
+Uso: python scripts/bench_gemini_stream.py [--chunks 20] [--delay 0.05]
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.router import GeminiWrapper
+from core.http_pool import HTTPSessionPool
+from core.cancellation import CancellationToken
+
+
+class MockGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    chunks = 20
+    delay = 0.05
+    aborted = 0 # streams cortados por el cliente
+
+    def log_message(self, *args):
+        pass
+
+    def _words(self):
+        return [f"palabra{i} " for i in range(self.chunks)]
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        assert payload["system_instruction"]["parts"][0]["text"] == "Eres ARAFURA."
+        if ":streamGenerateContent" in self.path:
+            assert "alt=sse" in self.path
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                self._chunk(b": keep-alive\n\n")
+                for i, word in enumerate(self._words()):
+                    time.sleep(self.delay)
+                    event = json.dumps({"candidates": [{"content": {"role": "model", "parts": [{"text": word}]}}]})
+                    if i % 3 == 0:
+                        # Evento en dos líneas 'data:' (el cliente las une con \n) y en dos chunks TCP
+                        half = event.index("[")
+                        self._chunk(f"data: {event[:half]}\n".encode())
+                        self._chunk(f"data: {event[half:]}\n\n".encode())
+                    else:
+                        self._chunk(f"data: {event}\r\n\r\n".encode())
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                MockGeminiHandler.aborted += 1
+        else:
+            time.sleep(self.delay * self.chunks)
+            body = json.dumps({"candidates": [{"content": {"parts": [{"text": "".join(self._words())}]}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def _chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.05)
+    args = parser.parse_args()
+    MockGeminiHandler.chunks, MockGeminiHandler.delay = args.chunks, args.delay
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockGeminiHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}/v1beta"
+
+    gemini = GeminiWrapper("gemini-mock", api_key="test", http_pool=HTTPSessionPool(), api_base=base)
+    msgs = [{"role": "system", "content": "Eres ARAFURA."}, {"role": "user", "content": "hola"}]
+    expected = "".join(f"palabra{i} " for i in range(args.chunks))
+
+    # 1. Bloqueante
+    t0 = time.perf_counter()
+    full = gemini.create_chat_completion(msgs)['choices'][0]['message']['content']
+    blocking = (time.perf_counter() - t0) * 1000
+    assert full == expected, full
+
+    # 2. Stream síncrono
+    t0 = time.perf_counter()
+    ttft, tokens = None, []
+    for tok in gemini.stream_chat_completion(msgs):
+        if ttft is None:
+            ttft = (time.perf_counter() - t0) * 1000
+        tokens.append(tok)
+    assert "".join(tokens) == expected, tokens
+    print(f"Bloqueante: primer texto a {blocking:7.1f}ms")
+    print(f"SSE       : primer token a {ttft:7.1f}ms  ({len(tokens)} fragmentos)")
+
+    # 3. Stream asyncio
+    async def astream():
+        return [tok async for tok in gemini.astream_chat_completion(msgs)]
+    assert "".join(asyncio.run(astream())) == expected
+
+    # 4. Cancelación (interrupt_signal)
+    interrupt = CancellationToken() # mismo tipo que SystemState.interrupt_signal
+    tokens = []
+    t_cancel = None
+    for tok in gemini.stream_chat_completion(msgs, cancel_event=interrupt):
+        tokens.append(tok)
+        if len(tokens) == 3:
+            t_cancel = time.perf_counter()
+            interrupt.set()
+    stop = (time.perf_counter() - t_cancel) * 1000
+    assert len(tokens) == 3, tokens
+    time.sleep(args.delay * 4) # el servidor detecta el socket cerrado en sus siguientes escrituras
+    print(f"Cancelación: parada en {stop:.1f}ms tras interrupt_signal, streams abortados en servidor={MockGeminiHandler.aborted}")
+    print("OK")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: urllib.urlopen (una conexión por llamada) vs HTTPSessionPool (keep-alive).
+Levanta un mock local de Ollama (/api/chat, stream y no-stream) y mide p50/p99.
+
+Uso: python scripts/bench_http_pool.py [--requests 500] [--threads 4]
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+import statistics
+import urllib.request
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.http_pool import HTTPSessionPool
+from core.router import OllamaWrapper
+
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive como el Ollama real
+    disable_nagle_algorithm = True # Go (Ollama) usa TCP_NODELAY por defecto
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = json.dumps({"models": [{"name": "mock:latest"}]}).encode('utf-8')
+        self._send(body, "application/json")
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if payload.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for tok in ["Hola", " desde", " el", " mock"]:
+                self._chunk(json.dumps({"message": {"content": tok}, "done": False}).encode('utf-8') + b"\n")
+            self._chunk(json.dumps({"message": {"content": ""}, "done": True}).encode('utf-8') + b"\n")
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            body = json.dumps({"message": {"role": "assistant", "content": "ok"}, "done": True}).encode('utf-8')
+            self._send(body, "application/json")
+
+    def _send(self, body, ctype):
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+
+
+def start_mock_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockOllamaHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def legacy_call(url, payload):
+    """Ruta previa: urlopen abre y cierra un socket por petición."""
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(req) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+
+def run(label, fn, n, threads):
+    latencies = []
+    lock = threading.Lock()
+    per_thread = n // threads
+
+    def worker():
+        local = []
+        for _ in range(per_thread):
+            t0 = time.perf_counter()
+            fn()
+            local.append((time.perf_counter() - t0) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    t0 = time.perf_counter()
+    ts = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    wall = time.perf_counter() - t0
+
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:<28} n={len(latencies):<5} p50={p50:7.3f}ms  p99={p99:7.3f}ms  rps={len(latencies) / wall:8.1f}")
+    return p50, p99
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    server, host = start_mock_server()
+    url = f"{host}/api/chat"
+    payload = {"model": "mock", "messages": [{"role": "user", "content": "hi"}], "stream": False}
+
+    pool = HTTPSessionPool(pool_size=args.threads)
+    wrapper = OllamaWrapper("mock", host=host, http_pool=pool)
+    msgs = [{"role": "user", "content": "hi"}]
+
+    print(f"Mock Ollama en {host} | {args.requests} peticiones, {args.threads} hilos\n")
+    base = run("urlopen (legacy)", lambda: legacy_call(url, payload), args.requests, args.threads)
+    pooled = run("HTTPSessionPool", lambda: wrapper.create_chat_completion(msgs), args.requests, args.threads)
+    run("HTTPSessionPool (stream)", lambda: list(wrapper.stream_chat_completion(msgs)), args.requests, args.threads)
+
+    print(f"\nAhorro p50: {base[0] - pooled[0]:+.3f}ms | Ahorro p99: {base[1] - pooled[1]:+.3f}ms")
+    print("Pool metrics:", json.dumps(pool.get_metrics(), indent=2))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Benchmark: grabación y replay determinista de una sesión de percepción (headless).
+1. "Sesión en vivo": escritorio sintético 1920x1080 a --fps (reposo con cursor parpadeando,
+   escritura, diálogo, scroll y escena de juego) por el VisionPipeline + ReflexController;
+   FrameRecorder graba frames, timestamps y los eventos emitidos (señal del reflejo, análisis)
+2. Tamaño del .arec frente a los frames crudos y coste de grabación por frame
+3. Replay con ReplayCaptureBackend sin pausas: pipeline (diff + tiles), reflejo, hash
+   perceptual/dedup y el paso de visión del ciclo de autonomía (JPEG o crops de lo que cambió,
+   VLM simulado). Throughput, latencia por etapa y aceleración frente al tiempo real
+4. Determinismo: frames idénticos a los originales (sin pérdida) y mismos eventos en dos replays;
+   y el backend replay también funciona dentro del hilo normal del pipeline
+
+Uso: python scripts/bench_perception_replay.py [--frames 300] [--fps 15] [--keyframe-interval 120]
+"""
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import cv2
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.vision_pipeline import VisionPipeline
+from core.nervous_system import ReflexController
+from core.capture_backends import CaptureBackend, SyntheticCaptureBackend, create_backend
+from core.frame_recording import FrameRecorder, FrameRecording, ReplayCaptureBackend
+
+W, H = 1920, 1080
+CONTEXT = ("autonomy", "prompt", False, 5)
+
+
+class SessionScript:
+    """Escritorio sintético determinista: frame(i) según la escena de esa parte de la sesión"""
+    def __init__(self, n):
+        self.n = n
+        desktop = SyntheticCaptureBackend(W, H)
+        self.page = desktop._desktop()
+        desktop.height = 2 * H
+        self.document = desktop._desktop() # documento largo para el scroll
+        self.dialog = self.page.copy()
+        cv2.rectangle(self.dialog, (700, 400), (1100, 650), (210, 200, 190), -1)
+        cv2.putText(self.dialog, "Guardar cambios?", (740, 480), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+
+    def scene(self, i):
+        return ("idle", "typing", "dialog", "scroll", "game")[min(4, i * 5 // self.n)]
+
+    def frame(self, i):
+        scene, n = self.scene(i), self.n
+        if scene == "idle":
+            f = self.page.copy()
+            if (i // 8) % 2:
+                cv2.rectangle(f, (400, 300), (402, 322), (0, 0, 0), -1) # cursor de texto
+        elif scene == "typing":
+            f = self.page.copy()
+            typed = "abcdefghijklmnopqrstuvwxyz " * 4
+            k = i - n // 5
+            cv2.putText(f, typed[:k], (80, 970), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (20, 20, 20), 2)
+        elif scene == "dialog":
+            f = self.dialog.copy()
+            if i % 6 < 3:
+                cv2.rectangle(f, (900, 580), (1060, 630), (230, 160, 60), -1) # hover del botón
+        elif scene == "scroll":
+            y = min(H, (i - 3 * n // 5) * 12)
+            f = self.document[y:y + H].copy()
+        else:
+            f = np.full((H, W, 3), (30, 30, 30), np.uint8)
+            for b in range(6):
+                x, y = (i * (17 + 9 * b) + 300 * b) % (W - 80), (i * (11 + 5 * b) + 150 * b) % (H - 80)
+                f[y:y + 80, x:x + 80] = (40 * b, 255 - 30 * b, 120)
+            if i % 20 == 0:
+                f[:] = cv2.add(f, (120, 120, 120, 0)) # destello
+        cv2.putText(f, f"12:{i // 30:02d}", (W - 110, H - 15), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        return f
+
+
+class ScriptBackend(CaptureBackend):
+    """Pantalla "en vivo" de la sesión sintética (un frame del guion por grab)"""
+    name = "script"
+
+    def __init__(self, script):
+        super().__init__()
+        self.script = script
+        self.index = -1
+
+    def _grab_into(self, bbox, ring):
+        if self.index + 1 >= self.script.n:
+            return None
+        self.index += 1
+        src = self.script.frame(self.index)
+        slot = ring.acquire(src.shape)
+        np.copyto(slot, src)
+        return slot
+
+
+class MockVLM:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, images):
+        self.calls += 1
+        return f"análisis {self.calls} [[ACTION: click 500 500]]"
+
+
+def perceive(vp, reflex, vlm, emit, timings):
+    """Un frame por la percepción completa: reflejo (nivel 0) y paso de visión de la autonomía (nivel 2)"""
+    t0 = time.perf_counter()
+    seq, frame = vp.get_frame()
+    signal = reflex.process_frame(frame, "OBSERVATION")
+    emit("reflex", {"seq": seq, "signal": signal})
+    t1 = time.perf_counter()
+
+    b64, changed = vp.get_latest_frame()
+    t2 = time.perf_counter()
+    if b64 is None:
+        timings.append((t1 - t0, 0.0, 0.0, 0.0))
+        return
+    # Orchestrator._analyze_frame_once
+    fhash = vp.frame_hash(vp.delivered_seq)
+    res, distance = vp.analyzed.lookup(fhash, CONTEXT)
+    t3 = time.perf_counter()
+    if res is None:
+        status = vp.get_status()
+        images = [b64]
+        if 0 < status["dirty_ratio"] <= 0.25: # Orchestrator._changed_region_images
+            crops = vp.get_dirty_crops("jpeg", 85, max_regions=2, max_size=768)
+            _, thumb = vp.get_encoded("jpeg", 70, max_size=512)
+            images = [thumb] + [c["image"] for c in crops]
+        res = vlm(images)
+        vp.analyzed.store(fhash, CONTEXT, res)
+        emit("vision_analysis", {"seq": vp.delivered_seq, "images": len(images), "image": images[0]})
+    else:
+        emit("vision_reuse", {"seq": vp.delivered_seq, "distance": distance})
+    timings.append((t1 - t0, t2 - t1, t3 - t2, time.perf_counter() - t3))
+
+
+def record(script, path, fps, keyframe_interval):
+    vp = VisionPipeline(capture_backend=ScriptBackend(script))
+    reflex, vlm = ReflexController(), MockVLM()
+    recorder = FrameRecorder(path, keyframe_interval=keyframe_interval, source="script")
+    start = 1_700_000_000.0
+    for i in range(script.n):
+        seq = vp.step()
+        ts = start + i / fps
+        recorder.add_frame(vp.ring.get(seq), ts)
+        perceive(vp, reflex, vlm, lambda t, p: recorder.add_event(t, p, ts), [])
+    recorder.close()
+    return recorder.get_stats(), vlm.calls
+
+
+def replay(path):
+    """Replay determinista (vp.step, sin hilo ni pausas). Devuelve (eventos, tiempos, segundos)"""
+    backend = ReplayCaptureBackend(path)
+    vp = VisionPipeline(capture_backend=backend)
+    reflex, vlm = ReflexController(), MockVLM()
+    events, timings, capture = [], [], []
+    emit = lambda t, p: events.append({"type": t, "payload": {k: v for k, v in p.items() if k != "image"}})
+    t0 = time.perf_counter()
+    while True:
+        c0 = time.perf_counter()
+        if vp.step() is None:
+            break
+        capture.append(time.perf_counter() - c0)
+        perceive(vp, reflex, vlm, emit, timings)
+    elapsed = time.perf_counter() - t0
+    assert backend.finished
+    return events, np.column_stack([capture, np.array(timings)]), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--fps", type=float, default=15.0)
+    parser.add_argument("--keyframe-interval", type=int, default=120)
+    args = parser.parse_args()
+    n = max(args.frames, 50)
+    script = SessionScript(n)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "session.arec"
+        rec_stats, live_calls = record(script, path, args.fps, args.keyframe_interval)
+        recording = FrameRecording(path)
+        print(f"Grabación: {rec_stats['frames']} frames ({recording.duration:.1f}s a {args.fps:.0f} FPS), "
+              f"{rec_stats['keyframes']} keyframes, {rec_stats['patches']} parches, {rec_stats['events']} eventos")
+        print(f"  {rec_stats['bytes'] / 1048576:.1f} MB frente a {rec_stats['raw_bytes'] / 1048576:.0f} MB crudos "
+              f"(x{rec_stats['ratio']}), grabación {rec_stats['encode_ms']:.1f} ms/frame")
+
+        # Sin pérdida: cada frame reconstruido es idéntico al original
+        lossless = all(np.array_equal(frame, script.frame(i)) for i, _, frame in recording.frames())
+        print(f"  Frames reconstruidos idénticos: {lossless}")
+
+        events_a, stages, elapsed = replay(path)
+        events_b, _, _ = replay(path)
+        recorded = [{"type": e["type"], "payload": {k: v for k, v in e["payload"].items() if k != "image"}}
+                    for e in recording.events]
+
+        total = stages.sum(axis=1) * 1000
+        replay_fps = len(recording) / elapsed
+        print(f"\nReplay: {len(recording)} frames en {elapsed:.2f}s = {replay_fps:.1f} FPS "
+              f"(x{recording.duration / elapsed:.1f} tiempo real)")
+        print(f"{'etapa':<28} {'p50':>7} {'p99':>7} {'máx':>7}  (ms)")
+        names = ("captura replay + diff/tiles", "reflejo", "JPEG (get_latest_frame)", "hash + dedup", "crops + VLM simulado")
+        for name, col in zip(names, stages.T * 1000):
+            print(f"{name:<28} {np.percentile(col, 50):7.2f} {np.percentile(col, 99):7.2f} {col.max():7.2f}")
+        print(f"{'total por frame':<28} {np.percentile(total, 50):7.2f} {np.percentile(total, 99):7.2f} {total.max():7.2f}")
+        signals = [e["payload"]["signal"] for e in events_a if e["type"] == "reflex"]
+        vlm_calls = sum(e["type"] == "vision_analysis" for e in events_a)
+        print(f"Reflejo: {signals.count('MOTION')} MOTION / {signals.count('STILL')} STILL; "
+              f"VLM: {vlm_calls} llamadas (en vivo {live_calls})")
+        deterministic = events_a == events_b == recorded
+        print(f"Eventos del replay idénticos a los grabados (x2): {deterministic}")
+
+        # El mismo fichero por nombre, dentro del hilo normal del pipeline y sin límite de FPS
+        vp = VisionPipeline(fps=1000, capture_backend=create_backend(f"replay:{path}"))
+        t0 = time.perf_counter()
+        vp.start()
+        while not vp.backend.finished and time.perf_counter() - t0 < 60:
+            time.sleep(0.01)
+        threaded = time.perf_counter() - t0
+        vp.stop()
+        print(f"Hilo del pipeline: {vp.backend.frames} frames en {threaded:.2f}s ({vp.backend.frames / threaded:.1f} FPS)")
+
+    assert lossless and deterministic
+    assert len(events_a) == rec_stats["events"] and vlm_calls == live_calls
+    assert recording.duration / elapsed > 1.0    # más rápido que el tiempo real
+    assert rec_stats["ratio"] > 10               # formato compacto
+    assert vp.backend.frames == len(recording)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
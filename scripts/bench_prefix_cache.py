@@ -0,0 +1,132 @@
+"""
+Benchmark: time-to-first-token de turnos de chat con el layout de prompt anterior
+(identidad + RAG + gobernanza en el system prompt) frente al layout con prefijo estable
+(identidad + gobernanza arriba, RAG junto al turno del usuario).
+
+El mock de Ollama modela la reutilización de prefijo de llama.cpp: sólo evalúa los tokens
+que no comparte con la petición anterior, y recarga el modelo si cambia num_ctx.
+
+Uso: python scripts/bench_prefix_cache.py [--turns 12] [--token-cost 0.0005]
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+BASE = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE))
+from core.router import ModelRouter, OllamaWrapper
+
+
+class PrefixOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    token_cost = 0.0005   # s por token de prompt no cacheado (~2000 tok/s)
+    reload_cost = 0.3     # s de recarga si cambia num_ctx
+    state = {"past": [], "num_ctx": None, "evaluated": 0}
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        state = self.state
+        num_ctx = payload.get("options", {}).get("num_ctx")
+        if num_ctx != state["num_ctx"]:
+            # Ollama recarga el runner con el nuevo contexto: KV-cache perdido
+            time.sleep(self.reload_cost)
+            state["num_ctx"], state["past"] = num_ctx, []
+
+        # ~4 caracteres por token
+        text = "".join(f"<{m['role']}>{m['content']}" for m in payload["messages"])
+        tokens = [text[i:i + 4] for i in range(0, len(text), 4)]
+        common = 0
+        for a, b in zip(state["past"], tokens):
+            if a != b:
+                break
+            common += 1
+        state["past"] = tokens
+        state["evaluated"] += len(tokens) - common
+        time.sleep((len(tokens) - common) * self.token_cost)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for tok in ["Entendido", ".", ""]:
+            data = json.dumps({"message": {"content": tok}, "done": tok == ""}).encode('utf-8') + b"\n"
+            self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PrefixOllamaHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def words(rng, n):
+    return " ".join(rng.choice(["sistema", "operador", "riesgo", "ventana", "mercado", "memoria", "acción", "regla"]) + str(rng.randint(0, 99)) for _ in range(n))
+
+
+def run_session(label, router, host, stable_layout, turns, seed=3):
+    rng = random.Random(seed)
+    identity = (BASE / "core" / "prompts" / "identity.txt").read_text(encoding='utf-8')
+    governance = "\n\n\n### GOVERNANCE:\n" + words(rng, 350)
+    history = []
+
+    PrefixOllamaHandler.state.update({"past": [], "num_ctx": None, "evaluated": 0})
+    router.prefixes = type(router.prefixes)()
+    ttfts = []
+    for turn in range(turns):
+        user = f"turno {turn}: " + words(rng, 15)
+        knowledge = "### KNOWLEDGE:\n" + words(rng, 250)
+        history.append({"role": "user", "content": user})
+        if stable_layout:
+            kwargs = {"system_prompt": identity + governance, "context_prompt": knowledge}
+        else:
+            kwargs = {"system_prompt": f"{identity}\n\n\n{knowledge}{governance}"}
+
+        t0 = time.perf_counter()
+        stream = router.stream_request("chat", user, context_messages=history[-10:], **kwargs)
+        first = next(stream)
+        ttfts.append((time.perf_counter() - t0) * 1000)
+        reply = first + "".join(stream)
+        history.append({"role": "assistant", "content": reply + " " + words(rng, 40)})
+
+    warm = sorted(ttfts[1:])
+    print(f"{label:<34} TTFT 1er turno={ttfts[0]:7.1f}ms  mediana resto={warm[len(warm) // 2]:7.1f}ms  "
+          f"tokens evaluados={PrefixOllamaHandler.state['evaluated']}")
+    print(f"  {router.prefixes.get_stats()}")
+    return warm[len(warm) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--token-cost", type=float, default=0.0005)
+    args = parser.parse_args()
+    PrefixOllamaHandler.token_cost = args.token_cost
+
+    server, host = start_server()
+    router = ModelRouter(BASE)
+
+    # Antes: sin num_ctx fijo y RAG dentro del system prompt
+    router.loaded_models["chat"] = OllamaWrapper("mock", host=host)
+    before = run_session("Antes (RAG en system prompt)", router, host, stable_layout=False, turns=args.turns)
+
+    # Después: prefijo estable + num_ctx/keep_alive fijos
+    router.loaded_models["chat"] = OllamaWrapper("mock", host=host, num_ctx=4096, keep_alive="30m")
+    after = run_session("Después (prefijo estable)", router, host, stable_layout=True, turns=args.turns)
+
+    print(f"TTFT mediana x{before / after:.2f} más rápido")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Benchmark: bucle de fondo del orquestador dirigido por eventos (Reactor) frente al sondeo de 50 ms.
+Ambos ejecutan los mismos ciclos (reflejo sobre cada frame nuevo, visión cada 0.5 s, monitor 1 s,
+deep thought 20 s, life moments, memoria) sobre un VisionPipeline con escritorio sintético.
+- Reposo (pipeline parado, nada que hacer): despertares por segundo y CPU del proceso
+- Reacción: cambios de pantalla inyectados a intervalos aleatorios con el pipeline a --fps;
+  latencia desde que el frame con el cambio se publica hasta que el reflejo lo procesa
+- Entrada del usuario: latencia desde el aviso hasta que el bucle la atiende
+
+Uso: python scripts/bench_reactor.py [--idle 5] [--changes 30] [--fps 15]
+"""
+import sys
+import time
+import random
+import argparse
+import threading
+from pathlib import Path
+
+import numpy as np
+import cv2
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.vision_pipeline import VisionPipeline
+from core.nervous_system import ReflexController
+from core.capture_backends import SyntheticCaptureBackend
+from core.reactor import Reactor
+
+
+class ChangeBackend(SyntheticCaptureBackend):
+    """Escritorio estático; inject() hace que el siguiente grab muestre un cambio (se anota su seq)"""
+    def __init__(self):
+        super().__init__(1280, 720)
+        self._base = self._desktop()
+        self.inject_pending = False
+        self.changes = [] # seqs de los frames con un cambio nuevo
+        self._k = 0
+
+    def inject(self):
+        self.inject_pending = True
+
+    def _grab_into(self, bbox, ring):
+        if self.inject_pending:
+            self.inject_pending = False
+            self._k += 1
+            x = 100 + (self._k * 97) % 900
+            cv2.rectangle(self._base, (x, 200), (x + 200, 500), (30 * self._k % 255, 80, 200), -1)
+            self.changes.append(ring.seq + 1)
+        slot = ring.acquire(self._base.shape)
+        np.copyto(slot, self._base)
+        return slot
+
+
+class StampedPipeline(VisionPipeline):
+    """Anota cuándo se publica cada frame (el anillo sólo guarda los últimos)"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stamps = {}
+
+    def _update_buffer(self, new_frame):
+        super()._update_buffer(new_frame)
+        self.stamps[self.ring.seq] = self.ring.timestamp(self.ring.seq)
+
+
+class Cycles:
+    """Los ciclos del orquestador, con el coste real del reflejo y guardas de tiempo como antes"""
+    def __init__(self, vp):
+        self.vp = vp
+        self.reflex = ReflexController()
+        self.reflex_seq = 0
+        self.processed = {}      # seq -> time.time() al pasar por el reflejo
+        self.inputs = []         # latencias de entrada del usuario
+        self.last = {"monitor": 0.0, "vision": 0.0, "thought": time.time(), "life": time.time()}
+
+    def reflex_cycle(self, _=None):
+        seq, frame = self.vp.get_frame()
+        if frame is None or seq == self.reflex_seq:
+            return
+        self.reflex_seq = seq
+        self.reflex.process_frame(frame, "OBSERVATION")
+        self.processed[seq] = time.time()
+
+    def monitor(self, now):
+        if now - self.last["monitor"] >= 1:
+            self.last["monitor"] = now
+            self.status = {"load": 50, "mode": "VISION", "fps": self.vp.real_fps}
+
+    def vision(self, now):
+        if now - self.last["vision"] >= 0.5:
+            self.last["vision"] = now
+            self.vp.get_latest_frame() # sin cambios no codifica nada
+
+    def thought(self, now):
+        if now - self.last["thought"] >= 20:
+            self.last["thought"] = now
+
+    def life(self, now):
+        if now - self.last["life"] > 300:
+            self.last["life"] = now
+
+    def memory(self, now=None):
+        self.log = getattr(self, "log", [])[-100:]
+
+    def on_input(self, posted):
+        self.inputs.append(time.perf_counter() - posted)
+
+
+class PollingLoop:
+    """run_background_loop de antes: todos los ciclos cada 50 ms"""
+    def __init__(self, cycles):
+        self.c = cycles
+        self.running = False
+        self.wakeups = 0
+        self.input_posted = None
+
+    def post_input(self):
+        self.input_posted = time.perf_counter()
+
+    def run(self):
+        c = self.c
+        while self.running:
+            now = time.time()
+            self.wakeups += 1
+            c.monitor(now)
+            if self.input_posted is not None:
+                posted, self.input_posted = self.input_posted, None
+                c.on_input(posted)
+            c.reflex_cycle()
+            c.vision(now)
+            c.thought(now)
+            c.life(now)
+            c.memory()
+            time.sleep(0.05)
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+
+class ReactorLoop:
+    """run_background_loop nuevo: eventos "frame"/"input" + timers"""
+    def __init__(self, cycles):
+        self.c = cycles
+        self.reactor = Reactor("Bench")
+        r = self.reactor
+        r.on("frame", cycles.reflex_cycle)
+        r.on("input", cycles.on_input)
+        r.every("monitor", 1.0, cycles.monitor, delay=0)
+        r.every("vision", 0.5, cycles.vision)
+        r.every("deep_thought", 20.0, cycles.thought)
+        r.every("life_moments", 10.0, cycles.life)
+        r.every("memory", 5.0, cycles.memory)
+
+    @property
+    def wakeups(self):
+        return self.reactor.stats["wakeups"]
+
+    def post_input(self):
+        self.reactor.post("input", time.perf_counter())
+
+    def start(self):
+        self.reactor.watch_frames(self.c.vp)
+        self.thread = threading.Thread(target=self.reactor.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.reactor.stop()
+        self.thread.join()
+
+
+def idle(loop_cls, seconds):
+    vp = VisionPipeline(capture_backend=ChangeBackend()) # parado: no llegan frames
+    loop = loop_cls(Cycles(vp))
+    loop.start()
+    time.sleep(0.2)
+    w0, cpu0, t0 = loop.wakeups, time.process_time(), time.perf_counter()
+    time.sleep(seconds)
+    elapsed = time.perf_counter() - t0
+    wakeups, cpu = loop.wakeups - w0, time.process_time() - cpu0
+    loop.stop()
+    return wakeups / elapsed, cpu / elapsed
+
+
+def reaction(loop_cls, changes, fps):
+    backend = ChangeBackend()
+    vp = StampedPipeline(fps=fps, capture_backend=backend)
+    cycles = Cycles(vp)
+    loop = loop_cls(cycles)
+    vp.start()
+    vp.wait_for_frame(0, timeout=5)
+    loop.start()
+    rng = random.Random(7)
+    for _ in range(changes):
+        time.sleep(rng.uniform(0.2, 0.45))
+        backend.inject()
+        time.sleep(rng.uniform(0.05, 0.15))
+        loop.post_input()
+    time.sleep(0.5)
+    loop.stop()
+    vp.stop()
+    latencies = []
+    for seq in backend.changes:
+        done = [t for s, t in cycles.processed.items() if s >= seq]
+        if done and seq in vp.stamps:
+            latencies.append(min(done) - vp.stamps[seq])
+    return np.array(latencies) * 1000, np.array(cycles.inputs) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--idle", type=float, default=5.0)
+    parser.add_argument("--changes", type=int, default=30)
+    parser.add_argument("--fps", type=float, default=15.0)
+    args = parser.parse_args()
+
+    print(f"{'':<22} {'sondeo 50ms':>12} {'Reactor':>10}")
+    poll_w, poll_cpu = idle(PollingLoop, args.idle)
+    reac_w, reac_cpu = idle(ReactorLoop, args.idle)
+    print(f"{'reposo: despertares/s':<22} {poll_w:12.1f} {reac_w:10.1f}")
+    print(f"{'reposo: CPU':<22} {poll_cpu:12.2%} {reac_cpu:10.2%}")
+
+    results = {name: reaction(cls, args.changes, args.fps) for name, cls in (("poll", PollingLoop), ("reactor", ReactorLoop))}
+    for label, idx in (("frame -> reflejo", 0), ("entrada -> bucle", 1)):
+        for stat, fn in (("p50", np.median), ("p99", lambda v: np.percentile(v, 99)), ("máx", np.max)):
+            p, r = (fn(results[k][idx]) if len(results[k][idx]) else float("nan") for k in ("poll", "reactor"))
+            print(f"{label + ' ' + stat:<22} {p:10.1f}ms {r:8.1f}ms")
+    print(f"cambios medidos: {len(results['poll'][0])} / {len(results['reactor'][0])} de {args.changes}")
+
+    assert reac_w < poll_w / 5 and reac_cpu <= poll_cpu
+    assert np.median(results["reactor"][0]) < np.median(results["poll"][0])
+    assert np.median(results["reactor"][1]) < np.median(results["poll"][1])
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
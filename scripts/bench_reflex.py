@@ -0,0 +1,95 @@
+"""
+Microbenchmark del ReflexController: latencia por frame del camino numpy (vista BGR del
+FrameRing, buffers preasignados) frente al camino anterior (BGR -> RGB -> PIL -> resize ->
+ImageChops/ImageStat). Falla si el p99 del camino numpy supera el objetivo documentado (<50ms).
+
+Uso: python scripts/bench_reflex.py [--width 1920] [--height 1080] [--frames 200] [--target-ms 50]
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import cv2
+from PIL import Image, ImageChops, ImageStat
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.nervous_system import ReflexController
+from core.capture_backends import SyntheticCaptureBackend
+from core.frame_ring import FrameRing
+
+
+class LegacyReflex:
+    """Réplica del camino anterior (orquestador + process_frame con PIL)"""
+    def __init__(self):
+        self.last_frame = None
+
+    def process(self, bgr):
+        frame = Image.fromarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+        thumb = frame.resize((128, 128)).convert('L')
+        if not self.last_frame:
+            self.last_frame = thumb
+            return 0.0
+        stat = ImageStat.Stat(ImageChops.difference(self.last_frame, thumb))
+        self.last_frame = thumb
+        return sum(stat.mean) / len(stat.mean)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--target-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    backend = SyntheticCaptureBackend(args.width, args.height)
+    ring = FrameRing(4)
+    frames = []
+    for _ in range(8):
+        backend.grab_into(None, ring)
+        frames.append(ring.get(ring.commit()))
+    flash = frames[0].copy()
+    flash[:] = np.minimum(255, flash.astype(np.int16) + 120).astype(np.uint8)
+
+    legacy, reflex = LegacyReflex(), ReflexController()
+    results = {}
+    for name, fn in (("PIL (antes)", lambda f: legacy.process(f)),
+                     ("numpy", lambda f: reflex.process_frame(f, "BALANCED"))):
+        fn(frames[0])
+        times = []
+        for i in range(args.frames):
+            t0 = time.perf_counter()
+            fn(frames[i % len(frames)])
+            times.append((time.perf_counter() - t0) * 1000)
+        results[name] = times
+        print(f"{name:<12} p50={percentile(times, 50):6.2f}ms  p99={percentile(times, 99):6.2f}ms  max={max(times):6.2f}ms")
+
+    # Mismo diff medio que el camino PIL (misma luma) y rasgos nuevos
+    legacy, reflex = LegacyReflex(), ReflexController()
+    legacy.process(frames[0]); reflex.process_frame(frames[0], "BALANCED")
+    old = legacy.process(frames[3]); reflex.process_frame(frames[3], "BALANCED")
+    print(f"mean_diff PIL={old:.2f} numpy={reflex.features['mean_diff']:.2f}  cuadrantes={reflex.features['quadrants']}  "
+          f"bordes={reflex.features['edge_energy']:.1f}")
+    signal = reflex.process_frame(flash, "GAMER")
+    action = reflex.get_reflex_action(signal, "GAMER")
+    print(f"Destello: signal={signal} flash={reflex.features['flash']} acción={action.params if action else None}")
+    assert reflex.features["flash"] and signal == "MOTION"
+
+    # Entrada PIL (fallback de VisualAgent.capture_frame) sigue funcionando
+    pil = Image.fromarray(cv2.cvtColor(frames[1], cv2.COLOR_BGR2RGB))
+    assert reflex.process_frame(pil, "BALANCED") in ("MOTION", "STILL")
+
+    p99 = percentile(results["numpy"], 99)
+    assert p99 < args.target_ms, f"p99 {p99:.2f}ms >= {args.target_ms}ms"
+    print(f"OK (p99 {p99:.2f}ms < {args.target_ms:.0f}ms)")
+
+
+if __name__ == "__main__":
+    main()
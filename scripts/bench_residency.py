@@ -0,0 +1,128 @@
+"""
+Benchmark: latencia de la primera petición por rol con y sin warm-up del ResidencyManager,
+más expulsión bajo presupuesto de memoria. Usa un mock de Ollama que modela la carga del
+modelo en memoria (/api/chat lento en frío), /api/ps y la descarga con keep_alive=0.
+
+Uso: python scripts/bench_residency.py [--load-cost 0.8] [--budget-mb 11000]
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+BASE = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE))
+from core.router import ModelRouter
+
+MODELS = {"mistral:latest": 4100, "phi3:mini": 2200, "qwen3-vl:8b": 6100} # MB
+
+
+class ResidentOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    load_cost = 0.8
+    loaded = {}    # name -> keep_alive
+    loads = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, obj):
+        body = json.dumps(obj).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._json({"models": [{"name": n} for n in MODELS]})
+        elif self.path == "/api/ps":
+            with self.lock:
+                self._json({"models": [{"name": n, "size": MODELS[n] * 1048576} for n in self.loaded]})
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        name = payload["model"]
+        if payload.get("keep_alive") == 0 and not payload.get("messages"):
+            with self.lock:
+                self.loaded.pop(name, None)
+            return self._json({"done": True, "done_reason": "unload"})
+        with self.lock:
+            cold = name not in self.loaded
+            self.loaded[name] = payload.get("keep_alive")
+        if cold:
+            ResidentOllamaHandler.loads += 1
+            time.sleep(self.load_cost)
+        time.sleep(0.01)
+        self._json({"message": {"role": "assistant", "content": "ok"}, "done": True})
+
+
+def new_router(host):
+    router = ModelRouter(BASE)
+    router.catalog.ollama_host = host
+    return router
+
+
+def first_requests(router):
+    out = {}
+    for role, task in (("chat", "chat"), ("reflexion", "reflexion"), ("vision", "visual_chat")):
+        t0 = time.perf_counter()
+        router.route_request(task, "hola", cache=False)
+        out[role] = (time.perf_counter() - t0) * 1000
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--load-cost", type=float, default=0.8)
+    parser.add_argument("--budget-mb", type=float, default=11000)
+    args = parser.parse_args()
+    ResidentOllamaHandler.load_cost = args.load_cost
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ResidentOllamaHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+    roles = ["chat", "reflexion", "vision"]
+
+    # Antes: load_model en hilos sueltos, el modelo se carga en Ollama con la primera petición real
+    router = new_router(host)
+    ts = [threading.Thread(target=router.load_model, args=(r,)) for r in roles]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    before = first_requests(router)
+    print("Sin warm-up  :", "  ".join(f"{r}={ms:7.1f}ms" for r, ms in before.items()))
+
+    # Después: warm-up al arranque
+    ResidentOllamaHandler.loaded.clear()
+    router = new_router(host)
+    t0 = time.perf_counter()
+    router.residency.warm_up(roles, wait=True)
+    warm_total = (time.perf_counter() - t0) * 1000
+    after = first_requests(router)
+    print("Con warm-up  :", "  ".join(f"{r}={ms:7.1f}ms" for r, ms in after.items()), f"(warm-up en paralelo: {warm_total:.0f}ms)")
+    for role, info in router.get_active_models(detailed=True).items():
+        print(f"  {role:<10} {info['model']:<16} state={info['state']:<8} pinned={info['pinned']!s:<5} "
+              f"load={info['load_time']}s warm={info['warm_time']}s")
+    print(f"  keep_alive enviados: {dict(ResidentOllamaHandler.loaded)}")
+
+    # Presupuesto: chat fijado; se expulsa el rol menos usado
+    router.route_request("visual_chat", "otra vez", cache=False)
+    router.residency.memory_budget_mb = args.budget_mb
+    evicted = router.residency.enforce_budget()
+    resident = sum(MODELS[n] for n in ResidentOllamaHandler.loaded)
+    print(f"Presupuesto {args.budget_mb:.0f}MB -> expulsados={evicted} residentes={list(ResidentOllamaHandler.loaded)} ({resident}MB)")
+    print("  estados:", {r: i['state'] for r, i in router.get_active_models(detailed=True).items()})
+    assert "mistral:latest" in ResidentOllamaHandler.loaded and resident <= args.budget_mb
+    print("OK")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
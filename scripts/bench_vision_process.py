@@ -0,0 +1,157 @@
+"""
+Benchmark: latencia de la API (FastAPI/uvicorn) con el pipeline de visión a plena carga,
+en el mismo proceso (VisionPipeline) frente a un proceso aparte (VisionProcess).
+Carga: captura sintética 1920x1080 a --fps fijos + un consumidor que publica vision_frame
+(JPEG) y crops de regiones cambiadas a 10 Hz, como el orquestador.
+El cliente HTTP corre en otro proceso y mide /ping (event loop) y /status (lee el pipeline);
+también se mide la CPU consumida por el proceso de la API. Con un solo núcleo el proceso aparte
+no puede bajar la latencia (la CPU es el recurso compartido), pero sí saca la carga del proceso.
+
+Uso: python scripts/bench_vision_process.py [--seconds 5] [--fps 30] [--rps 50]
+"""
+import sys
+import time
+import socket
+import argparse
+import threading
+import multiprocessing as mp
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.vision_pipeline import VisionPipeline
+from core.vision_process import VisionProcess
+
+try:
+    import uvicorn
+    import httpx
+    from fastapi import FastAPI
+except ImportError:
+    uvicorn = httpx = FastAPI = None
+
+PIPELINE = None
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/status")
+    async def status():
+        if PIPELINE is None:
+            return {"active": False}
+        st = PIPELINE.get_status()
+        return {k: st[k] for k in ("fps", "real_fps", "delta_score", "dirty_ratio", "active")}
+
+    return app
+
+
+def client(port, seconds, rps, out):
+    """Proceso cliente: alterna /ping y /status a rps peticiones por segundo"""
+    lat = {"/ping": [], "/status": []}
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}") as http:
+        http.get("/ping")
+        end = time.perf_counter() + seconds
+        i = 0
+        while time.perf_counter() < end:
+            path = "/ping" if i % 2 == 0 else "/status"
+            t0 = time.perf_counter()
+            http.get(path).raise_for_status()
+            lat[path].append(time.perf_counter() - t0)
+            i += 1
+            time.sleep(max(0.0, 1.0 / rps - (time.perf_counter() - t0)))
+    out.put(lat)
+
+
+def consumer(stop):
+    """Como _cycle_vision_autonomy + broadcast: frame JPEG y crops de lo que cambió a 10 Hz"""
+    while not stop.is_set():
+        PIPELINE.get_latest_frame(force=True)
+        PIPELINE.get_dirty_crops("jpeg", 85, max_regions=2, max_size=768)
+        stop.wait(0.1)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run(mode, seconds, fps, rps):
+    global PIPELINE
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(make_app(), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    stop = threading.Event()
+    load = None
+    if mode != "idle":
+        cls = VisionProcess if mode == "process" else VisionPipeline
+        kwargs = {"slot_bytes": 1920 * 1080 * 3} if mode == "process" else {}
+        PIPELINE = cls(fps=fps, capture_backend="synthetic", **kwargs)
+        PIPELINE.start()
+        PIPELINE.wait_for_frame(0, timeout=10)
+        load = threading.Thread(target=consumer, args=(stop,), daemon=True)
+        load.start()
+
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    proc = ctx.Process(target=client, args=(port, seconds, rps, out))
+    seq0 = PIPELINE.frame_seq if PIPELINE else 0
+    t0, cpu0 = time.perf_counter(), time.process_time()
+    proc.start()
+    lat = out.get()
+    proc.join()
+    elapsed = time.perf_counter() - t0
+    cpu = (time.process_time() - cpu0) / elapsed
+    frames = (PIPELINE.frame_seq - seq0) if PIPELINE else 0
+
+    stop.set()
+    if load:
+        load.join()
+    if PIPELINE:
+        PIPELINE.stop()
+        PIPELINE = None
+    server.should_exit = True
+    return lat, frames / elapsed, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--rps", type=float, default=50.0)
+    args = parser.parse_args()
+    if uvicorn is None:
+        print("fastapi/uvicorn/httpx no instalados: pip install fastapi uvicorn httpx")
+        return
+
+    results = {}
+    for mode in ("idle", "thread", "process"):
+        results[mode] = run(mode, args.seconds, args.fps, args.rps)
+
+    print(f"\n{'modo':<8} {'FPS captura':>11} {'CPU API':>8} {'ruta':<8} {'p50':>7} {'p95':>7} {'p99':>7} {'máx':>7}  (ms)")
+    for mode, (lat, fps, cpu) in results.items():
+        for path, values in lat.items():
+            v = np.array(values) * 1000
+            print(f"{mode:<8} {fps:11.1f} {cpu:8.0%} {path:<8} {np.percentile(v, 50):7.2f} {np.percentile(v, 95):7.2f} "
+                  f"{np.percentile(v, 99):7.2f} {v.max():7.2f}")
+
+    thread_p99 = np.percentile(results["thread"][0]["/status"], 99)
+    process_p99 = np.percentile(results["process"][0]["/status"], 99)
+    print(f"\n/status p99: mismo proceso {thread_p99 * 1000:.2f}ms vs proceso aparte {process_p99 * 1000:.2f}ms "
+          f"(núcleos disponibles: {mp.cpu_count()})")
+    print(f"CPU del proceso de la API: {results['thread'][2]:.0%} -> {results['process'][2]:.0%}")
+    assert results["process"][1] > 0 and results["thread"][1] > 0
+    assert results["process"][2] < results["thread"][2]  # la captura y la codificación salen del proceso
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Benchmark: vision_frame por WebSocket como JSON con base64 (antes) frente a mensajes binarios
+(cabecera de 16 bytes + JPEG, server/binary_frames.py) con --clients clientes reales
+(uvicorn + server/api.py, mismo camino thread_safe_emit -> EventBus -> ConnectionManager).
+Frames: escritorio sintético 1920x1080 (o --image) codificado en JPEG como en el orquestador,
+a --fps durante --seconds, más visual_log a 20/s (sigue en JSON en ambos modos).
+Tres configuraciones: JSON+base64 con permessage-deflate (antes), binario con deflate y binario
+sin deflate (start_server ahora: el JPEG ya va comprimido y deflate lo recomprime por cliente).
+Mide bytes/s por cliente (mensajes y bytes en el socket), CPU del hilo del servidor, frames
+recibidos y coste de decodificar cada frame en el cliente (json + base64 antes; cabecera y vista
+de los bytes ahora; en el navegador, JSON.parse + data URL frente a createImageBitmap).
+
+Uso: python scripts/bench_ws_binary.py [--seconds 5] [--clients 4] [--fps 10] [--image captura.png]
+"""
+import sys
+import time
+import json
+import base64
+import socket
+import asyncio
+import argparse
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+import uvicorn
+from websockets.asyncio.client import connect, ClientConnection
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.capture_backends import SyntheticCaptureBackend
+from core.frame_encoding import encode_frame
+from core.frame_ring import FrameRing
+from server.binary_frames import decode_binary
+from server.connections import ConnectionManager
+import server.api as api
+
+
+class CountingConnection(ClientConnection):
+    """Cliente websockets que cuenta los bytes que llegan por el socket"""
+    wire = 0
+
+    def data_received(self, data):
+        self.wire += len(data)
+        super().data_received(data)
+
+
+def make_frames(args, n=8):
+    if args.image:
+        img = cv2.imread(args.image)
+        return [encode_frame(img, "jpeg", 80)] * n
+    backend, ring = SyntheticCaptureBackend(), FrameRing(2)
+    return [encode_frame(backend.grab_into(None, ring), "jpeg", 80) for _ in range(n)]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Client:
+    def __init__(self):
+        self.frames = 0
+        self.messages = 0
+        self.wire = 0
+        self.decode = []
+
+    async def run(self, url, stop):
+        async with connect(url, max_size=None, create_connection=CountingConnection) as ws:
+            while not stop.is_set():
+                try:
+                    data = await asyncio.wait_for(ws.recv(), 0.2)
+                except asyncio.TimeoutError:
+                    continue
+                self.messages += len(data)
+                t0 = time.perf_counter()
+                if isinstance(data, bytes):
+                    topic, _, w, h, _, image = decode_binary(data)
+                else:
+                    msg = json.loads(data)
+                    topic = msg["type"]
+                    if topic == "vision_frame":
+                        image = base64.b64decode(msg["payload"]["image"])
+                if topic == "vision_frame":
+                    self.decode.append(time.perf_counter() - t0)
+                    self.frames += 1
+            self.wire = ws.wire
+
+
+def producer(frames, seconds, fps):
+    end = time.perf_counter() + seconds
+    posted, i = 0, 0
+    next_frame = time.perf_counter()
+    while time.perf_counter() < end:
+        now = time.perf_counter()
+        if now >= next_frame:
+            api.thread_safe_emit("vision_frame", {"image": frames[posted % len(frames)]})
+            posted += 1
+            next_frame += 1.0 / fps
+        api.thread_safe_emit("visual_log", {"msg": f"⚡ log {i}"})
+        i += 1
+        time.sleep(0.05)
+    return posted
+
+
+def run(mode, deflate, frames, args):
+    api.ORCHESTRATOR = None
+    api.manager = manager = ConnectionManager()
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning",
+                                           ws_per_message_deflate=deflate))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    url = f"ws://127.0.0.1:{port}/ws/chat" + ("?binary=1" if mode == "binary" else "")
+    clients = [Client() for _ in range(args.clients)]
+
+    def server_cpu():
+        async def sample():
+            return time.thread_time()
+        return asyncio.run_coroutine_threadsafe(sample(), api.APP_LOOP).result()
+
+    async def main():
+        stop = asyncio.Event()
+        tasks = [asyncio.create_task(c.run(url, stop)) for c in clients]
+        await asyncio.sleep(0.5)
+        cpu0, t0 = server_cpu(), time.perf_counter()
+        posted = await asyncio.to_thread(producer, frames, args.seconds, args.fps)
+        await asyncio.sleep(0.5)
+        cpu, elapsed = server_cpu() - cpu0, time.perf_counter() - t0
+        stats = manager.get_stats()
+        stop.set()
+        await asyncio.gather(*tasks)
+        return posted, cpu, elapsed, stats
+
+    posted, cpu, elapsed, stats = asyncio.run(main())
+    server.should_exit = True
+    thread.join(timeout=5)
+    return {
+        "posted": posted,
+        "frames": min(c.frames for c in clients),
+        "msg_kbs": np.mean([c.messages for c in clients]) / elapsed / 1024,
+        "wire_kbs": np.mean([c.wire for c in clients]) / elapsed / 1024,
+        "cpu_ms_frame": cpu / max(1, posted) * 1000,
+        "cpu_pct": cpu / elapsed * 100,
+        "decode_us": np.median([x for c in clients for x in c.decode]) * 1e6,
+        "binary": all(c["binary"] for c in stats["clients"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--fps", type=float, default=10.0)
+    parser.add_argument("--image", default=None, help="captura real en vez del escritorio sintético")
+    args = parser.parse_args()
+
+    frames = make_frames(args)
+    jpeg_kb = np.mean([len(base64.b64decode(f)) for f in frames]) / 1024
+    configs = [("JSON+b64 deflate", "json", True),     # antes
+               ("binario deflate", "binary", True),
+               ("binario sin defl.", "binary", False)]   # ahora (start_server)
+    res = [run(mode, deflate, frames, args) for _, mode, deflate in configs]
+    old, new = res[0], res[-1]
+
+    print(f"\nJPEG medio {jpeg_kb:.0f} KB, {args.fps:g} fps, {args.clients} clientes")
+    rows = [("frames emitidos/recibidos", lambda r: f"{r['posted']}/{r['frames']}"),
+            ("mensajes KB/s por cliente", lambda r: f"{r['msg_kbs']:.0f}"),
+            ("socket KB/s por cliente", lambda r: f"{r['wire_kbs']:.0f}"),
+            ("CPU servidor (% de un núcleo)", lambda r: f"{r['cpu_pct']:.1f}"),
+            ("CPU servidor por frame (ms)", lambda r: f"{r['cpu_ms_frame']:.2f}"),
+            ("decodificar frame cliente (µs)", lambda r: f"{r['decode_us']:.0f}")]
+    print(f"{'':<31}" + "".join(f"{name:>18}" for name, _, _ in configs))
+    for label, fmt in rows:
+        print(f"{label:<31}" + "".join(f"{fmt(r):>18}" for r in res))
+
+    assert new["binary"] and not old["binary"]
+    assert new["frames"] > 0.8 * new["posted"]
+    assert new["msg_kbs"] < old["msg_kbs"] * 0.8     # sin el 33% de base64
+    assert new["cpu_pct"] < old["cpu_pct"]
+    assert new["decode_us"] < old["decode_us"]
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Prueba de carga: difusión WebSocket a N clientes reales (uvicorn + server/api.py) con el
+ConnectionManager de antes (un lote no termina hasta que todos los clientes lo han recibido)
+frente al de ahora (cola acotada y escritor propio por cliente, frames drop-oldest, expulsión).
+Carga durante --seconds por thread_safe_emit (EventBus incluido): vision_frame de --frame-kb KB
+a --fps y visual_log a --log-rate/s, cada uno con su instante de emisión.
+Clientes: --clients rápidos, uno lento (lee a --slow-mbps), uno parado (conecta y no lee nunca)
+y uno que corta la conexión a mitad de la prueba sin cerrar el WebSocket.
+Mide en los clientes rápidos la latencia emisión -> recepción (p50/p99) de logs y frames y si
+recibieron todos los logs en orden; frames recibidos por el lento; expulsiones.
+El parado llena los buffers del kernel (MB) antes de que un envío se bloquee: se expulsa
+--send-timeout s después.
+
+Uso: python scripts/bench_ws_fanout.py [--seconds 8] [--clients 8] [--frame-kb 200] [--slow-mbps 4]
+"""
+import os
+import re
+import sys
+import time
+import json
+import base64
+import socket
+import asyncio
+import argparse
+import threading
+from pathlib import Path
+
+import numpy as np
+import uvicorn
+from websockets.asyncio.client import connect
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from server.connections import ConnectionManager
+import server.api as api
+
+
+class SequentialManager:
+    """ConnectionManager de antes: cada lote espera a todos los clientes, errores tragados"""
+    def __init__(self):
+        self.active_connections = []
+
+    async def connect(self, websocket):
+        await websocket.accept()
+        self.active_connections.append(websocket)
+
+    def disconnect(self, websocket):
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
+
+    async def send(self, websocket, message):
+        await websocket.send_json(message)
+
+    async def broadcast_many(self, messages):
+        datas = [json.dumps(m, separators=(",", ":"), ensure_ascii=False) for m in messages]
+
+        async def send_all(connection):
+            for data in datas:
+                try:
+                    await connection.send_text(data)
+                except:
+                    pass
+        await asyncio.gather(*(send_all(c) for c in list(self.active_connections)))
+
+    def get_stats(self):
+        return {"active": len(self.active_connections), "evicted": 0}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+HEAD = re.compile(r'^\{"type":"(\w+)","payload":\{"n":(\d+),"t":([\d.e+-]+),')
+
+
+def parse(data):
+    """(tipo, n, t) de la cabecera del mensaje sin decodificar los KB del frame"""
+    m = HEAD.match(data)
+    return (m.group(1), int(m.group(2)), float(m.group(3))) if m else (None, None, None)
+
+
+class Client:
+    def __init__(self, kind):
+        self.kind = kind
+        self.logs = []
+        self.log_lat = []
+        self.frame_lat = []
+        self.frames = 0
+        self.error = None
+
+    async def run(self, port, stop, slow_bytes_s=None, cut_after=None):
+        sock = socket.socket()
+        if self.kind in ("lento", "parado"):
+            # Buffer de recepción pequeño: el kernel no absorbe megas por el cliente que no lee
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 65536)
+        sock.connect(("127.0.0.1", port))
+        sock.setblocking(False)
+        try:
+            async with connect(f"ws://127.0.0.1:{port}/ws/chat", sock=sock, max_size=None,
+                               max_queue=16 if self.kind == "rápido" else 1) as ws:
+                if self.kind == "parado":
+                    await stop.wait()
+                    ws.transport.abort()
+                    return
+                if cut_after:
+                    asyncio.get_running_loop().call_later(cut_after, ws.transport.abort)
+                while not stop.is_set():
+                    try:
+                        data = await asyncio.wait_for(ws.recv(), 0.2)
+                    except asyncio.TimeoutError:
+                        continue
+                    now = time.perf_counter()
+                    kind, n, t = parse(data)
+                    if kind == "vision_frame":
+                        self.frames += 1
+                        self.frame_lat.append(now - t)
+                    elif kind == "visual_log":
+                        self.logs.append(n)
+                        self.log_lat.append(now - t)
+                    if slow_bytes_s:
+                        await asyncio.sleep(len(data) / slow_bytes_s)
+        except Exception as e:
+            self.error = e.__class__.__name__
+
+
+def producer(seconds, fps, log_rate, frame_kb):
+    # base64 de bytes aleatorios, como un JPEG: permessage-deflate no lo encoge
+    image = base64.b64encode(os.urandom(frame_kb * 768)).decode()
+    end = time.perf_counter() + seconds
+    counts = {}
+
+    def loop(topic, rate, make):
+        i = 0
+        while time.perf_counter() < end:
+            api.thread_safe_emit(topic, make(i))
+            i += 1
+            time.sleep(1.0 / rate)
+        counts[topic] = i
+
+    specs = [("vision_frame", fps, lambda i: {"n": i, "t": time.perf_counter(), "image": image}),
+             ("visual_log", log_rate, lambda i: {"n": i, "t": time.perf_counter(), "msg": f"⚡ log {i}"})]
+    threads = [threading.Thread(target=loop, args=s) for s in specs]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return counts
+
+
+def run(mode, args):
+    api.ORCHESTRATOR = None
+    api.manager = manager = SequentialManager() if mode == "antes" else ConnectionManager(
+        max_queue=args.max_queue, send_timeout=args.send_timeout)
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning", ws="websockets-sansio"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    fast = [Client("rápido") for _ in range(args.clients)]
+    slow, stalled, cut = Client("lento"), Client("parado"), Client("cortado")
+    result = {}
+
+    async def clients():
+        stop = asyncio.Event()
+        tasks = [asyncio.create_task(c.run(port, stop)) for c in fast]
+        tasks.append(asyncio.create_task(slow.run(port, stop, slow_bytes_s=args.slow_mbps * 125000)))
+        tasks.append(asyncio.create_task(stalled.run(port, stop)))
+        tasks.append(asyncio.create_task(cut.run(port, stop, cut_after=args.seconds / 3)))
+        await asyncio.sleep(0.5)
+        result["counts"] = await asyncio.to_thread(producer, args.seconds, args.fps, args.log_rate, args.frame_kb)
+        await asyncio.sleep(args.grace) # lo pendiente termina de llegar
+        result["stats"] = manager.get_stats()
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(clients())
+    server.should_exit = True
+    thread.join(timeout=5)
+
+    logs = result["counts"]["visual_log"]
+    log_lat = np.array([x for c in fast for x in c.log_lat]) * 1000
+    frame_lat = np.array([x for c in fast for x in c.frame_lat]) * 1000
+    return {
+        "log_p50": np.percentile(log_lat, 50) if len(log_lat) else float("nan"),
+        "log_p99": np.percentile(log_lat, 99) if len(log_lat) else float("nan"),
+        "frame_p50": np.percentile(frame_lat, 50) if len(frame_lat) else float("nan"),
+        "frame_p99": np.percentile(frame_lat, 99) if len(frame_lat) else float("nan"),
+        "logs_complete": all(c.logs == list(range(logs)) for c in fast),
+        "logs_min": min(len(c.logs) for c in fast),
+        "logs": logs,
+        "frames_posted": result["counts"]["vision_frame"],
+        "frames_fast": min(c.frames for c in fast),
+        "frames_slow": slow.frames,
+        "stats": result["stats"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=8.0)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--frame-kb", type=int, default=200)
+    parser.add_argument("--fps", type=float, default=10.0)
+    parser.add_argument("--log-rate", type=float, default=50.0)
+    parser.add_argument("--slow-mbps", type=float, default=4.0)
+    parser.add_argument("--max-queue", type=int, default=1024)
+    parser.add_argument("--send-timeout", type=float, default=5.0)
+    parser.add_argument("--grace", type=float, default=2.0)
+    args = parser.parse_args()
+
+    old = run("antes", args)
+    new = run("ahora", args)
+    print(f"\n{args.clients} clientes rápidos + lento ({args.slow_mbps} Mbps) + parado + cortado")
+    print(f"{'':<36} {'antes':>10} {'ahora':>10}")
+    print(f"{'visual_log emisión->recepción p50 (ms)':<36} {old['log_p50']:10.1f} {new['log_p50']:10.1f}")
+    print(f"{'visual_log emisión->recepción p99 (ms)':<36} {old['log_p99']:10.1f} {new['log_p99']:10.1f}")
+    print(f"{'vision_frame emisión->recepción p50 (ms)':<36} {old['frame_p50']:10.1f} {new['frame_p50']:10.1f}")
+    print(f"{'vision_frame emisión->recepción p99 (ms)':<36} {old['frame_p99']:10.1f} {new['frame_p99']:10.1f}")
+    print(f"{'visual_log recibidos (mín. rápido)':<36} {old['logs_min']:>6}/{old['logs']:<3} {new['logs_min']:>6}/{new['logs']:<3}")
+    print(f"{'todos los logs y en orden (rápidos)':<36} {str(old['logs_complete']):>10} {str(new['logs_complete']):>10}")
+    print(f"{'frames emitidos':<36} {old['frames_posted']:10d} {new['frames_posted']:10d}")
+    print(f"{'frames recibidos (mín. rápido)':<36} {old['frames_fast']:10d} {new['frames_fast']:10d}")
+    print(f"{'frames recibidos (lento)':<36} {old['frames_slow']:10d} {new['frames_slow']:10d}")
+    print(f"{'clientes activos al final':<36} {old['stats']['active']:10d} {new['stats']['active']:10d}")
+    print(f"Ahora: expulsados {new['stats']['evicted']} {new['stats']['evict_reasons']}")
+
+    assert new["logs_complete"]
+    assert new["log_p50"] < old["log_p50"]              # (antes, los logs que nunca llegaron no cuentan en p99)
+    assert new["frames_fast"] > new["frames_slow"]       # el lento pierde frames, no frena a los demás
+    assert new["stats"]["evicted"] >= 1                  # el parado, por timeout de envío
+    assert new["stats"]["active"] == args.clients + 1    # rápidos + lento; parado y cortado fuera
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,9 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 
+from core.event_bus import EventBus
+from server.connections import ConnectionManager
+
 # Intentamos importar uvicorn para cuando se ejecute directo
 try:
     import uvicorn
@@ -23,25 +26,7 @@ web_path = base_path / "web"
 web_path.mkdir(exist_ok=True) # Ensure it exists
 app.mount("/static", StaticFiles(directory=str(web_path)), name="static")
 
-# Connection Manager for WebSockets
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                pass
-
+# Conexiones WebSocket: cola acotada y escritor propio por cliente (server/connections.py)
 manager = ConnectionManager()
 
 # Bridge: Orchestrator -> WebSocket
@@ -79,15 +64,21 @@ def orchestrator_callback(event_type: str, payload: dict):
 
 # BUT we can store the loop when app starts!
 APP_LOOP = None
+# Eventos del orquestador: se fusionan (vision_frame...) o se encolan en orden (chat, logs)
+# y un único task los difunde por lotes, en vez de una corrutina por evento
+EVENT_BUS = EventBus()
+
+async def broadcast_batch(batch):
+    await manager.broadcast_many([{"type": event_type, "payload": payload} for event_type, payload in batch])
 
 @app.on_event("startup")
 async def startup_event():
     global APP_LOOP
     APP_LOOP = asyncio.get_running_loop()
+    app.state.event_task = asyncio.create_task(EVENT_BUS.run(broadcast_batch))
 
 def thread_safe_emit(event_type: str, payload: dict):
-    if APP_LOOP:
-        asyncio.run_coroutine_threadsafe(manager.broadcast({"type": event_type, "payload": payload}), APP_LOOP)
+    EVENT_BUS.post(event_type, payload)
 
 @app.get("/")
 async def get():
@@ -109,7 +100,7 @@ async def websocket_endpoint(websocket: WebSocket):
             vis_hist = ORCHESTRATOR.visual_log[-20:]
             thought_hist = ORCHESTRATOR.thought_log[-20:]
             
-            await websocket.send_json({
+            await manager.send(websocket, {
                 "type": "history", 
                 "payload": {
                     "chat": chat_hist,
@@ -126,7 +117,7 @@ async def websocket_endpoint(websocket: WebSocket):
             vis_m = models.get('vision', 'offline')
             ref_m = models.get('reflexion', 'offline')
             
-            await websocket.send_json({
+            await manager.send(websocket, {
                 "type": "system", 
                 "payload": {"msg": f"Connected to ARAFURA Core. Models: chat:{chat_m}, visual:{vis_m}, reflection:{ref_m}"}
             })
@@ -149,18 +140,14 @@ async def websocket_endpoint(websocket: WebSocket):
 
             loop = asyncio.get_running_loop()
             
+            if hasattr(ORCHESTRATOR, 'aprocess_stream'):
+                # Ruta nativa asyncio: los tokens llegan al loop sin ocupar un hilo del executor
+                chunks = []
+                async for token in ORCHESTRATOR.aprocess_stream(data):
+                    chunks.append(token)
+                response = "".join(chunks)
             # Usar process_stream si está disponible para feedback en tiempo real
-            if hasattr(ORCHESTRATOR, 'process_stream'):
-                def run_stream():
-                    # full_resp = [] # No longer needed for final concat if we rely on chunks
-                    for token in ORCHESTRATOR.process_stream(data):
-                        pass # Tokens are already being emitted via callback? 
-                        # Wait, tokens are yielded, not emitted.
-                    return "" # Return empty as streaming is handled elsewhere or via yield logic
-                
-                # In current orchestrator, process_stream is a generator.
-                # api.py used to collect it. Let's make api.py emit chunks if possible.
-                
+            elif hasattr(ORCHESTRATOR, 'process_stream'):
                 def run_and_collect():
                     chunks = []
                     for token in ORCHESTRATOR.process_stream(data):
@@ -171,13 +158,11 @@ async def websocket_endpoint(websocket: WebSocket):
             else:
                 response = await loop.run_in_executor(None, ORCHESTRATOR.process_input, data)
             
-            # Send response back directly (Final Result)
-            try:
-                await websocket.send_json({
-                    "type": "chat_response",
-                    "payload": {"role": "ARAFURA", "content": response}
-                })
-            except: pass
+            # Send response back directly (Final Result), por la cola del cliente
+            await manager.send(websocket, {
+                "type": "chat_response",
+                "payload": {"role": "ARAFURA", "content": response}
+            })
 
         while True:
             text_data = await websocket.receive_text()
@@ -194,6 +179,8 @@ def start_server(orchestrator, host="0.0.0.0", port=8000):
     ORCHESTRATOR.event_callback = thread_safe_emit
     
     if uvicorn:
-        uvicorn.run(app, host=host, port=port, log_level="info")
+        # Sin permessage-deflate: las imágenes ya van comprimidas (JPEG/WebP) y recomprimirlas
+        # para cada cliente costaba ~7x la CPU del envío (scripts/bench_ws_binary.py)
+        uvicorn.run(app, host=host, port=port, log_level="info", ws_per_message_deflate=False)
     else:
         print("Uvicorn not installed.")
@@ -0,0 +1,82 @@
+import struct
+import base64
+import binascii
+
+# Mensaje binario de imagen (WebSocket binario), little-endian, 16 bytes de cabecera + imagen tal cual:
+#   magic "AF" | versión u8 | tipo u8 | seq u32 | ancho u16 | alto u16 | formato u8 | 3 bytes libres
+# web/js/app.js lo lee con un DataView y pinta la imagen con createImageBitmap (sin JSON ni base64)
+HEADER = struct.Struct("<2sBBIHHB3x")
+MAGIC = b"AF"
+VERSION = 1
+
+BINARY_TOPICS = {"vision_frame": 1, "vision_crop": 2}
+FORMATS = {"jpeg": 1, "png": 2, "webp": 3}
+_TOPIC_BY_KIND = {k: t for t, k in BINARY_TOPICS.items()}
+_FORMAT_BY_CODE = {k: f for f, k in FORMATS.items()}
+
+
+def image_format(data: bytes):
+    if data[:3] == b"\xff\xd8\xff":
+        return "jpeg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def image_size(data: bytes, fmt: str):
+    """(ancho, alto) leídos de la cabecera de la imagen, sin decodificarla; (0, 0) si no se encuentra"""
+    if fmt == "png" and len(data) >= 24:
+        return struct.unpack(">II", data[16:24])
+    if fmt == "jpeg":
+        i = 2
+        while i + 9 < len(data):
+            if data[i] != 0xFF:
+                break
+            marker = data[i + 1]
+            if marker == 0xFF: # relleno
+                i += 1
+                continue
+            length = struct.unpack(">H", data[i + 2:i + 4])[0]
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC): # SOFn
+                h, w = struct.unpack(">HH", data[i + 5:i + 9])
+                return w, h
+            i += 2 + length
+    if fmt == "webp" and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b"VP8 ":
+            w, h = struct.unpack("<HH", data[26:30])
+            return w & 0x3FFF, h & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(data[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            return int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+    return 0, 0
+
+
+def encode_binary(topic: str, payload, seq: int):
+    """Mensaje binario para un evento de imagen ({"image": base64}); None si no es una imagen conocida"""
+    kind = BINARY_TOPICS.get(topic)
+    image = payload.get("image") if kind and isinstance(payload, dict) else None
+    if not image:
+        return None
+    try:
+        data = base64.b64decode(image, validate=True) if isinstance(image, str) else bytes(image)
+    except (binascii.Error, ValueError):
+        return None
+    fmt = image_format(data)
+    if fmt is None:
+        return None
+    w, h = image_size(data, fmt)
+    header = HEADER.pack(MAGIC, VERSION, kind, seq & 0xFFFFFFFF, min(w, 0xFFFF), min(h, 0xFFFF), FORMATS[fmt])
+    return header + data
+
+
+def decode_binary(message: bytes):
+    """Inverso de encode_binary: (tema, seq, ancho, alto, formato, bytes de la imagen)"""
+    magic, version, kind, seq, w, h, fmt = HEADER.unpack_from(message)
+    if magic != MAGIC or version != VERSION or kind not in _TOPIC_BY_KIND or fmt not in _FORMAT_BY_CODE:
+        raise ValueError("Not an image frame")
+    return _TOPIC_BY_KIND[kind], seq, w, h, _FORMAT_BY_CODE[fmt], memoryview(message)[HEADER.size:]
@@ -0,0 +1,196 @@
+import json
+import time
+import asyncio
+import itertools
+from collections import deque
+
+import numpy as np
+
+from core.event_bus import LATEST_TOPICS
+from server.binary_frames import BINARY_TOPICS, encode_binary
+
+
+def _dumps(message: dict) -> str:
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class ClientConnection:
+    """
+    Un cliente WebSocket con su propia cola de envío y su propio task escritor.
+    Implements:
+    - Temas "latest" (vision_frame...): un hueco por tema; un frame nuevo sustituye al que aún
+      no se envió (drop-oldest), así un cliente lento recibe menos frames pero siempre el último
+    - Resto de temas: cola FIFO acotada en orden; si se llena, el cliente no da abasto y se expulsa
+      (al reconectar recibe el historial)
+    - Envíos con timeout: un socket colgado o cerrado se expulsa en vez de tragarse el error
+    - binary: el cliente recibe las imágenes como mensajes binarios (server/binary_frames.py)
+    """
+    def __init__(self, websocket, manager, max_queue: int = 1024, send_timeout: float = 5.0,
+                 latest_topics=LATEST_TOPICS, binary: bool = False):
+        self.websocket = websocket
+        self.manager = manager
+        self.binary = binary
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.latest_topics = latest_topics
+        self._ordered = deque()    # (seq, texto o bytes, t_encolado)
+        self._latest = {}          # tema -> (seq, texto o bytes, t_encolado)
+        self._ready = asyncio.Event()
+        self.task = None
+        self.closed = False
+        self.close_reason = None
+        self.sent = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+        self.latency = deque(maxlen=512) # s desde el encolado hasta que send_text termina
+
+    def start(self):
+        self.task = asyncio.create_task(self._writer())
+
+    def enqueue(self, topic: str, data, seq: int) -> bool:
+        """Encola un mensaje ya serializado (sin esperar). False si el cliente está cerrado o se expulsó."""
+        if self.closed:
+            return False
+        item = (seq, data, time.perf_counter())
+        if topic in self.latest_topics:
+            if topic in self._latest:
+                self.dropped += 1
+            self._latest[topic] = item
+        elif len(self._ordered) >= self.max_queue:
+            self.manager.evict(self, f"send queue full ({self.max_queue})")
+            return False
+        else:
+            self._ordered.append(item)
+        self._ready.set()
+        return True
+
+    @property
+    def depth(self) -> int:
+        return len(self._ordered) + len(self._latest)
+
+    def _drain(self):
+        batch = list(self._ordered) + list(self._latest.values())
+        self._ordered.clear()
+        self._latest.clear()
+        batch.sort(key=lambda item: item[0])
+        return batch
+
+    async def _writer(self):
+        while not self.closed:
+            await self._ready.wait()
+            self._ready.clear()
+            for _, data, queued in self._drain():
+                send = self.websocket.send_bytes if isinstance(data, bytes) else self.websocket.send_text
+                try:
+                    await asyncio.wait_for(send(data), self.send_timeout)
+                except asyncio.CancelledError:
+                    raise
+                except asyncio.TimeoutError:
+                    self.manager.evict(self, f"send timeout ({self.send_timeout}s)")
+                    return
+                except Exception as e:
+                    self.manager.evict(self, f"send failed: {e.__class__.__name__}")
+                    return
+                self.sent += 1
+                self.bytes_sent += len(data)
+                self.latency.append(time.perf_counter() - queued)
+
+    async def close(self):
+        self.closed = True
+        if self.task and self.task is not asyncio.current_task():
+            self.task.cancel()
+        try:
+            await asyncio.wait_for(self.websocket.close(), self.send_timeout)
+        except Exception:
+            pass # ya cerrado por el otro lado, o colgado
+
+
+class ConnectionManager:
+    """
+    Clientes WebSocket de la API.
+    Implements:
+    - broadcast/broadcast_many: cada mensaje se serializa una vez y se encola en cada cliente sin
+      esperar a ninguno (fan-out concurrente: cada cliente tiene su task escritor)
+    - Un cliente lento sólo se retrasa a sí mismo (cola acotada, frames drop-oldest)
+    - Expulsión de sockets muertos, colgados o saturados (stats["evicted"] con el motivo)
+    - Clientes binarios (/ws/chat?binary=1): vision_frame/vision_crop como cabecera + JPEG/PNG/WebP,
+      decodificado del base64 una vez por broadcast; el resto de eventos sigue en JSON
+    """
+    def __init__(self, max_queue: int = 1024, send_timeout: float = 5.0):
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.clients = {}  # websocket -> ClientConnection
+        self._seq = itertools.count(1)
+        self.stats = {"connected": 0, "evicted": 0, "broadcasts": 0, "evict_reasons": {}}
+
+    @property
+    def active_connections(self):
+        return list(self.clients)
+
+    async def connect(self, websocket):
+        await websocket.accept()
+        self.attach(websocket, binary=websocket.query_params.get("binary") in ("1", "true"))
+
+    def attach(self, websocket, binary: bool = False):
+        """Registra un socket ya aceptado y arranca su escritor"""
+        client = ClientConnection(websocket, self, self.max_queue, self.send_timeout, binary=binary)
+        self.clients[websocket] = client
+        client.start()
+        self.stats["connected"] += 1
+        return client
+
+    def disconnect(self, websocket):
+        """El cliente se fue (WebSocketDisconnect); idempotente tras una expulsión"""
+        client = self.clients.pop(websocket, None)
+        if client:
+            client.closed = True
+            if client.task:
+                client.task.cancel()
+
+    def evict(self, client, reason: str):
+        if self.clients.get(client.websocket) is not client:
+            return
+        del self.clients[client.websocket]
+        client.close_reason = reason
+        self.stats["evicted"] += 1
+        key = reason.split(" (")[0].split(":")[0]
+        self.stats["evict_reasons"][key] = self.stats["evict_reasons"].get(key, 0) + 1
+        print(f"[WS] Client evicted: {reason}")
+        asyncio.get_running_loop().create_task(client.close())
+
+    async def broadcast(self, message: dict):
+        self.stats["broadcasts"] += 1
+        topic = message.get("type")
+        seq = next(self._seq)
+        text = binary = None # cada representación se prepara una vez y sólo si algún cliente la usa
+        for client in list(self.clients.values()):
+            if client.binary and topic in BINARY_TOPICS:
+                if binary is None:
+                    binary = encode_binary(topic, message.get("payload"), seq) or b""
+                if binary:
+                    client.enqueue(topic, binary, seq)
+                    continue
+            if text is None:
+                text = _dumps(message)
+            client.enqueue(topic, text, seq)
+
+    async def broadcast_many(self, messages: list):
+        """Lote del EventBus: en orden, serializado una vez por mensaje"""
+        for message in messages:
+            await self.broadcast(message)
+
+    async def send(self, websocket, message: dict):
+        """Mensaje para un solo cliente, por su misma cola (no se intercala con los broadcasts)"""
+        client = self.clients.get(websocket)
+        if client:
+            client.enqueue(message.get("type"), _dumps(message), next(self._seq))
+
+    def get_stats(self):
+        clients = []
+        for client in self.clients.values():
+            lat = np.array(client.latency) * 1000 if client.latency else np.zeros(1)
+            clients.append({"binary": client.binary, "sent": client.sent, "bytes": client.bytes_sent,
+                            "dropped": client.dropped, "depth": client.depth,
+                            "latency_ms": {"p50": round(float(np.percentile(lat, 50)), 2),
+                                           "p99": round(float(np.percentile(lat, 99)), 2)}})
+        return {**self.stats, "active": len(self.clients), "clients": clients}
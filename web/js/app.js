@@ -1,5 +1,7 @@
 const wsProtocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-const wsUrl = `${wsProtocol}//${window.location.host}/ws/chat`;
+// Imágenes de visión como mensajes binarios (cabecera + JPEG/PNG/WebP) si el navegador puede decodificarlas
+const BINARY_FRAMES = typeof createImageBitmap === 'function';
+const wsUrl = `${wsProtocol}//${window.location.host}/ws/chat${BINARY_FRAMES ? '?binary=1' : ''}`;
 let socket;
 let reconnectAttempts = 0;
 const MAX_RECONNECT_DELAY = 30000;
@@ -72,6 +74,7 @@ btnCloseAuto.onclick = () => {
 function connect() {
     console.log(`[Cortex] Connecting to ${wsUrl}...`);
     socket = new WebSocket(wsUrl);
+    socket.binaryType = 'arraybuffer';
 
     socket.onopen = () => {
         console.log("[Cortex] Neural link established.");
@@ -81,6 +84,10 @@ function connect() {
     };
 
     socket.onmessage = (event) => {
+        if (event.data instanceof ArrayBuffer) {
+            handleBinaryFrame(event.data);
+            return;
+        }
         try {
             const data = JSON.parse(event.data);
             handleEvent(data);
@@ -107,6 +114,58 @@ function connect() {
 // Initial connection
 connect();
 
+// Binary image frames (server/binary_frames.py), little-endian:
+// magic "AF" | version u8 | kind u8 | seq u32 | width u16 | height u16 | format u8 | 3 pad bytes
+const FRAME_HEADER_SIZE = 16;
+const FRAME_TARGETS = { 1: 'vision-feed', 2: 'precision-crop' };
+const FRAME_MIME = { 1: 'image/jpeg', 2: 'image/png', 3: 'image/webp' };
+const frameDecoding = {}; // kind -> decode in flight
+const pendingFrames = {}; // kind -> newest frame waiting for the decoder (older ones are skipped)
+
+function handleBinaryFrame(buffer) {
+    const view = new DataView(buffer);
+    if (buffer.byteLength < FRAME_HEADER_SIZE || view.getUint8(0) !== 0x41 || view.getUint8(1) !== 0x46) {
+        console.error("[Cortex] Unknown binary frame");
+        return;
+    }
+    const kind = view.getUint8(3);
+    const target = document.getElementById(FRAME_TARGETS[kind]);
+    if (!target) return;
+    if (frameDecoding[kind]) {
+        pendingFrames[kind] = buffer;
+        return;
+    }
+
+    frameDecoding[kind] = true;
+    const blob = new Blob([new Uint8Array(buffer, FRAME_HEADER_SIZE)], { type: FRAME_MIME[view.getUint8(12)] });
+    createImageBitmap(blob)
+        .then(bitmap => drawBitmap(target, bitmap))
+        .catch(e => console.error("[Cortex] Error decoding frame:", e))
+        .finally(() => {
+            frameDecoding[kind] = false;
+            const next = pendingFrames[kind];
+            if (next) {
+                pendingFrames[kind] = null;
+                handleBinaryFrame(next);
+            }
+        });
+}
+
+function drawBitmap(target, bitmap) {
+    let canvas = target.querySelector('canvas');
+    if (!canvas) {
+        target.innerHTML = '';
+        canvas = document.createElement('canvas');
+        target.appendChild(canvas);
+    }
+    if (canvas.width !== bitmap.width || canvas.height !== bitmap.height) {
+        canvas.width = bitmap.width;
+        canvas.height = bitmap.height;
+    }
+    canvas.getContext('2d').drawImage(bitmap, 0, 0);
+    bitmap.close();
+}
+
 function handleEvent(data) {
     const payload = data.payload;
 